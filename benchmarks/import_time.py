@@ -0,0 +1,60 @@
+"""Measure the cold import time of calsim_dash_widgets and its submodules.
+
+Every measurement runs in a fresh interpreter, so nothing is cached between
+them. Usage:
+
+    python benchmarks/import_time.py [--repeat 5] [module ...]
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+
+DEFAULT_MODULES = (
+    "calsim_dash_widgets",
+    "calsim_dash_widgets.aggregation",
+    "calsim_dash_widgets.cards",
+    "calsim_dash_widgets.alerts",
+    "calsim_dash_widgets.plots",
+)
+
+SNIPPET = """
+import time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+import sys
+heavy = ("plotly.express", "dash", "csrs", "pandss")
+print(elapsed, ",".join(m for m in heavy if m in sys.modules))
+"""
+
+
+def measure(module: str) -> tuple[float, str]:
+    out = subprocess.run(
+        [sys.executable, "-c", SNIPPET.format(module=module)],
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(out[0]), out[1] if len(out) > 1 else ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(f"{'module':<36} {'median ms':>10} {'min ms':>8}  heavy imports")
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        times = [t * 1_000 for t, _ in runs]
+        loaded = runs[-1][1] or "-"
+        print(
+            f"{module:<36} {statistics.median(times):>10.1f} "
+            f"{min(times):>8.1f}  {loaded}"
+        )
+
+
+if __name__ == "__main__":
+    main()
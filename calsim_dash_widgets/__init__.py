@@ -1,3 +1,4 @@
+import importlib
 from importlib.metadata import PackageNotFoundError, version
 from pathlib import Path
 
@@ -7,4 +8,66 @@ except PackageNotFoundError:
     # calsim_dash_widgets not installed, likely developer mode
     __version__ = None
 
-from . import alerts, assets, branding, cards, plots
+# Submodules are imported on first access (PEP 562), so a process that only
+# needs e.g. aggregation does not pay for dash, plotly, and csrs
+_SUBMODULES = (
+    "aggregation",
+    "alerts",
+    "app",
+    "assets",
+    "background",
+    "branding",
+    "cache",
+    "cards",
+    "clients",
+    "compare",
+    "disk",
+    "instrumentation",
+    "memory",
+    "plots",
+    "plotting",
+    "prefetch",
+    "prerender",
+    "report",
+    "series_store",
+    "shared",
+    "singleflight",
+    "standin",
+    "tables",
+    "timeseries",
+)
+__all__ = [*_SUBMODULES, "install"]
+# Submodules registering dash callbacks when imported. Dash copies registered
+# callbacks into an app once, on its first request, so these must be imported
+# before then, see install()
+_CALLBACK_MODULES = ("background", "series_store", "tables")
+
+
+def install(app=None):
+    """Register the callbacks of every widget that needs one.
+
+    Call this before the app serves its first request, e.g. right after
+    creating it; `app.WidgetDash` calls it for you. Otherwise widgets built
+    inside a layout function, whose modules are only imported then, render
+    without their callbacks (blank store-backed graphs, tables that never page).
+    """
+    if app is not None and getattr(app, "_got_first_request", dict()).get(
+        "setup_server"
+    ):
+        raise RuntimeError(
+            "calsim_dash_widgets.install() must be called before the app serves "
+            + "its first request"
+        )
+    for name in _CALLBACK_MODULES:
+        importlib.import_module(f"{__name__}.{name}")
+
+
+def __getattr__(name: str):
+    if name in _SUBMODULES:
+        # import_module sets the attribute, later lookups skip __getattr__
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_SUBMODULES))
@@ -1,10 +1,25 @@
-from typing import Callable, Literal
+from __future__ import annotations
 
-import csrs
+import warnings
+from typing import TYPE_CHECKING, Callable, Literal
+
+import numpy as np
 import pandas as pd
-import pandss
 
+if TYPE_CHECKING:
+    import csrs
+    import pandss
+
+from . import instrumentation
+from .timeseries import ArrayTimeseries, CompactTimeseries
+
+
+@instrumentation.timed("convert")
+def to_frame(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> pd.DataFrame:
+    return timeseries.to_frame()
 
+
+@instrumentation.timed("aggregate")
 def agg(
     timeseries: csrs.Timeseries | pandss.RegularTimeseries,
     func: Callable | str | list | dict | None = None,
@@ -12,21 +27,25 @@ def agg(
     *args,
     **kwargs,
 ) -> float:
-    return timeseries.to_frame().iloc[:, 0].agg(func, axis, *args, **kwargs)
+    return to_frame(timeseries).iloc[:, 0].agg(func, axis, *args, **kwargs)
 
 
+@instrumentation.timed("aggregate")
 def mean(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> float:
     return agg(timeseries, "mean")
 
 
+@instrumentation.timed("aggregate")
 def min(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> float:
     return agg(timeseries, "min")
 
 
+@instrumentation.timed("aggregate")
 def max(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> float:
     return agg(timeseries, "max")
 
 
+@instrumentation.timed("aggregate")
 def eos_agg(
     timeseries: csrs.Timeseries | pandss.RegularTimeseries,
     func: Callable | str | list | dict | None = None,
@@ -34,7 +53,7 @@ def eos_agg(
     *args,
     **kwargs,
 ) -> float:
-    df = timeseries.to_frame()
+    df = to_frame(timeseries)
     if not hasattr(df.index, "month"):
         raise ValueError(
             f"Cannot filter by months without date-like index: {type(df.index)=}"
@@ -44,24 +63,28 @@ def eos_agg(
     return df.iloc[:, 0].agg(func, axis, *args, **kwargs)
 
 
+@instrumentation.timed("aggregate")
 def eos_mean(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> float:
     return eos_agg(timeseries, "mean")
 
 
+@instrumentation.timed("aggregate")
 def eos_min(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> float:
     return eos_agg(timeseries, "min")
 
 
+@instrumentation.timed("aggregate")
 def eos_max(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> float:
     return eos_agg(timeseries, "max")
 
 
+@instrumentation.timed("aggregate")
 def annual_sum(
     timeseries: csrs.Timeseries | pandss.RegularTimeseries,
     month: int = 1,
     cfs_to_taf: bool = True,
 ) -> pd.DataFrame:
-    df = timeseries.to_frame()
+    df = to_frame(timeseries)
     if cfs_to_taf and (timeseries.units.lower() == "cfs"):
         if isinstance(df.index, pd.PeriodIndex):
             delta = df.index.to_timestamp(how="end") - df.index.to_timestamp()
@@ -83,11 +106,312 @@ def annual_sum(
     return df.resample(pd.offsets.YearEnd(month=month)).sum()
 
 
+@instrumentation.timed("aggregate")
 def annual_eos(timeseries: csrs.Timeseries | pandss.RegularTimeseries) -> pd.DataFrame:
-    df = timeseries.to_frame()
+    df = to_frame(timeseries)
     if not hasattr(df.index, "month"):
         raise ValueError(
             f"Cannot filter by months without date-like index: {type(df.index)=}"
         )
     mask = df.index.month == 9
     return df.loc[mask].copy()
+
+
+def values_of(timeseries: csrs.Timeseries | ArrayTimeseries) -> np.ndarray:
+    return np.asarray(timeseries.values, dtype=np.float64)
+
+
+def month_offsets_of(timeseries: csrs.Timeseries | ArrayTimeseries) -> np.ndarray:
+    # Months since 1970-01 of each value
+    if isinstance(timeseries, CompactTimeseries):
+        return timeseries.months.astype(np.int64)
+    dates = ArrayTimeseries.from_timeseries(timeseries).dates
+    return dates.astype("datetime64[M]").astype(np.int64)
+
+
+def months_of(timeseries: csrs.Timeseries | ArrayTimeseries) -> np.ndarray:
+    # Calendar month (1-12) of each value
+    return month_offsets_of(timeseries) % 12 + 1
+
+
+def rolling_mean_2d(values: np.ndarray, window: int) -> np.ndarray:
+    """Means of every `window` consecutive steps of each row, in O(n) from
+    cumulative sums. Windows containing NaN are NaN."""
+    values = np.atleast_2d(np.asarray(values, dtype=np.float64))
+    k, n = values.shape
+    if window > n:
+        return np.full((k, 0), np.nan)
+    missing = np.isnan(values)
+    zero = np.zeros((k, 1))
+    sums = np.concatenate((zero, np.cumsum(np.where(missing, 0.0, values), 1)), 1)
+    gaps = np.concatenate((zero, np.cumsum(missing, 1)), 1)
+    means = (sums[:, window:] - sums[:, :-window]) / window
+    means[(gaps[:, window:] - gaps[:, :-window]) > 0] = np.nan
+    return means
+
+
+def longest_run_2d(mask: np.ndarray) -> np.ndarray:
+    """Length of the longest run of True in each row, in O(n)."""
+    mask = np.atleast_2d(np.asarray(mask, dtype=bool))
+    if mask.shape[1] == 0:
+        return np.zeros(mask.shape[0], dtype=np.int64)
+    count = np.cumsum(mask, axis=1)
+    # The count at the last False before each step, runs are counted from there
+    last_reset = np.maximum.accumulate(np.where(mask, 0, count), axis=1)
+    return (count - last_reset).max(axis=1)
+
+
+def _min_rolling_mean(window: int) -> Callable:
+    def reducer(values: np.ndarray, axis: int = 1) -> np.ndarray:
+        means = rolling_mean_2d(values, window)
+        if means.shape[1] == 0:
+            return np.full(means.shape[0], np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN rows
+            return np.nanmin(means, axis=1)
+
+    return reducer
+
+
+@instrumentation.timed("aggregate")
+def min_3yr_mean(timeseries: csrs.Timeseries | ArrayTimeseries) -> float:
+    # Lowest average over 36 consecutive months, monthly data
+    return float(_min_rolling_mean(36)(values_of(timeseries)[None, :])[0])
+
+
+@instrumentation.timed("aggregate")
+def min_6yr_mean(timeseries: csrs.Timeseries | ArrayTimeseries) -> float:
+    # Lowest average over 72 consecutive months, monthly data
+    return float(_min_rolling_mean(72)(values_of(timeseries)[None, :])[0])
+
+
+@instrumentation.timed("aggregate")
+def longest_run_below(
+    timeseries: csrs.Timeseries | ArrayTimeseries,
+    threshold: float = 0.0,
+) -> float:
+    # Most consecutive steps below `threshold`, e.g. months of short deliveries
+    with np.errstate(invalid="ignore"):
+        below = values_of(timeseries) < threshold
+    return float(longest_run_2d(below)[0])
+
+
+@instrumentation.timed("aggregate")
+def longest_run_above(
+    timeseries: csrs.Timeseries | ArrayTimeseries,
+    threshold: float = 0.0,
+) -> float:
+    with np.errstate(invalid="ignore"):
+        above = values_of(timeseries) > threshold
+    return float(longest_run_2d(above)[0])
+
+
+def _longest_run(above: bool) -> Callable:
+    def reducer(values: np.ndarray, axis: int = 1, threshold: float = 0.0):
+        with np.errstate(invalid="ignore"):
+            mask = values > threshold if above else values < threshold
+        return longest_run_2d(mask).astype(np.float64)
+
+    return reducer
+
+
+# Vectorized equivalents of the single-value aggregations above: the reducer, and
+# whether only end of September values are used. Reducers take the keyword
+# arguments of their aggregation.
+VECTORIZED = {
+    mean: (np.nanmean, False),
+    min: (np.nanmin, False),
+    max: (np.nanmax, False),
+    eos_mean: (np.nanmean, True),
+    eos_min: (np.nanmin, True),
+    eos_max: (np.nanmax, True),
+    min_3yr_mean: (_min_rolling_mean(36), False),
+    min_6yr_mean: (_min_rolling_mean(72), False),
+    longest_run_below: (_longest_run(above=False), False),
+    longest_run_above: (_longest_run(above=True), False),
+}
+
+
+@instrumentation.timed("aggregate")
+def reduce_many(
+    timeseries: list[csrs.Timeseries | ArrayTimeseries],
+    func: Callable,
+    **kwargs,
+) -> np.ndarray:
+    """Same as `[func(ts, **kwargs) for ts in timeseries]` for the functions in
+    VECTORIZED, reducing series of equal length together as one 2-D array."""
+    reducer, eos = VECTORIZED[func]
+    out = np.full(len(timeseries), np.nan)
+    by_length: dict[int, list[int]] = dict()
+    for i, ts in enumerate(timeseries):
+        by_length.setdefault(len(ts.values), list()).append(i)
+    for n, idx in by_length.items():
+        if n == 0:
+            continue
+        values = np.stack([values_of(timeseries[i]) for i in idx])
+        if eos:
+            months = np.stack([months_of(timeseries[i]) for i in idx])
+            values = np.where(months == 9, values, np.nan)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN rows
+            out[idx] = reducer(values, axis=1, **kwargs)
+    return out
+
+
+@instrumentation.timed("aggregate")
+def percentile_bands(
+    timeseries: list[csrs.Timeseries | ArrayTimeseries],
+    percentiles: tuple[float, ...] = (10, 25, 50, 75, 90),
+) -> pd.DataFrame:
+    """Per-timestep percentiles across an ensemble, one column per percentile.
+
+    Members are aligned on their dates, missing steps count as NaN.
+    """
+    if not timeseries:
+        raise ValueError("No runs to compute percentile bands from")
+    arrays = [ArrayTimeseries.from_timeseries(ts) for ts in timeseries]
+    dates = arrays[0].dates
+    if all(np.array_equal(a.dates, dates) for a in arrays[1:]):
+        values = np.stack([values_of(a) for a in arrays])
+    else:
+        dates = np.unique(np.concatenate([a.dates for a in arrays]))
+        values = np.full((len(arrays), len(dates)), np.nan)
+        for i, a in enumerate(arrays):
+            values[i, np.searchsorted(dates, a.dates)] = values_of(a)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # All-NaN steps
+        bands = np.nanpercentile(values, percentiles, axis=0)
+    return pd.DataFrame(
+        bands.T,
+        index=pd.DatetimeIndex(dates),
+        columns=[f"p{p:g}" for p in percentiles],
+    )
+
+
+def average_annual_flow(timeseries: csrs.Timeseries | ArrayTimeseries) -> float:
+    # Same value as cards.AverageAnnualFlowCard, in TAF for flows in cfs
+    return annual_sum(timeseries).iloc[:, 0].mean()
+
+
+@instrumentation.timed("aggregate")
+def statistics(
+    timeseries: list[csrs.Timeseries | ArrayTimeseries],
+    funcs: dict[str, Callable] | None = None,
+) -> pd.DataFrame:
+    """A table of summary statistics, one row per timeseries.
+
+    Functions in VECTORIZED are computed for all rows at once, others per row.
+    """
+    funcs = funcs or {
+        "eos_mean": eos_mean,
+        "mean": mean,
+        "min": min,
+        "max": max,
+        "average_annual_flow": average_annual_flow,
+    }
+    df = pd.DataFrame(
+        {
+            "scenario": [ts.scenario for ts in timeseries],
+            "version": [ts.version for ts in timeseries],
+            "path": [ts.path for ts in timeseries],
+            "units": [ts.units for ts in timeseries],
+        }
+    )
+    for name, func in funcs.items():
+        if func in VECTORIZED:
+            df[name] = reduce_many(timeseries, func)
+        else:
+            df[name] = [func(ts) for ts in timeseries]
+    return df
+
+
+@instrumentation.timed("aggregate")
+def threshold_counts(
+    timeseries: list[csrs.Timeseries | ArrayTimeseries],
+    rows: np.ndarray,
+    thresholds: np.ndarray,
+    above: np.ndarray,
+    months: np.ndarray,
+) -> np.ndarray:
+    """Count the steps of `timeseries[rows[i]]` beyond `thresholds[i]` for many
+    rules at once.
+
+    `above[i]` counts values above the threshold instead of below, and
+    `months` is an (n_rules, 12) boolean array of the calendar months counted.
+    Rules whose series have the same length are evaluated as one 2-D array.
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    above = np.asarray(above, dtype=bool)
+    months = np.asarray(months, dtype=bool)
+    out = np.zeros(len(rows), dtype=np.int64)
+    by_length: dict[int, list[int]] = dict()
+    for i, row in enumerate(rows):
+        by_length.setdefault(len(timeseries[row].values), list()).append(i)
+    for n, idx in by_length.items():
+        if n == 0:
+            continue
+        idx = np.asarray(idx)
+        # Each distinct series is stacked once, rules index into the stack
+        series, inverse = np.unique(rows[idx], return_inverse=True)
+        values = np.stack([values_of(timeseries[s]) for s in series])[inverse]
+        month = np.stack([months_of(timeseries[s]) for s in series])[inverse]
+        limit = thresholds[idx, None]
+        with np.errstate(invalid="ignore"):  # NaN never counts
+            beyond = np.where(above[idx, None], values > limit, values < limit)
+        counted = np.take_along_axis(months[idx], month - 1, axis=1)
+        out[idx] = np.count_nonzero(beyond & counted, axis=1)
+    return out
+
+
+WATER_YEAR_MONTHS = (
+    "Oct", "Nov", "Dec", "Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep"
+)
+
+
+def _water_year_index(timeseries: csrs.Timeseries | ArrayTimeseries) -> np.ndarray:
+    # Months since the start of water year 1970 (Oct 1969), so that
+    # divmod(index, 12) is (water year - 1970, month column)
+    return month_offsets_of(timeseries) + 3
+
+
+@instrumentation.timed("aggregate")
+def water_year_matrix(
+    timeseries: csrs.Timeseries | ArrayTimeseries,
+    years: np.ndarray | None = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Monthly values as an (n_years, 12) array of water-year rows and
+    October to September columns, missing months are NaN.
+
+    Returns the water years and the array. Values are scattered into place, so
+    gaps and partial years need no grouping.
+    """
+    index = _water_year_index(timeseries)
+    values = values_of(timeseries)
+    if years is None:
+        if index.size == 0:
+            return np.arange(0), np.full((0, 12), np.nan)
+        years = np.arange(index.min() // 12, index.max() // 12 + 1) + 1970
+    matrix = np.full((len(years), 12), np.nan)
+    if len(years) == 0:
+        return years, matrix
+    row = index // 12 - (years[0] - 1970)
+    keep = (row >= 0) & (row < len(years))
+    matrix[row[keep], index[keep] % 12] = values[keep]
+    return years, matrix
+
+
+@instrumentation.timed("aggregate")
+def water_year_difference(
+    base: csrs.Timeseries | ArrayTimeseries,
+    alt: csrs.Timeseries | ArrayTimeseries,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Alt minus base as a water-year by month array, over the years of both."""
+    b, a = _water_year_index(base), _water_year_index(alt)
+    both = np.concatenate((b, a))
+    if both.size == 0:
+        return np.arange(0), np.full((0, 12), np.nan)
+    years = np.arange(both.min() // 12, both.max() // 12 + 1) + 1970
+    _, base_matrix = water_year_matrix(base, years)
+    _, alt_matrix = water_year_matrix(alt, years)
+    return years, alt_matrix - base_matrix
@@ -1,12 +1,36 @@
-from typing import Any, Literal
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator, Literal, Mapping
 
 import csrs
+import dash
 import dash_bootstrap_components as dbc
 from dash import html
+from dash.development.base_component import Component
 
-from . import aggregation, timeseries
+from . import (
+    aggregation,
+    background,
+    cache,
+    clients,
+    compare,
+    instrumentation,
+    prefetch,
+    timeseries,
+)
 
-StorageAggArguments = Literal["eos_mean", "eos_max", "eos_min", "mean", "max", "min"]
+StorageAggArguments = Literal[
+    "eos_mean",
+    "eos_max",
+    "eos_min",
+    "mean",
+    "max",
+    "min",
+    "min_3yr_mean",
+    "min_6yr_mean",
+]
 AGG_MEANING = {
     "eos_mean": "Average End of Sept Storage",
     "eos_max": "End of Sept Storage Maximum",
@@ -14,21 +38,32 @@ AGG_MEANING = {
     "mean": "Average Monthly Storage",
     "max": "Maximum Single Month Storage",
     "min": "Minimum Single Month Storage",
+    "min_3yr_mean": "Minimum 3-Year Average Storage",
+    "min_6yr_mean": "Minimum 6-Year Average Storage",
+}
+
+ALERT_ICONS = {
+    "warning": "bi bi-exclamation-triangle-fill",
+    "danger": "bi bi-x-octagon-fill",
+    "success": "bi bi-check-circle-fill",
 }
 
 
 class TimeseriesAlert(dbc.Card):
+    @instrumentation.instrumented
     def __init__(
         self,
         observed: csrs.Timeseries,
         expected: csrs.Timeseries,
         allowable_diff_perc: float = 0.05,
         name: str = "",
+        engine: compare.ComparisonEngine | None = None,
         **kwargs,
     ):
         self._observed = observed
         self._expected = expected
         self.allowable_diff_perc = allowable_diff_perc
+        self.engine = engine
 
         o = self.get_observed()
         e = self.get_expected()
@@ -39,15 +74,8 @@ class TimeseriesAlert(dbc.Card):
         name = name or self._observed.path.split("/")[2]
         units = self._observed.units
 
-        if bad_comp:
-            i = "bi bi-exclamation-triangle-fill"
-            color = "warning"
-        elif abs(diff_perc) >= self.allowable_diff_perc:
-            i = "bi bi-x-octagon-fill"
-            color = "danger"
-        else:
-            i = "bi bi-check-circle-fill"
-            color = "success"
+        color = self.status(diff_perc, bad_comp, self.allowable_diff_perc)
+        i = ALERT_ICONS[color]
         # Assemble
         li_bootstrap = (
             "list-group-item d-flex justify-content-between "
@@ -104,18 +132,30 @@ class TimeseriesAlert(dbc.Card):
             **kwargs,
         )
 
-    def get_observed(self) -> float:
-        return self._observed.to_frame().iloc[:, 0].mean()
+    @staticmethod
+    def summarize(timeseries: csrs.Timeseries) -> float:
+        return aggregation.mean(timeseries)
 
-    def get_expected(self) -> float:
-        return self._expected.to_frame().iloc[:, 0].mean()
+    @staticmethod
+    def status(
+        diff_perc: float,
+        bad_comparability: dict,
+        allowable_diff_perc: float = 0.05,
+    ) -> Literal["warning", "danger", "success"]:
+        if bad_comparability:
+            return "warning"
+        if abs(diff_perc) >= allowable_diff_perc:
+            return "danger"
+        return "success"
 
-    def get_bad_comparability(self) -> dict[str, tuple[Any, Any]]:
+    @staticmethod
+    def compare(
+        observed: csrs.Timeseries,
+        expected: csrs.Timeseries,
+    ) -> dict[str, tuple[Any, Any]]:
         not_comparable = dict()
-        for attr, val in self._observed.model_dump(
-            exclude=("scenario", "version")
-        ).items():
-            other = getattr(self._expected, attr)
+        for attr, val in observed.model_dump(exclude=("scenario", "version")).items():
+            other = getattr(expected, attr)
             if hasattr(val, "__len__"):
                 # Array, just check sizes
                 if len(val) != len(other):
@@ -125,78 +165,201 @@ class TimeseriesAlert(dbc.Card):
                     not_comparable[attr] = (val, other)
         return not_comparable
 
-
-class MeanStorageAlert(TimeseriesAlert):
     def get_observed(self) -> float:
-        return aggregation.annual_eos(self._observed).iloc[:, 0].mean()
+        return self.summarize(self._observed)
 
     def get_expected(self) -> float:
-        return aggregation.annual_eos(self._expected).iloc[:, 0].mean()
+        if self.engine is None:
+            return self.summarize(self._expected)
+        kind = type(self).__qualname__
+        return self.engine.baseline(self._expected, kind, self.summarize)
+
+    def get_bad_comparability(self) -> dict[str, tuple[Any, Any]]:
+        return self.compare(self._observed, self._expected)
+
+
+class MeanStorageAlert(TimeseriesAlert):
+    @staticmethod
+    def summarize(timeseries: csrs.Timeseries) -> float:
+        return aggregation.annual_eos(timeseries).iloc[:, 0].mean()
+
+
+class UnavailableAlert(dbc.Card):
+    """Stands in for an alert whose data could not be fetched."""
+
+    def __init__(self, name: str, error: Exception, **kwargs):
+        # Same as the warning tier of the other alerts
+        icon = html.I(
+            className=f"{ALERT_ICONS['warning']} p-2 text-warning",
+            style={"font-size": "x-large"},
+        )
+        body = dbc.CardBody(
+            [
+                html.H6(name, className="card-title"),
+                html.P("Data unavailable", className="small m-0"),
+                html.P(type(error).__name__, className="small text-muted m-0"),
+            ],
+            class_name="card-body p-2",
+        )
+        kwargs = {
+            "color": "warning",
+            "outline": True,
+            "class_name": "m-1",
+        } | kwargs
+        super().__init__(
+            children=[
+                dbc.Row(
+                    className="g-1 align-items-center",
+                    children=[
+                        dbc.Col(icon, class_name="col-md-2 align-items-center"),
+                        dbc.Col(body, class_name="col-md-10"),
+                    ],
+                )
+            ],
+            **kwargs,
+        )
 
 
 class StudyHealthBoard(html.Div):
+    ALERTS = {
+        "Storage": [
+            (MeanStorageAlert, "shasta_storage", "Shasta Storage"),
+            (MeanStorageAlert, "folsom_storage", "Folsom Storage"),
+            (MeanStorageAlert, "oroville_storage", "Oroville Storage"),
+        ],
+        "Exports": [
+            (TimeseriesAlert, "banks_exports", "Banks Exports"),
+            (TimeseriesAlert, "jones_exports", "Jones Exports"),
+        ],
+    }
+
+    @instrumentation.instrumented
     def __init__(
         self,
         observed: csrs.Run,
         expected: csrs.Run,
         client: csrs.clients.Client | None = None,
+        progress: Callable[[int, int], None] | None = None,
+        cache: cache.VersionedCache | None = None,
+        partial: Callable[[int, int, list[Component]], None] | None = None,
     ):
         self._observed = observed
         self._expected = expected
+        self.cache = cache
+        if client is None and cache is not None:
+            client = cache.client
+        self.client = client or clients.get_client()  # Default to CSRS server
+        # Alerts are built as soon as both of their timeseries have arrived
+        items = [
+            (section, *item)
+            for section, alerts in self.ALERTS.items()
+            for item in alerts
+        ]
+        fetched = dict()
+        built: dict[int, Component] = dict()
+        for done, total, key, result in self._fetch_each():
+            fetched[key] = result
+            for j, (_, alert_factory, path, name) in enumerate(items):
+                o = fetched.get(self._key(self._observed, path))
+                e = fetched.get(self._key(self._expected, path))
+                if j in built or o is None or e is None:
+                    continue
+                if isinstance(o, Exception) or isinstance(e, Exception):
+                    built[j] = UnavailableAlert(
+                        name, o if isinstance(o, Exception) else e
+                    )
+                else:
+                    built[j] = alert_factory(o, e, name=name)
+            if progress is not None:
+                progress(done, total)
+            if partial is not None:
+                partial(done, total, self._sections(items, built))
+        super().__init__(children=self._sections(items, built))
 
-        self.client = client or csrs.RemoteClient(
-            "https://calsim-scenario-results-server.azurewebsites.net/"
-        )  # Default to CSRS server
-        alerts = {
-            "Storage": [
-                (MeanStorageAlert, "shasta_storage", "Shasta Storage"),
-                (MeanStorageAlert, "folsom_storage", "Folsom Storage"),
-                (MeanStorageAlert, "oroville_storage", "Oroville Storage"),
-            ],
-            "Exports": [
-                (TimeseriesAlert, "banks_exports", "Banks Exports"),
-                (TimeseriesAlert, "jones_exports", "Jones Exports"),
-            ],
-        }
-        children = list()
-        for section, paths in alerts.items():
-            alert_objs = list()
-            paths: list[tuple[TimeseriesAlert.__class__, str, str]]
-            for alert_factory, path, name in paths:
-                obj = alert_factory(
-                    self.get_o_timeseries(path),
-                    self.get_e_timeseries(path),
-                    name=name,
-                )
-                alert_objs.append(obj)
-            children.append(
-                dbc.Stack(
-                    [
-                        html.H5(section),
-                        dbc.Stack(alert_objs, direction="horizontal", gap=3),
-                    ]
-                )
-            )
-        super().__init__(children=children)
+    @staticmethod
+    def _sections(items: list[tuple], built: dict[int, Component]) -> list:
+        # Sections in order, with the alerts built so far
+        sections: dict[str, list[Component]] = dict()
+        for j, (section, *_) in enumerate(items):
+            if j in built:
+                sections.setdefault(section, list()).append(built[j])
+        return [_section(title, objs) for title, objs in sections.items()]
+
+    @classmethod
+    def paths(cls) -> list[str]:
+        return [path for items in cls.ALERTS.values() for _, path, _ in items]
+
+    @classmethod
+    def prefetch(cls, prefetcher: prefetch.Prefetcher, *runs: csrs.Run) -> int:
+        """Declare that boards for `runs` are likely to be opened next."""
+        return prefetcher.request(runs, cls.paths())
+
+    @staticmethod
+    def _key(run: csrs.Run, path: str) -> tuple[str, str, str]:
+        return (run.scenario, run.version, path)
+
+    def _fetch_each(
+        self,
+    ) -> Iterator[tuple[int, int, tuple, csrs.Timeseries | Exception]]:
+        """Fetch concurrently, so the board waits on the slowest request and not
+        the sum, yielding (done, total, key, timeseries) as each one finishes.
+
+        Fetches that fail because the server is unreachable or the circuit is
+        open yield the exception instead, other errors are raised.
+        """
+        runs = (self._observed, self._expected)
+        requests = {self._key(r, p): (r, p) for r in runs for p in self.paths()}
+        with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+            futures = {
+                pool.submit(
+                    contextvars.copy_context().run,  # Keep instrumentation spans
+                    self._get_timeseries,
+                    run,
+                    path,
+                ): key
+                for key, (run, path) in requests.items()
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                try:
+                    result = future.result()
+                except clients.UNAVAILABLE as e:
+                    result = e
+                yield done, len(futures), futures[future], result
 
     def get_o_timeseries(self, path: str) -> csrs.Timeseries:
-        obj = self._observed
-        return self.client.get_timeseries(
-            scenario=obj.scenario,
-            version=obj.version,
-            path=path,
-        )
+        return self._get_timeseries(self._observed, path)
 
     def get_e_timeseries(self, path: str) -> csrs.Timeseries:
-        obj = self._expected
-        return self.client.get_timeseries(
-            scenario=obj.scenario,
-            version=obj.version,
-            path=path,
-        )
+        return self._get_timeseries(self._expected, path)
+
+    def _get_timeseries(self, obj: csrs.Run, path: str) -> csrs.Timeseries:
+        with instrumentation.span(None, "fetch"):
+            if self.cache is not None:
+                return self.cache.get_timeseries(obj.scenario, obj.version, path)
+            return self.client.get_timeseries(
+                scenario=obj.scenario,
+                version=obj.version,
+                path=path,
+            )
+
+
+@dataclass
+class AlertResult:
+    observed: float = float("nan")
+    expected: float = float("nan")
+    diff_perc: float = float("nan")
+    error: Exception | None = None
+    seconds: float = 0.0
+
+    @classmethod
+    def from_values(cls, ov: float, ev: float, seconds: float = 0.0) -> "AlertResult":
+        diff = ov - ev
+        base = ev if ev != 0 else 1.0  # Avoid ZeroDivisionError
+        return cls(observed=ov, expected=ev, diff_perc=diff / base, seconds=seconds)
 
 
 class TinyAlert(dbc.Badge):
+    @instrumentation.instrumented
     def __init__(
         self,
         observed: timeseries.TimeseriesDataset,
@@ -204,6 +367,7 @@ class TinyAlert(dbc.Badge):
         filter,
         allowable_diff_perc: float = 0.05,
         filter_kwargs: dict = None,
+        result: AlertResult | None = None,
         **kwargs,
     ):
         self.observed = observed
@@ -213,20 +377,18 @@ class TinyAlert(dbc.Badge):
         self.filter_kwargs = filter_kwargs or dict()
         self.kwargs = kwargs
         # Decide which badge to be
-        try:
-            ov = self.observed.filter_to_value(filter, **self.filter_kwargs)
-            ev = self.expected.filter_to_value(filter, **self.filter_kwargs)
-            diff = ov - ev
-            if ev == 0:
-                ev = 1.0  # Avoid ZeroDivisionError
-            diff_perc = diff / ev
-        except Exception:
+        self.result = result or self.evaluate(
+            observed,
+            expected,
+            filter,
+            self.filter_kwargs,
+        )
+        if self.result.error is not None:
             self.kwargs["color"] = "warning"
+        elif abs(self.result.diff_perc) > self.allowable_diff_perc:
+            self.kwargs["color"] = "danger"
         else:
-            if abs(diff_perc) > self.allowable_diff_perc:
-                self.kwargs["color"] = "danger"
-            else:
-                self.kwargs["color"] = "success"
+            self.kwargs["color"] = "success"
         name = self.observed.timeseries.path.split("/")[2]
         kwargs = {
             "className": "me-1",
@@ -235,6 +397,108 @@ class TinyAlert(dbc.Badge):
         } | self.kwargs
         super().__init__(**kwargs)
 
+    @staticmethod
+    def evaluate(
+        observed: timeseries.TimeseriesDataset,
+        expected: timeseries.TimeseriesDataset,
+        filter,
+        filter_kwargs: dict | None = None,
+    ) -> AlertResult:
+        filter_kwargs = filter_kwargs or dict()
+        start = time.perf_counter()
+        try:
+            ov = observed.filter_to_value(filter, **filter_kwargs)
+            ev = expected.filter_to_value(filter, **filter_kwargs)
+        except Exception as e:
+            return AlertResult(error=e, seconds=time.perf_counter() - start)
+        return AlertResult.from_values(ov, ev, time.perf_counter() - start)
+
+    @classmethod
+    def batch(
+        cls,
+        alerts: list[tuple],
+        allowable_diff_perc: float = 0.05,
+        max_workers: int | None = None,
+    ) -> list["TinyAlert"]:
+        """Build many badges from (observed, expected, filter[, badge_kwargs[,
+        filter_kwargs]]) tuples, or mappings with observed, expected, filter and
+        optional filter_kwargs keys, whose other keys are badge kwargs.
+
+        Filters in `aggregation.VECTORIZED` are evaluated together per filter
+        and filter kwargs, each distinct dataset once; others are evaluated in
+        a thread pool. Per-alert errors and timings are kept on each badge's
+        `result`.
+        """
+        alerts = [cls._normalize(a) for a in alerts]
+        results: list[AlertResult | None] = [None] * len(alerts)
+        by_filter: dict[tuple, list[int]] = dict()
+        pooled = list()
+        for i, (_, _, func, _, filter_kwargs) in enumerate(alerts):
+            key = (func, tuple(sorted(filter_kwargs.items())))
+            try:
+                vectorized = func in aggregation.VECTORIZED
+                hash(key)
+            except TypeError:  # Unhashable filter kwargs
+                vectorized = False
+            if vectorized:
+                by_filter.setdefault(key, list()).append(i)
+            else:
+                pooled.append(i)
+        for (func, filter_kwargs), idx in by_filter.items():
+            start = time.perf_counter()
+            datasets = dict()  # Each distinct dataset is reduced once
+            for i in idx:
+                for ds in alerts[i][:2]:
+                    datasets.setdefault(id(ds), ds)
+            order = list(datasets)
+            try:
+                values = aggregation.reduce_many(
+                    [datasets[k].timeseries for k in order],
+                    func,
+                    **dict(filter_kwargs),
+                )
+            except Exception:
+                pooled.extend(idx)  # Fall back to evaluating one by one
+                continue
+            values = dict(zip(order, values.tolist()))
+            seconds = (time.perf_counter() - start) / len(idx)
+            for i in idx:
+                o, e = alerts[i][:2]
+                results[i] = AlertResult.from_values(
+                    values[id(o)], values[id(e)], seconds
+                )
+        if pooled:
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                futures = {
+                    i: pool.submit(cls.evaluate, *alerts[i][:3], alerts[i][4])
+                    for i in pooled
+                }
+            for i, future in futures.items():
+                results[i] = future.result()
+        return [
+            cls(
+                observed=o,
+                expected=e,
+                filter=func,
+                allowable_diff_perc=allowable_diff_perc,
+                filter_kwargs=filter_kwargs,
+                result=result,
+                **kwargs,
+            )
+            for (o, e, func, kwargs, filter_kwargs), result in zip(alerts, results)
+        ]
+
+    @staticmethod
+    def _normalize(alert: tuple | Mapping) -> tuple:
+        # (observed, expected, filter, badge kwargs, filter kwargs)
+        if isinstance(alert, Mapping):
+            kwargs = dict(alert)
+            o, e, func = (kwargs.pop(k) for k in ("observed", "expected", "filter"))
+            filter_kwargs = kwargs.pop("filter_kwargs", None) or dict()
+            return o, e, func, kwargs, filter_kwargs
+        o, e, func, kwargs, filter_kwargs = (*alert, None, None)[:5]
+        return o, e, func, kwargs or dict(), filter_kwargs or dict()
+
 
 class TinyMeanAlert(TinyAlert):
     def __init__(
@@ -285,3 +549,152 @@ class TinyMinAlert(TinyAlert):
             filter=aggregation.min,
             **kwargs,
         )
+
+
+@dataclass(frozen=True)
+class ThresholdRule:
+    path: str
+    threshold: float
+    direction: Literal["below", "above"] = "below"
+    months: tuple[int, ...] = ()  # Calendar months counted, all when empty
+    name: str = ""
+    allowable_diff: int = 0  # Extra violations allowed in the observed run
+
+    @property
+    def unit(self) -> str:
+        # A single month counts once per year, e.g. (9,) for end of September
+        return "years" if len(self.months) == 1 else "months"
+
+    def month_mask(self) -> list[bool]:
+        return [not self.months or m in self.months for m in range(1, 13)]
+
+
+@dataclass
+class ThresholdResult:
+    rule: ThresholdRule
+    observed: int = 0
+    expected: int = 0
+    error: Exception | None = None
+
+    @property
+    def diff(self) -> int:
+        return self.observed - self.expected
+
+    @property
+    def color(self) -> Literal["warning", "danger", "success"]:
+        if self.error is not None:
+            return "warning"
+        if self.diff > self.rule.allowable_diff:
+            return "danger"
+        return "success"
+
+
+def _unwrap(ts: csrs.Timeseries | timeseries.TimeseriesDataset) -> csrs.Timeseries:
+    return ts.timeseries if isinstance(ts, timeseries.TimeseriesDataset) else ts
+
+
+def evaluate_thresholds(
+    rules: list[ThresholdRule],
+    observed: dict[str, csrs.Timeseries | timeseries.TimeseriesDataset],
+    expected: dict[str, csrs.Timeseries | timeseries.TimeseriesDataset],
+) -> list[ThresholdResult]:
+    """Count violations of every rule in the observed and expected runs, in one
+    vectorized pass (see `aggregation.threshold_counts`). Timeseries are keyed
+    by path, a rule whose path is missing gets a result with an error."""
+    results = [ThresholdResult(rule) for rule in rules]
+    series, index, rows, evaluated = list(), dict(), list(), list()
+    for i, rule in enumerate(rules):
+        try:
+            pair = (_unwrap(observed[rule.path]), _unwrap(expected[rule.path]))
+        except KeyError as e:
+            results[i].error = e
+            continue
+        for ts in pair:
+            if id(ts) not in index:
+                index[id(ts)] = len(series)
+                series.append(ts)
+            rows.append(index[id(ts)])
+        evaluated.append(i)
+    if not evaluated:
+        return results
+    # Observed and expected rows are interleaved, each rule appears twice
+    doubled = [rules[i] for i in evaluated for _ in range(2)]
+    counts = aggregation.threshold_counts(
+        series,
+        rows,
+        thresholds=[r.threshold for r in doubled],
+        above=[r.direction == "above" for r in doubled],
+        months=[r.month_mask() for r in doubled],
+    )
+    for j, i in enumerate(evaluated):
+        results[i].observed = int(counts[2 * j])
+        results[i].expected = int(counts[2 * j + 1])
+    return results
+
+
+class ThresholdAlert(dbc.Badge):
+    @instrumentation.instrumented
+    def __init__(self, result: ThresholdResult, **kwargs):
+        self.result = result
+        rule = result.rule
+        name = rule.name or f"{rule.path} {rule.direction} {rule.threshold:,.0f}"
+        if result.error is not None:
+            text = f"{name}: no data"
+        else:
+            text = f"{name}: {result.observed} vs {result.expected} {rule.unit}"
+        kwargs = {
+            "className": "me-1",
+            "pill": True,
+            "children": text,
+            "color": result.color,
+        } | kwargs
+        super().__init__(**kwargs)
+
+    @classmethod
+    def batch(
+        cls,
+        rules: list[ThresholdRule],
+        observed: dict[str, csrs.Timeseries | timeseries.TimeseriesDataset],
+        expected: dict[str, csrs.Timeseries | timeseries.TimeseriesDataset],
+        **kwargs,
+    ) -> list["ThresholdAlert"]:
+        results = evaluate_thresholds(rules, observed, expected)
+        return [cls(r, **kwargs) for r in results]
+
+
+def _section(title: str, alert_objs: list[Component]) -> dbc.Stack:
+    return dbc.Stack(
+        [
+            html.H5(title),
+            dbc.Stack(alert_objs, direction="horizontal", gap=3),
+        ]
+    )
+
+
+class DeferredStudyHealthBoard(background.Deferred):
+    NAME = "study-health-board"
+
+    def __init__(self, observed: csrs.Run, expected: csrs.Run, **kwargs):
+        super().__init__(
+            self.NAME,
+            observed=observed.model_dump(mode="json"),
+            expected=expected.model_dump(mode="json"),
+            **kwargs,
+        )
+
+    @classmethod
+    def register(cls, manager: dash.DiskcacheManager | None = None):
+        background.register(cls.NAME, _build_study_health_board, manager=manager)
+
+
+def _build_study_health_board(
+    progress: Callable[..., None],
+    observed: dict,
+    expected: dict,
+) -> StudyHealthBoard:
+    # Alerts are shown as they finish, then replaced by the whole board
+    return StudyHealthBoard(
+        csrs.Run.model_validate(observed),
+        csrs.Run.model_validate(expected),
+        partial=progress,
+    )
@@ -0,0 +1,180 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Iterable
+
+import dash
+import flask
+
+from . import install
+
+logger = logging.getLogger(__name__)
+
+
+class WidgetDash(dash.Dash):
+    """A `dash.Dash` app tuned for pages built from widgets.
+
+    Responses are compressed (gzip, and brotli when available). For the paths
+    in `cache_pages`, GET responses carry an ETag tied to `data_version()` so
+    unchanged layouts are revalidated with a 304, and page-content callback
+    responses are reused while the data version is unchanged instead of
+    rebuilding the page.
+
+    Only list pages that look the same to every user, responses are shared
+    across users and sessions. `data_version` must be the same in every worker
+    process and change with the data, e.g. `runs_version` of the loaded runs or
+    `cache.VersionedCache.data_version`. Without it nothing is cached.
+    """
+
+    def __init__(
+        self,
+        *args,
+        data_version: Callable[[], str] | None = None,
+        cache_pages: Iterable[str] = (),
+        cache_outputs: tuple[str, ...] = ("_pages_content",),
+        max_cached: int = 128,
+        **kwargs,
+    ):
+        compress = kwargs.pop("compress", None)
+        if compress is None:
+            compress = importlib.util.find_spec("flask_compress") is not None
+        super().__init__(*args, compress=False, **kwargs)
+        # Widget callbacks are registered at import, before the first request
+        install(self)
+        self.data_version = data_version
+        self.cache_pages = frozenset(cache_pages)
+        if self.cache_pages and data_version is None:
+            logger.warning("WidgetDash caches nothing without a data_version")
+        self.cache_outputs = cache_outputs
+        self.max_cached = max_cached
+        self._etags: OrderedDict[str, str] = OrderedDict()
+        self._responses: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._lock = threading.Lock()
+        if compress:
+            self._init_compression()
+        self.server.before_request(self._serve_cached)
+        self.server.after_request(self._store_response)
+
+    def _init_compression(self):
+        from flask_compress import Compress
+
+        algorithms = ["gzip"]
+        if importlib.util.find_spec("brotli") is not None:
+            algorithms.insert(0, "br")
+        self.server.config.setdefault("COMPRESS_ALGORITHM", algorithms)
+        self.server.config.setdefault(
+            "COMPRESS_MIMETYPES",
+            ["application/json", "text/html", "text/css", "application/javascript"],
+        )
+        Compress(self.server)
+
+    def clear_response_cache(self):
+        with self._lock:
+            self._etags.clear()
+            self._responses.clear()
+
+    def cached_nbytes(self) -> int:
+        with self._lock:
+            return sum(len(body) for body, _ in self._responses.values())
+
+    def evict_bytes(self, nbytes: int) -> int:
+        # Least recently used responses first, see memory.MemoryBudget
+        freed = 0
+        with self._lock:
+            for key in list(self._etags):
+                if freed >= nbytes:
+                    break
+                del self._etags[key]
+                body, _ = self._responses.pop(key, (b"", ""))
+                freed += len(body)
+        return freed
+
+    def _cache_key(self, request: flask.Request) -> str | None:
+        if self.data_version is None or not self.cache_pages:
+            return None
+        if request.method == "GET":
+            if request.path not in self.cache_pages:
+                return None
+            return f"GET {request.full_path} {self.data_version()}"
+        if request.method != "POST":
+            return None
+        if not request.path.endswith("_dash-update-component"):
+            return None
+        body = request.get_data(cache=True)
+        if not any(output.encode() in body for output in self.cache_outputs):
+            return None
+        if _pathname(body) not in self.cache_pages:
+            return None
+        # The body holds the pathname and query string of the page
+        return f"POST {hashlib.sha1(body).hexdigest()} {self.data_version()}"
+
+    def _serve_cached(self):
+        request = flask.request
+        key = self._cache_key(request)
+        if key is None:
+            return None
+        flask.g.cdw_cache_key = key
+        with self._lock:
+            etag = self._etags.get(key)
+            cached = self._responses.get(key)
+            if etag is not None:
+                self._etags.move_to_end(key)
+        if etag is not None and etag in request.if_none_match:
+            response = flask.Response(status=304)
+            response.set_etag(etag)
+            response.headers["Cache-Control"] = "no-cache"
+            return response
+        if cached is not None:
+            body, mimetype = cached
+            response = flask.Response(body, mimetype=mimetype)
+            response.set_etag(etag)
+            flask.g.cdw_from_cache = True
+            return response
+        return None
+
+    def _store_response(self, response: flask.Response) -> flask.Response:
+        key = flask.g.pop("cdw_cache_key", None)
+        from_cache = flask.g.pop("cdw_from_cache", False)
+        if key is None or response.status_code != 200 or response.direct_passthrough:
+            return response
+        if response.mimetype not in ("application/json", "text/html"):
+            return response
+        if not from_cache:
+            body = response.get_data()
+            etag = hashlib.sha1(key.encode() + body).hexdigest()
+            response.set_etag(etag)
+            with self._lock:
+                self._etags[key] = etag
+                if key.startswith("POST"):
+                    self._responses[key] = (body, response.mimetype)
+                while len(self._etags) > self.max_cached:
+                    old, _ = self._etags.popitem(last=False)
+                    self._responses.pop(old, None)
+        response.headers["Cache-Control"] = "no-cache"
+        return response.make_conditional(flask.request)
+
+
+def _pathname(body: bytes) -> str | None:
+    # The page a dash.page_container callback is rendering
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return None
+    for item in payload.get("inputs", list()):
+        if isinstance(item, dict) and item.get("property") == "pathname":
+            return item.get("value")
+    return None
+
+
+def runs_version(runs: Callable[[], Iterable]) -> Callable[[], str]:
+    """A `data_version` for `WidgetDash` from the currently loaded runs, the
+    same in every worker that loaded the same runs."""
+
+    def version() -> str:
+        keys = sorted(f"{r.scenario}:{r.version}" for r in runs())
+        return hashlib.sha1("|".join(keys).encode()).hexdigest()
+
+    return version
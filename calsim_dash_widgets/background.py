@@ -0,0 +1,93 @@
+import tempfile
+import uuid
+from pathlib import Path
+from typing import Callable
+
+import dash
+import dash_bootstrap_components as dbc
+from dash import MATCH, Input, Output, dcc, html
+from dash.development.base_component import Component
+
+
+def disk_manager(directory: Path | str | None = None) -> dash.DiskcacheManager:
+    # Local background callback manager, no external service needed
+    try:
+        import diskcache
+    except ImportError as e:
+        raise ImportError(
+            "Background widgets require diskcache: pip install dash[diskcache]"
+        ) from e
+    directory = directory or Path(tempfile.gettempdir()) / "cdw-background"
+    return dash.DiskcacheManager(diskcache.Cache(str(directory)))
+
+
+def _id(kind: str, name: str, index: str = MATCH) -> dict[str, str]:
+    return {"type": f"cdw-deferred-{kind}", "name": name, "index": index}
+
+
+def register(
+    name: str,
+    func: Callable[..., Component],
+    manager: dash.DiskcacheManager | None = None,
+    **callback_kwargs,
+):
+    """Register `func` to build `Deferred(name, ...)` placeholders in a Dash
+    background callback.
+
+    `func` is called with a `progress(done, total, partial=None)` callable and
+    the keyword arguments given to the placeholder. Components passed as
+    `partial` are shown above the progress bar until `func` returns, so results
+    can stream in. Call this before the app starts; when `manager` is None the
+    app's `background_callback_manager` is used.
+    """
+
+    @dash.callback(
+        Output(_id("content", name), "children"),
+        Input(_id("args", name), "data"),
+        background=True,
+        manager=manager,
+        progress=[
+            Output(_id("progress", name), "value"),
+            Output(_id("progress", name), "max"),
+            Output(_id("partial", name), "children"),
+        ],
+        **callback_kwargs,
+    )
+    def _build(set_progress, kwargs: dict):
+        shown = [None]  # Every update sets all outputs, so resend the last partial
+
+        def progress(done: int, total: int, partial: Component | None = None):
+            if partial is not None:
+                shown[0] = partial
+            set_progress((done, total, shown[0]))
+
+        return func(progress, **kwargs)
+
+
+class Deferred(html.Div):
+    def __init__(
+        self,
+        name: str,
+        index: str | None = None,
+        placeholder: Component | None = None,
+        **func_kwargs,
+    ):
+        index = index or uuid.uuid4().hex
+        progress = dbc.Progress(
+            id=_id("progress", name, index),
+            value=0,
+            max=1,
+            striped=True,
+            animated=True,
+            class_name="m-2",
+        )
+        partial = html.Div(id=_id("partial", name, index))
+        content = [partial, progress]
+        if placeholder is not None:
+            content.insert(0, placeholder)
+        super().__init__(
+            children=[
+                dcc.Store(id=_id("args", name, index), data=func_kwargs),
+                html.Div(content, id=_id("content", name, index)),
+            ]
+        )
@@ -0,0 +1,287 @@
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import csrs
+
+from . import memory
+from .disk import DiskTimeseriesStore
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ArtifactKey:
+    scenario: str
+    version: str
+    path: str
+    kind: str = "timeseries"  # timeseries, frame, statistic, figure, ...
+    detail: str = ""
+
+    @property
+    def run(self) -> tuple[str, str]:
+        return (self.scenario, self.version)
+
+
+def run_fingerprint(runs: list[csrs.Run]) -> str:
+    dumped = [r.model_dump(mode="json") for r in runs]
+    return hashlib.sha1(json.dumps(dumped, sort_keys=True).encode()).hexdigest()
+
+
+class VersionedCache:
+    """Cache of CSRS data and everything derived from it, keyed on the run.
+
+    Run metadata is fingerprinted when a run is first seen; `refresh()` (or the
+    polling thread from `start()`) re-reads it and evicts the artifacts of runs
+    whose metadata changed. With a `disk` store, fetched timeseries persist
+    across restarts and are shared memory-mapped between worker processes.
+    Under a `memory.MemoryBudget`, the least recently used artifacts go first.
+    """
+
+    def __init__(
+        self,
+        client: csrs.clients.Client,
+        disk: DiskTimeseriesStore | None = None,
+    ):
+        self.client = client
+        self.disk = disk
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # Least recently used first, see evict_bytes
+        self._entries: OrderedDict[ArtifactKey, Any] = OrderedDict()
+        self._sizes: dict[ArtifactKey, int] = dict()
+        # Running totals by kind, so accounting doesn't rescan every entry
+        self._kind_nbytes: dict[str, int] = dict()
+        self.budget: memory.MemoryBudget | None = None  # See MemoryBudget.add_cache
+        self._fingerprints: dict[tuple[str, str], str] = dict()
+        # Bumped when a run's artifacts are evicted, so loads started before
+        # then don't store stale results
+        self._generations: dict[tuple[str, str], int] = dict()
+        self._lock = threading.RLock()
+        self._flight = SingleFlight()
+        self._foreground = 0  # Callers waiting on a load, excluding prefetches
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: ArtifactKey) -> bool:
+        return key in self._entries
+
+    def get(self, key: ArtifactKey, default: Any = None) -> Any:
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: ArtifactKey, value: Any):
+        self._store(key, value)
+
+    def _store(self, key: ArtifactKey, value: Any, generation: int | None = None):
+        # Stores unless the run was evicted since `generation` was read
+        size = memory.sizeof(value)
+        with self._lock:
+            if generation is not None and generation != self._generation(key):
+                logger.debug("Not caching %s, its run changed while loading", key)
+                return
+            self._forget(key)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._kind_nbytes[key.kind] = self._kind_nbytes.get(key.kind, 0) + size
+        if self.budget is not None:
+            self.budget.enforce()
+
+    def _generation(self, key: ArtifactKey) -> int:
+        return self._generations.get(key.run, 0)
+
+    def nbytes(self, kind: str | None = None) -> int:
+        with self._lock:
+            if kind is None:
+                return sum(self._kind_nbytes.values())
+            return self._kind_nbytes.get(kind, 0)
+
+    def _forget(self, key: ArtifactKey) -> int:
+        # Drops an entry and its size, returns the bytes freed. Hold the lock
+        self._entries.pop(key, None)
+        size = self._sizes.pop(key, 0)
+        if size:
+            self._kind_nbytes[key.kind] -= size
+        return size
+
+    def evict_bytes(self, nbytes: int, kind: str | None = None) -> int:
+        # Least recently used entries first, returns the bytes freed
+        freed = 0
+        with self._lock:
+            for key in list(self._entries):
+                if freed >= nbytes:
+                    break
+                if kind is not None and key.kind != kind:
+                    continue
+                freed += self._forget(key)
+                self.evictions += 1
+        return freed
+
+    def get_or_compute(
+        self,
+        key: ArtifactKey,
+        func: Callable[[], Any],
+        background: bool = False,
+    ) -> Any:
+        """The cached value of `key`, or `func()` cached. Pass `background` for
+        speculative loads (prefetching) that foreground requests shouldn't wait
+        behind, see `loading()`."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            if not background:
+                with self._lock:
+                    self._foreground += 1
+            try:
+                # Concurrent misses of the same key wait for one computation
+                value = self._flight.do(key, self._compute, key, func)
+            finally:
+                if not background:
+                    with self._lock:
+                        self._foreground -= 1
+        return value
+
+    def _compute(self, key: ArtifactKey, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            if key in self._entries:  # Finished while this caller was missing
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            generation = self._generation(key)
+        value = func()
+        self._store(key, value, generation)
+        return value
+
+    @property
+    def coalesced(self) -> int:
+        return self._flight.coalesced
+
+    def loading(self) -> bool:
+        # Whether a foreground request is waiting on a load or derivation,
+        # background loads are not counted, see prefetch.Prefetcher
+        with self._lock:
+            return self._foreground > 0
+
+    def get_timeseries(
+        self,
+        scenario: str,
+        version: str,
+        path: str,
+        background: bool = False,
+    ) -> csrs.Timeseries:
+        self.track(scenario, version)
+        key = ArtifactKey(scenario, version, path)
+        return self.get_or_compute(
+            key,
+            lambda: self._load(scenario, version, path),
+            background=background,
+        )
+
+    def _load(self, scenario: str, version: str, path: str) -> csrs.Timeseries:
+        fingerprint = self._fingerprints[(scenario, version)]
+        if self.disk is not None:
+            ts = self.disk.get(scenario, version, path, fingerprint=fingerprint)
+            if ts is not None:
+                return ts
+        ts = self.client.get_timeseries(scenario=scenario, version=version, path=path)
+        if self.disk is not None:
+            ts = self.disk.put(ts, fingerprint=fingerprint)
+        return ts
+
+    def derive(
+        self,
+        timeseries: csrs.Timeseries,
+        kind: str,
+        detail: str,
+        func: Callable[[csrs.Timeseries], Any],
+    ) -> Any:
+        # A run version's values don't change, and a changed run is evicted by
+        # refresh(), so the source is identified without hashing its values
+        key = ArtifactKey(
+            timeseries.scenario,
+            timeseries.version,
+            timeseries.path,
+            kind=kind,
+            detail=detail,
+        )
+        return self.get_or_compute(key, lambda: func(timeseries))
+
+    def track(self, scenario: str, version: str):
+        if (scenario, version) in self._fingerprints:
+            return
+        runs = self.client.get_run(scenario=scenario, version=version)
+        with self._lock:
+            self._fingerprints.setdefault((scenario, version), run_fingerprint(runs))
+
+    def evict_run(self, scenario: str, version: str) -> int:
+        with self._lock:
+            keys = [k for k in self._entries if k.run == (scenario, version)]
+            for k in keys:
+                self._forget(k)
+            self.evictions += len(keys)
+            run = (scenario, version)
+            self._generations[run] = self._generations.get(run, 0) + 1
+        if self.disk is not None:
+            current = self._fingerprints.get((scenario, version))
+            self.disk.evict_run(scenario, version, current=current)
+        return len(keys)
+
+    def refresh(self) -> list[tuple[str, str]]:
+        changed = list()
+        for scenario, version in list(self._fingerprints):
+            try:
+                runs = self.client.get_run(scenario=scenario, version=version)
+            except Exception:
+                logger.warning("Could not poll run %s v%s", scenario, version)
+                continue  # Keep serving what we have
+            fingerprint = run_fingerprint(runs)
+            with self._lock:
+                if self._fingerprints.get((scenario, version)) == fingerprint:
+                    continue
+                self._fingerprints[(scenario, version)] = fingerprint
+                self.evict_run(scenario, version)
+            changed.append((scenario, version))
+        if changed:
+            logger.info("Evicted artifacts of changed runs: %s", changed)
+        return changed
+
+    def data_version(self) -> str:
+        # Changes whenever a tracked run changes, see app.WidgetDash
+        with self._lock:
+            items = sorted(self._fingerprints.items())
+        return hashlib.sha1(repr(items).encode()).hexdigest()
+
+    def start(self, poll_interval: float = 300.0):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._poll,
+            args=(poll_interval,),
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _poll(self, poll_interval: float):
+        while not self._stop.wait(poll_interval):
+            self.refresh()
@@ -1,13 +1,23 @@
-from typing import Literal
+from typing import Any, Literal
 
 import csrs
 import dash
 import dash_bootstrap_components as dbc
 import pandas as pd
 
-from . import aggregation, plotting
-
-StorageAggArguments = Literal["eos_mean", "eos_max", "eos_min", "mean", "max", "min"]
+from . import aggregation, compare, instrumentation, plotting, series_store
+
+SparklineRenderer = Literal["plotly", "svg"]  # "svg" is lighter, but static
+StorageAggArguments = Literal[
+    "eos_mean",
+    "eos_max",
+    "eos_min",
+    "mean",
+    "max",
+    "min",
+    "min_3yr_mean",
+    "min_6yr_mean",
+]
 AGG_MEANING = {
     "eos_mean": "Average End of Sept Storage",
     "eos_max": "End of Sept Storage Maximum",
@@ -15,14 +25,85 @@ AGG_MEANING = {
     "mean": "Average Monthly Storage",
     "max": "Maximum Single Month Storage",
     "min": "Minimum Single Month Storage",
+    "min_3yr_mean": "Minimum 3-Year Average Storage",
+    "min_6yr_mean": "Minimum 6-Year Average Storage",
 }
+CardPart = Literal["value", "icon", "details", "sparkline", "legend"]
+MONTHS = [
+    "Jan",
+    "Feb",
+    "Mar",
+    "Apr",
+    "May",
+    "Jun",
+    "Jul",
+    "Aug",
+    "Sep",
+    "Oct",
+    "Nov",
+    "Dec",
+]
+
+
+def card_id(name: str, part: CardPart) -> dict[str, str]:
+    # Stable ids for the parts of a named card, so a callback can update them
+    # in place instead of rebuilding the layout
+    return {"type": f"cdw-card-{part}", "card": name}
+
+
+def _id_kwargs(name: str | None, part: CardPart) -> dict:
+    return dict(id=card_id(name, part)) if name else dict()
+
+
+def _run_footer(timeseries: csrs.Timeseries) -> list:
+    return [
+        dash.html.P(
+            f"{timeseries.scenario} (v{timeseries.version})",
+            className="small mb-0",
+        ),
+    ]
+
+
+def _monthly_mean(timeseries: csrs.Timeseries) -> pd.Series:
+    df = aggregation.to_frame(timeseries)
+    with instrumentation.span(None, "aggregate"):
+        df = df.groupby(df.index.month).mean()
+    df.index = MONTHS
+    return df.iloc[:, 0]
+
+
+class _Patchable:
+    # The property of each part that `patch` returns a new value for
+    PARTS: dict[str, str] = dict()
 
+    @classmethod
+    def outputs(
+        cls,
+        name: str,
+        renderer: SparklineRenderer = "plotly",
+    ) -> dict[str, dash.Output]:
+        """Outputs of a callback that returns `patch(...)` for the card `name`.
 
-class _TimeseriesCard(dbc.Card):
+        These are a dict, use them in a flexible callback signature, e.g.
+        `dash.callback(output=dict(shasta=CompareStorageCard.outputs("shasta")))`
+        """
+        parts = dict(cls.PARTS)
+        if renderer == "svg" and "sparkline" in parts:
+            parts["sparkline"] = "src"
+        return {part: dash.Output(card_id(name, part), p) for part, p in parts.items()}
+
+
+class _TimeseriesCard(_Patchable, dbc.Card):
+    PARTS = {"value": "children", "details": "children"}
     value: float
     timeseries: csrs.Timeseries
     header: str
     display_units: str
+    name: str | None = None
+
+    @staticmethod
+    def _patch(value: float, units: str, timeseries: csrs.Timeseries) -> dict:
+        return {"value": f"{value:,.0f} {units}", "details": _run_footer(timeseries)}
 
     def _init_card(self, **kwargs):
         # Initialize the sub-card elements
@@ -33,22 +114,18 @@ class _TimeseriesCard(dbc.Card):
         display_value = dash.html.H3(
             f"{self.value:,.0f} {self.display_units}",
             className="card-title",
+            **_id_kwargs(self.name, "value"),
         )
         # Assemble the body
         body = [display_subheader, display_value]
         # footer
-        footer = [
-            dash.html.P(
-                f"{self.timeseries.scenario} (v{self.timeseries.version})",
-                className="small mb-0",
-            ),
-        ]
+        footer = _run_footer(self.timeseries)
 
         # Assemble the whole card
         _children = [
             dbc.CardHeader(self.header),
             dbc.CardBody(body, class_name="card-body pt-2 pb-1"),
-            dbc.CardFooter(footer),
+            dbc.CardFooter(footer, **_id_kwargs(self.name, "details")),
         ]
 
         # Resolve passed kwargs
@@ -64,55 +141,121 @@ class _TimeseriesCard(dbc.Card):
 
 
 class StorageCard(_TimeseriesCard):
+    @instrumentation.instrumented
     def __init__(
         self,
         timeseries: csrs.Timeseries,
         header: str = None,
         kind: StorageAggArguments = "eos_mean",
+        name: str | None = None,
         **kwargs,
     ):
 
         self.timeseries = timeseries
         self.header = header or timeseries.path.split("/")[2]
+        self.name = name
         agg_func = getattr(aggregation, kind)
         self.value = agg_func(timeseries)
         self.display_units = self.timeseries.units
         self._init_card(subheader=AGG_MEANING.get(kind, kind), **kwargs)
 
+    @classmethod
+    def patch(
+        cls,
+        timeseries: csrs.Timeseries,
+        kind: StorageAggArguments = "eos_mean",
+    ) -> dict[str, Any]:
+        """New values for `outputs`, for a card now showing `timeseries`."""
+        value = getattr(aggregation, kind)(timeseries)
+        return cls._patch(value, timeseries.units, timeseries)
+
 
 class AverageAnnualFlowCard(_TimeseriesCard):
+    @instrumentation.instrumented
     def __init__(
         self,
         timeseries: csrs.Timeseries,
         header: str = None,
+        name: str | None = None,
         **kwargs,
     ):
         self.timeseries = timeseries
         self.header = header or timeseries.path.split("/")[2]
-        self.value = aggregation.annual_sum(timeseries).iloc[:, 0].mean()
-        if self.timeseries.units.lower() == "cfs":
-            self.display_units = "TAF"  # The above step converts
-        else:
-            self.display_units = self.timeseries.units
+        self.name = name
+        self.value, self.display_units = self._value(timeseries)
         self._init_card(subheader="Average Annual Flow", **kwargs)
 
+    @staticmethod
+    def _value(timeseries: csrs.Timeseries) -> tuple[float, str]:
+        value = aggregation.annual_sum(timeseries).iloc[:, 0].mean()
+        if timeseries.units.lower() == "cfs":
+            return value, "TAF"  # The above step converts
+        return value, timeseries.units
+
+    @classmethod
+    def patch(cls, timeseries: csrs.Timeseries) -> dict[str, Any]:
+        """New values for `outputs`, for a card now showing `timeseries`."""
+        return cls._patch(*cls._value(timeseries), timeseries)
+
+
+class SparklineCard(_Patchable, dbc.Card):
+    PARTS = {"sparkline": "figure", "details": "children"}
+    _suffix = ""  # Of the series in a SeriesStore
 
-class SparklineCard(dbc.Card):
+    @instrumentation.instrumented
     def __init__(
         self,
         timeseries: csrs.Timeseries,
         header: str = None,
+        store: series_store.SeriesStore | None = None,
+        renderer: SparklineRenderer = "plotly",
+        name: str | None = None,
         **kwargs,
     ):
         self.timeseries = timeseries
         self.header = header or timeseries.path.split("/")[2]
+        self.store = store
+        self.renderer = renderer
+        self.name = name
         self._init_card(**kwargs)
 
+    @staticmethod
+    def _series(timeseries: csrs.Timeseries) -> pd.Series:
+        return aggregation.to_frame(timeseries).iloc[:, 0]
+
+    @classmethod
+    def patch(
+        cls,
+        timeseries: csrs.Timeseries,
+        renderer: SparklineRenderer = "plotly",
+    ) -> dict[str, Any]:
+        """New values for `outputs`, for a card now showing `timeseries`.
+
+        The figure is patched, only the trace data and axis title are sent.
+        """
+        s = cls._series(timeseries)
+        if renderer == "svg":
+            sparkline = plotting.svg_sparkline(s, title=timeseries.units).src
+        else:
+            sparkline = dash.Patch()
+            sparkline["data"][0]["x"] = s.index
+            sparkline["data"][0]["y"] = s.to_numpy()
+            sparkline["layout"]["yaxis"]["title"]["text"] = timeseries.units
+        return {"sparkline": sparkline, "details": _run_footer(timeseries)}
+
     def _get_sparkline(self):
-        return plotting.sparkline(
-            self.timeseries.to_frame().iloc[:, 0],
-            yaxis=dict(title=self.timeseries.units),
-        )
+        s = self._series(self.timeseries)
+        if self.renderer == "svg":
+            graph = plotting.svg_sparkline(s, title=self.timeseries.units)
+        else:
+            graph = plotting.sparkline(s, yaxis=dict(title=self.timeseries.units))
+        if self.name:
+            # Patched in place, so the data stays in the figure
+            graph.id = card_id(self.name, "sparkline")
+        elif self.store is not None and self.renderer != "svg":
+            key = self.store.add(self.timeseries, self._suffix, series=s)
+            self.store.reference(graph, [key])
+        return graph
 
     def _init_card(self, **kwargs):
         sparkline = self._get_sparkline()
@@ -121,19 +264,14 @@ class SparklineCard(dbc.Card):
         body = list()
         body.extend([sparkline])
         # footer
-        footer = [
-            dash.html.P(
-                f"{self.timeseries.scenario} (v{self.timeseries.version})",
-                className="small mb-0",
-            ),
-        ]
+        footer = _run_footer(self.timeseries)
         # Assemble the whole card
         _children = list()
         _children.extend(
             [
                 dbc.CardHeader(self.header),
                 dbc.CardBody(body),
-                dbc.CardFooter(footer),
+                dbc.CardFooter(footer, **_id_kwargs(self.name, "details")),
             ]
         )
         # Resolve passed kwargs
@@ -151,89 +289,86 @@ class SparklineCard(dbc.Card):
 
 
 class SparklineMonthlyAverageCard(SparklineCard):
-    def _get_sparkline(self):
-        df = self.timeseries.to_frame()
-        df = df.groupby(df.index.month).mean()
-        df.index = [
-            "Jan",
-            "Feb",
-            "Mar",
-            "Apr",
-            "May",
-            "Jun",
-            "Jul",
-            "Aug",
-            "Sep",
-            "Oct",
-            "Nov",
-            "Dec",
-        ]
-        return plotting.sparkline(
-            df.iloc[:, 0],
-            yaxis=dict(title=self.timeseries.units),
-        )
+    _suffix = "monthly_mean"
+
+    @staticmethod
+    def _series(timeseries: csrs.Timeseries) -> pd.Series:
+        return _monthly_mean(timeseries)
 
 
-class _ComparativeTimeseriesCard(dbc.Card):
+class _ComparativeTimeseriesCard(_Patchable, dbc.Card):
+    PARTS = {"icon": "className", "value": "children", "details": "children"}
     base: float
     alt: float
     base_timeseries: csrs.Timeseries
     alt_timeseries: csrs.Timeseries
     header: str
     subheader: str
+    name: str | None = None
 
-    def _init_card(self, **kwargs):
-        # Initialize the sub-card elements
-        diff = self.alt - self.base
-        display_value = f"{diff:,.0f} {self.base_timeseries.units}"
-        display_subheader = dash.html.P(
-            self.subheader,
-            className="small em m-0 p-0",
-        )
+    @staticmethod
+    def _patch(
+        base: float,
+        alt: float,
+        base_timeseries: csrs.Timeseries,
+        alt_timeseries: csrs.Timeseries,
+    ) -> dict:
+        diff = alt - base
         if diff > 0:
-            display_value = dash.html.H3(
-                [dash.html.I(className="bi bi-arrow-up me-3"), display_value],
-                className="card-title",
-            )
+            icon = "bi bi-arrow-up me-3"
         elif diff < 0:
-            display_value = dash.html.H3(
-                [
-                    dash.html.I(
-                        className="bi bi-arrow-down me-3",
-                    ),
-                    display_value,
-                ],
-                className="card-title",
-            )
+            icon = "bi bi-arrow-down me-3"
         else:
-            display_value = dash.html.H3("No difference")
-
-        if self.base_timeseries.scenario == self.alt_timeseries.scenario:
-            va = self.alt_timeseries.version
-            vb = self.base_timeseries.version
-            display_details = dash.html.P(
-                f"{self.base_timeseries.scenario} (version {va} vs {vb})",
+            icon = ""
+        if base_timeseries.scenario == alt_timeseries.scenario:
+            va = alt_timeseries.version
+            vb = base_timeseries.version
+            details = dash.html.P(
+                f"{base_timeseries.scenario} (version {va} vs {vb})",
                 className="card-text p-1",
             )
         else:
-            a = f"{self.alt_timeseries.scenario}"
-            b = f"{self.base_timeseries.scenario}"
-            display_details = dash.html.P(
+            a = f"{alt_timeseries.scenario}"
+            b = f"{base_timeseries.scenario}"
+            details = dash.html.P(
                 f"{a} vs {b}",
                 className="small mb-0",
             )
+        value = f"{diff:,.0f} {base_timeseries.units}" if icon else "No difference"
+        return {"icon": icon, "value": value, "details": [details]}
+
+    def _init_card(self, **kwargs):
+        # Initialize the sub-card elements
+        parts = self._patch(
+            self.base,
+            self.alt,
+            self.base_timeseries,
+            self.alt_timeseries,
+        )
+        display_subheader = dash.html.P(
+            self.subheader,
+            className="small em m-0 p-0",
+        )
+        # The icon and text are always present, so either can be patched
+        display_value = dash.html.H3(
+            [
+                dash.html.I(className=parts["icon"], **_id_kwargs(self.name, "icon")),
+                dash.html.Span(parts["value"], **_id_kwargs(self.name, "value")),
+            ],
+            className="card-title",
+        )
         # Assemble the body
         body = [
             display_subheader,
             display_value,
         ]
         # footer
-        footer = [display_details]
+        footer = parts["details"]
         # Assemble the whole card
         _children = [
             dbc.CardHeader(self.header),
             dbc.CardBody(body, class_name="card-body pt-2 pb-1"),
-            dbc.CardFooter(footer),
+            dbc.CardFooter(footer, **_id_kwargs(self.name, "details")),
         ]
 
         # Resolve passed kwargs
@@ -249,6 +384,7 @@ class _ComparativeTimeseriesCard(dbc.Card):
 
 
 class CompareStorageCard(_ComparativeTimeseriesCard):
+    @instrumentation.instrumented
     def __init__(
         self,
         base_timeseries: csrs.Timeseries,
@@ -256,28 +392,86 @@ class CompareStorageCard(_ComparativeTimeseriesCard):
         header: str = "",
         subheader: str = "",
         kind: StorageAggArguments = "eos_mean",
+        engine: compare.ComparisonEngine | None = None,
+        name: str | None = None,
         **kwargs,
     ):
         self.base_timeseries = base_timeseries
         self.alt_timeseries = alt_timeseries
+        self.header = header or f"{alt_timeseries.path.split('/')[2]}"
+        self.subheader = "Compare " + AGG_MEANING.get(kind, kind)
+        self.name = name
+        self.base, self.alt = self._aggregate(
+            base_timeseries,
+            alt_timeseries,
+            kind,
+            engine,
+        )
+        self._init_card(**kwargs)
+
+    @staticmethod
+    def _aggregate(
+        base_timeseries: csrs.Timeseries,
+        alt_timeseries: csrs.Timeseries,
+        kind: StorageAggArguments,
+        engine: compare.ComparisonEngine | None,
+    ) -> tuple[float, float]:
         if base_timeseries.units != alt_timeseries.units:
             ua = alt_timeseries.units
             ub = base_timeseries.units
             raise ValueError(f"Cannot compare with diff units: alt={ua}, base={ub}")
-        self.header = header or f"{alt_timeseries.path.split('/')[2]}"
-        self.subheader = "Compare " + AGG_MEANING.get(kind, kind)
-        agg_func = getattr(aggregation, kind)
-        self.base = agg_func(base_timeseries)
-        self.alt = agg_func(alt_timeseries)
-        self._init_card(**kwargs)
+        if engine is None:
+            agg_func = getattr(aggregation, kind)
+            return agg_func(base_timeseries), agg_func(alt_timeseries)
+        delta = engine.aggregate(base_timeseries, alt_timeseries, kind)
+        return delta.base, delta.alt
+
+    @classmethod
+    def patch(
+        cls,
+        base_timeseries: csrs.Timeseries,
+        alt_timeseries: csrs.Timeseries,
+        kind: StorageAggArguments = "eos_mean",
+        engine: compare.ComparisonEngine | None = None,
+    ) -> dict[str, Any]:
+        """New values for `outputs`, for a card now comparing these timeseries.
+
+        With an `engine`, switching only the alternative reuses the baseline.
+        """
+        base, alt = cls._aggregate(base_timeseries, alt_timeseries, kind, engine)
+        return cls._patch(base, alt, base_timeseries, alt_timeseries)
 
 
-class ComparativeSparklineCard(dbc.Card):
+def _versions_footer(base: csrs.Timeseries, alt: csrs.Timeseries) -> list:
+    return [
+        dash.html.Div(
+            [
+                dash.html.P(
+                    f"{base.scenario} version {base.version}",
+                    className="small mb-0",
+                ),
+                dash.html.P(
+                    f"{alt.scenario} version {alt.version}",
+                    className="small mb-0",
+                ),
+            ]
+        )
+    ]
+
+
+class ComparativeSparklineCard(_Patchable, dbc.Card):
+    PARTS = {"sparkline": "figure", "details": "children"}
+    _suffix = ""  # Of the series in a SeriesStore
+
+    @instrumentation.instrumented
     def __init__(
         self,
         base: csrs.Timeseries,
         alt: csrs.Timeseries,
         header: str = None,
+        store: series_store.SeriesStore | None = None,
+        renderer: SparklineRenderer = "plotly",
+        name: str | None = None,
         **kwargs,
     ):
         self.base = base
@@ -285,16 +479,91 @@ class ComparativeSparklineCard(dbc.Card):
         if self.base.units != self.alt.units:
             raise ValueError("Cannot plot timeseries with different units")
         self.header = header or self.base.path.split("/")[2]
+        self.store = store
+        self.renderer = renderer
+        self.name = name
         self._init_card(**kwargs)
 
+    @staticmethod
+    def _series(timeseries: csrs.Timeseries) -> pd.Series:
+        return aggregation.to_frame(timeseries).iloc[:, 0]
+
+    @classmethod
+    def outputs(
+        cls,
+        name: str,
+        renderer: SparklineRenderer = "plotly",
+    ) -> dict[str, dash.Output]:
+        outputs = super().outputs(name, renderer)
+        if renderer == "svg":  # The image can't name its lines, the legend does
+            outputs["legend"] = dash.Output(card_id(name, "legend"), "children")
+        return outputs
+
+    @classmethod
+    def patch(
+        cls,
+        base: csrs.Timeseries,
+        alt: csrs.Timeseries,
+        renderer: SparklineRenderer = "plotly",
+        base_changed: bool = True,
+    ) -> dict[str, Any]:
+        """New values for `outputs`, for a card now comparing `base` and `alt`.
+
+        The figure is patched, only the trace data and names are sent. Pass
+        `base_changed=False` when only the alternative changed, the baseline
+        trace is then left as it is. With the "svg" renderer the image and its
+        legend are replaced instead.
+        """
+        if base.units != alt.units:
+            raise ValueError("Cannot plot timeseries with different units")
+        if renderer == "svg":
+            series = {base.scenario: cls._series(base), alt.scenario: cls._series(alt)}
+            return {
+                "sparkline": plotting.svg_sparkline(series, title=base.units).src,
+                "legend": plotting.svg_legend(list(series)),
+                "details": _versions_footer(base, alt),
+            }
+        sparkline = dash.Patch()
+        traces = [(1, alt), (0, base)] if base_changed else [(1, alt)]
+        for i, ts in traces:
+            s = cls._series(ts)
+            sparkline["data"][i]["x"] = s.index
+            sparkline["data"][i]["y"] = s.to_numpy()
+            sparkline["data"][i]["name"] = ts.scenario
+        sparkline["layout"]["yaxis"]["title"]["text"] = base.units
+        return {"sparkline": sparkline, "details": _versions_footer(base, alt)}
+
     def _get_sparkline(self):
-        return plotting.comparative_sparkline(
-            {
-                self.base.scenario: self.base.to_frame().iloc[:, 0],
-                self.alt.scenario: self.alt.to_frame().iloc[:, 0],
-            },
+        s_base = self._series(self.base)
+        s_alt = self._series(self.alt)
+        series = {
+            self.base.scenario: s_base,
+            self.alt.scenario: s_alt,
+        }
+        if self.renderer == "svg":
+            # Built from its parts, so a named card's image and legend get ids
+            image = plotting.svg_sparkline(series, title=self.base.units)
+            legend = dash.html.Div(
+                plotting.svg_legend(list(series)),
+                **_id_kwargs(self.name, "legend"),
+            )
+            if self.name:
+                image.id = card_id(self.name, "sparkline")
+            return dash.html.Div([image, legend])
+        graph = plotting.comparative_sparkline(
+            series,
             yaxis=dict(title=self.base.units),
         )
+        if self.name:
+            # Patched in place, so the data stays in the figure
+            graph.id = card_id(self.name, "sparkline")
+        elif self.store is not None:
+            keys = [
+                self.store.add(self.base, self._suffix, series=s_base),
+                self.store.add(self.alt, self._suffix, series=s_alt),
+            ]
+            self.store.reference(graph, keys)
+        return graph
 
     def _init_card(self, **kwargs):
         sparkline = self._get_sparkline()
@@ -303,27 +572,14 @@ class ComparativeSparklineCard(dbc.Card):
         body = list()
         body.extend([sparkline])
         # footer
-        footer = [
-            dash.html.Div(
-                [
-                    dash.html.P(
-                        f"{self.base.scenario} version {self.base.version}",
-                        className="small mb-0",
-                    ),
-                    dash.html.P(
-                        f"{self.alt.scenario} version {self.alt.version}",
-                        className="small mb-0",
-                    ),
-                ]
-            )
-        ]
+        footer = _versions_footer(self.base, self.alt)
         # Assemble the whole card
         _children = list()
         _children.extend(
             [
                 dbc.CardHeader(self.header),
                 dbc.CardBody(body),
-                dbc.CardFooter(footer),
+                dbc.CardFooter(footer, **_id_kwargs(self.name, "details")),
             ]
         )
         # Resolve passed kwargs
@@ -341,32 +597,66 @@ class ComparativeSparklineCard(dbc.Card):
 
 
 class ComparativeSparklineMonthlyAverageCard(ComparativeSparklineCard):
-    def _get_sparkline(self):
-        def _reshape(ts: csrs.Timeseries) -> pd.DataFrame:
-            df = ts.to_frame()
-            df = df.groupby(df.index.month).mean()
-            df.index = [
-                "Jan",
-                "Feb",
-                "Mar",
-                "Apr",
-                "May",
-                "Jun",
-                "Jul",
-                "Aug",
-                "Sep",
-                "Oct",
-                "Nov",
-                "Dec",
-            ]
-            return df
-
-        df_base = _reshape(self.base)
-        df_alt = _reshape(self.alt)
-        return plotting.comparative_sparkline(
-            {
-                self.base.scenario: df_base.iloc[:, 0],
-                self.alt.scenario: df_alt.iloc[:, 0],
-            },
-            yaxis=dict(title=self.base.units),
+    _suffix = "monthly_mean"
+
+    @staticmethod
+    def _series(timeseries: csrs.Timeseries) -> pd.Series:
+        return _monthly_mean(timeseries)
+
+
+class FanChartCard(dbc.Card):
+    @instrumentation.instrumented
+    def __init__(
+        self,
+        timeseries: list[csrs.Timeseries],
+        header: str = None,
+        percentiles: tuple[float, ...] = (10, 25, 50, 75, 90),
+        **kwargs,
+    ):
+        self.timeseries = timeseries
+        if not self.timeseries:
+            raise ValueError("No runs to draw a fan chart of")
+        units = {ts.units for ts in self.timeseries}
+        if len(units) != 1:
+            raise ValueError(f"Cannot combine timeseries with different units: {units}")
+        self.units = units.pop()
+        self.header = header or self.timeseries[0].path.split("/")[2]
+        self.percentiles = percentiles
+        self._init_card(**kwargs)
+
+    def _init_card(self, **kwargs):
+        bands = aggregation.percentile_bands(self.timeseries, self.percentiles)
+        graph = plotting.fan_chart(
+            bands,
+            showlegend=False,
+            plot_bgcolor="white",
+            margin=dict(t=0, l=0, b=0, r=0),
+            width=300,
+            height=150,
+            xaxis=dict(visible=False, fixedrange=True),
+            yaxis=dict(
+                title=self.units,
+                fixedrange=True,
+                showticklabels=False,
+                rangemode="tozero",
+            ),
+        )
+        graph.config = dict(displayModeBar=False)
+        scenarios = sorted({ts.scenario for ts in self.timeseries})
+        footer = [
+            dash.html.P(
+                f"{len(self.timeseries)} members, "
+                + f"{self.percentiles[0]:g}th to {self.percentiles[-1]:g}th percentile",
+                className="small mb-0",
+                title=", ".join(scenarios),
+            ),
+        ]
+        custom_kwargs = dict(color="secondary", outline=True) | kwargs
+        super().__init__(
+            [
+                dbc.CardHeader(self.header),
+                dbc.CardBody([graph]),
+                dbc.CardFooter(footer),
+            ],
+            **custom_kwargs,
         )
@@ -0,0 +1,207 @@
+import importlib.util
+import logging
+import os
+import random
+import threading
+import time
+from typing import Any, Callable
+
+import csrs
+import httpx
+
+from .singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+CSRS_URL = os.environ.get(
+    "CDW_CSRS_URL",
+    "https://calsim-scenario-results-server.azurewebsites.net/",
+)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+# Errors meaning the data could not be reached, rather than a bug or bad request
+UNAVAILABLE = (httpx.TransportError, httpx.HTTPStatusError, CircuitOpenError)
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probing = False  # A half-open trial request is in flight
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        # Half-open lets one trial request through, its result closes or re-opens
+        # the circuit, the rest are rejected until then
+        with self._lock:
+            state = self.state
+            if state == "half-open":
+                if self.probing:
+                    return False
+                self.probing = True
+            return state != "open"
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.probing = False
+            self.failures += 1
+            if self.failures >= self.failure_threshold or self.opened_at is not None:
+                self.opened_at = self.clock()
+
+
+def _retryable(e: Exception) -> bool:
+    if isinstance(e, httpx.TransportError):  # Includes timeouts
+        return True
+    if isinstance(e, httpx.HTTPStatusError):
+        return e.response.status_code >= 500 or e.response.status_code == 429
+    return False
+
+
+class ResilientClient:
+    """Wraps a csrs client with bounded retries, exponential backoff, and a
+    circuit breaker. Concurrent identical requests share one fetch, see
+    `flight.stats()`. Other attributes are passed through to the wrapped client.
+    """
+
+    def __init__(
+        self,
+        client: csrs.clients.Client,
+        retries: int = 3,
+        backoff: float = 0.25,
+        max_backoff: float = 4.0,
+        breaker: CircuitBreaker | None = None,
+    ):
+        self.client = client
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.flight = SingleFlight()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def get_run(self, **kwargs) -> list[csrs.Run]:
+        key = ("run", *sorted(kwargs.items()))
+        return self.flight.do(key, self._call, self.client.get_run, **kwargs)
+
+    def get_timeseries(self, **kwargs) -> csrs.Timeseries:
+        key = ("timeseries", *sorted(kwargs.items()))
+        return self.flight.do(key, self._call, self.client.get_timeseries, **kwargs)
+
+    def _call(self, func: Callable, **kwargs) -> Any:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"CSRS circuit open, skipped {func.__name__}")
+        for attempt in range(self.retries + 1):
+            try:
+                result = func(**kwargs)
+            except Exception as e:
+                if not _retryable(e):
+                    self.breaker.record_success()  # The server answered
+                    raise
+                if attempt == self.retries:
+                    self.breaker.record_failure()
+                    raise
+                delay = min(self.max_backoff, self.backoff * 2**attempt)
+                time.sleep(delay * random.uniform(0.5, 1.0))
+            else:
+                self.breaker.record_success()
+                return result
+
+
+def pooled_http_client(
+    base_url: str | httpx.URL,
+    timeout: float = 10.0,
+    connect_timeout: float = 3.0,
+    max_connections: int = 32,
+    **kwargs,
+) -> httpx.Client:
+    transport = httpx.HTTPTransport(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_connections,
+            keepalive_expiry=60.0,
+        ),
+        retries=1,  # Connection failures only, see ResilientClient
+    )
+    return httpx.Client(
+        base_url=base_url,
+        timeout=httpx.Timeout(timeout, connect=connect_timeout),
+        transport=transport,
+        **kwargs,
+    )
+
+
+def swap_http_client(
+    client: csrs.clients.Client,
+    factory: Callable[[httpx.Client], httpx.Client],
+) -> bool:
+    """Replace the httpx.Client a csrs.RemoteClient keeps with `factory(old)`.
+    Returns whether one was found."""
+    swapped = False
+    for attr, value in list(vars(client).items()):
+        if isinstance(value, httpx.Client):
+            setattr(client, attr, factory(value))
+            value.close()
+            swapped = True
+    return swapped
+
+
+def _use_pool(client: csrs.clients.Client, **pool_kwargs):
+    # csrs.RemoteClient keeps its own httpx.Client, swap in a pooled one
+    def pooled(old: httpx.Client) -> httpx.Client:
+        return pooled_http_client(old.base_url, headers=old.headers, **pool_kwargs)
+
+    if not swap_http_client(client, pooled):
+        logger.debug("No httpx.Client found on %r, using its defaults", client)
+
+
+_clients: dict[str, ResilientClient] = dict()
+_clients_lock = threading.Lock()
+
+
+def get_client(url: str = CSRS_URL, **pool_kwargs) -> ResilientClient:
+    """The shared client for `url`, one per process, reused by every widget."""
+    with _clients_lock:
+        if url not in _clients:
+            remote = csrs.RemoteClient(url)
+            _use_pool(remote, **pool_kwargs)
+            _clients[url] = ResilientClient(remote)
+        return _clients[url]
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Request coalescing and circuit breaker state of each shared client."""
+    with _clients_lock:
+        shared = dict(_clients)
+    return {
+        url: client.flight.stats() | {"circuit": client.breaker.state}
+        for url, client in shared.items()
+    }
@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import csrs
+import pandas as pd
+
+from . import aggregation, cache, memory
+
+
+@dataclass(frozen=True)
+class Delta:
+    base: float
+    alt: float
+
+    @property
+    def diff(self) -> float:
+        return self.alt - self.base
+
+    @property
+    def diff_perc(self) -> float:
+        return self.diff / (self.base if self.base != 0 else 1.0)
+
+
+class ComparisonEngine:
+    """Compares one baseline against many alternatives, computing the baseline
+    side (aggregates, EOS subsets, sorted values) once.
+
+    Pass the same engine to every comparative widget on a page. Only baseline
+    results are kept, keyed on the baseline's run version and path, whose
+    values don't change. With a `VersionedCache`, they are stored there instead
+    and evicted with the run when it changes.
+    """
+
+    def __init__(
+        self,
+        versioned: cache.VersionedCache | None = None,
+        max_entries: int = 256,
+    ):
+        self.versioned = versioned
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[cache.ArtifactKey, Any] = OrderedDict()
+        # Sizes are measured once on insert, see memory.MemoryBudget
+        self._sizes: dict[cache.ArtifactKey, int] = dict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def baseline(
+        self,
+        timeseries: csrs.Timeseries,
+        kind: str,
+        func: Callable[[csrs.Timeseries], Any],
+    ) -> Any:
+        if self.versioned is not None:
+            return self.versioned.derive(timeseries, "baseline", kind, func)
+        key = cache.ArtifactKey(
+            timeseries.scenario,
+            timeseries.version,
+            timeseries.path,
+            kind="baseline",
+            detail=kind,
+        )
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key]
+            self.misses += 1
+        value = func(timeseries)
+        size = memory.sizeof(value)
+        with self._lock:
+            self._nbytes -= self._sizes.pop(key, 0)
+            self._entries[key] = value
+            self._sizes[key] = size
+            self._nbytes += size
+            while len(self._entries) > self.max_entries:
+                self._pop_oldest()
+        return value
+
+    def nbytes(self) -> int:
+        with self._lock:
+            return self._nbytes
+
+    def evict_bytes(self, nbytes: int) -> int:
+        freed = 0
+        with self._lock:
+            while self._entries and freed < nbytes:
+                freed += self._pop_oldest()
+        return freed
+
+    def _pop_oldest(self) -> int:
+        # Hold the lock, returns the bytes freed
+        key, _ = self._entries.popitem(last=False)
+        size = self._sizes.pop(key, 0)
+        self._nbytes -= size
+        return size
+
+    def aggregate(
+        self,
+        base: csrs.Timeseries,
+        alt: csrs.Timeseries,
+        kind: str,
+    ) -> Delta:
+        agg_func = getattr(aggregation, kind)
+        return Delta(base=self.baseline(base, kind, agg_func), alt=agg_func(alt))
+
+    def series(
+        self,
+        base: csrs.Timeseries,
+        alt: csrs.Timeseries,
+        kind: str = "values",
+    ) -> tuple[pd.Series, pd.Series]:
+        func = _SERIES[kind]
+        return self.baseline(base, kind, func), func(alt)
+
+    def exceedance(
+        self,
+        base: csrs.Timeseries,
+        alt: csrs.Timeseries,
+        kind: str = "values",
+    ) -> tuple[pd.Series, pd.Series]:
+        # Sorted descending, ready for plotting.comparative_exceedance
+        func = _SERIES[kind]
+        base_sorted = self.baseline(base, f"{kind}_sorted", lambda ts: _sort(func(ts)))
+        return base_sorted, _sort(func(alt))
+
+
+def _sort(s: pd.Series) -> pd.Series:
+    return s.sort_values(ascending=False)
+
+
+_SERIES: dict[str, Callable[[csrs.Timeseries], pd.Series]] = {
+    "values": lambda ts: aggregation.to_frame(ts).iloc[:, 0],
+    "annual_eos": lambda ts: aggregation.annual_eos(ts).iloc[:, 0],
+}
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import csrs
+import numpy as np
+
+from .timeseries import ArrayTimeseries
+
+
+class DiskTimeseriesStore:
+    """Timeseries persisted as `.npy` files with a JSON sidecar per entry.
+
+    Values are reopened memory-mapped and read-only, so every worker process
+    reading the same directory shares the pages in the OS cache. The run
+    fingerprint is part of the file name, so workers that have seen different
+    states of a run keep separate entries instead of replacing each other's.
+    """
+
+    def __init__(self, directory: Path | str):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _stem(
+        self,
+        scenario: str,
+        version: str,
+        path: str,
+        fingerprint: str = "",
+    ) -> Path:
+        key = f"{scenario}\n{version}\n{path}\n{fingerprint}"
+        return self.directory / hashlib.sha1(key.encode()).hexdigest()
+
+    def __contains__(self, key: tuple[str, ...]) -> bool:
+        # (scenario, version, path) or (scenario, version, path, fingerprint)
+        return self._stem(*key).with_suffix(".json").exists()
+
+    def index(self) -> list[dict]:
+        entries = list()
+        for file in self.directory.glob("*.json"):
+            try:
+                entries.append(json.loads(file.read_text()))
+            except (OSError, ValueError):
+                continue  # Being written or removed by another worker
+        return entries
+
+    def put(
+        self,
+        timeseries: csrs.Timeseries | ArrayTimeseries,
+        fingerprint: str = "",
+    ) -> ArrayTimeseries:
+        ts = ArrayTimeseries.from_timeseries(timeseries)
+        stem = self._stem(ts.scenario, ts.version, ts.path, fingerprint)
+        # Arrays first, the sidecar marks the entry as complete
+        self._write(stem.with_suffix(".values.npy"), ts.values)
+        self._write(stem.with_suffix(".dates.npy"), ts.dates)
+        meta = ts.metadata() | {"fingerprint": fingerprint}
+        self._write_text(stem.with_suffix(".json"), json.dumps(meta))
+        return self.get(ts.scenario, ts.version, ts.path, fingerprint)
+
+    def get(
+        self,
+        scenario: str,
+        version: str,
+        path: str,
+        fingerprint: str = "",
+    ) -> ArrayTimeseries | None:
+        stem = self._stem(scenario, version, path, fingerprint)
+        try:
+            meta = json.loads(stem.with_suffix(".json").read_text())
+            values = np.load(stem.with_suffix(".values.npy"), mmap_mode="r")
+            dates = np.load(stem.with_suffix(".dates.npy"), mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        meta.pop("fingerprint", None)
+        return ArrayTimeseries(values=values, dates=dates, **meta)
+
+    def delete(self, scenario: str, version: str, path: str, fingerprint: str = ""):
+        stem = self._stem(scenario, version, path, fingerprint)
+        for suffix in (".json", ".values.npy", ".dates.npy"):
+            try:
+                stem.with_suffix(suffix).unlink(missing_ok=True)
+            except PermissionError:
+                pass  # Still mapped by a reader on Windows, the sidecar is gone
+
+    def evict_run(self, scenario: str, version: str, current: str | None = None) -> int:
+        """Delete the entries of a run, except those written under its `current`
+        fingerprint, which other workers may have just stored."""
+        entries = [
+            e
+            for e in self.index()
+            if (e["scenario"], e["version"]) == (scenario, version)
+            and (current is None or e.get("fingerprint", "") != current)
+        ]
+        for e in entries:
+            fingerprint = e.get("fingerprint", "")
+            self.delete(e["scenario"], e["version"], e["path"], fingerprint)
+        return len(entries)
+
+    def _write(self, file: Path, array: np.ndarray):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, np.ascontiguousarray(array))
+        os.replace(tmp, file)
+
+    def _write_text(self, file: Path, text: str):
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(text)
+        os.replace(tmp, file)
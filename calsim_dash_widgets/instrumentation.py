@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Callable, Generator, Literal
+
+if TYPE_CHECKING:
+    # Imported where used, aggregation imports this module and must stay light
+    import dash
+    import dash_bootstrap_components as dbc
+    import pandas as pd
+    from dash.development.base_component import Component
+
+logger = logging.getLogger(__name__)
+
+Phase = Literal["fetch", "convert", "aggregate", "figure", "serialize"]
+PHASES = ("fetch", "convert", "aggregate", "figure", "serialize")
+
+
+@dataclass(frozen=True)
+class Span:
+    widget: str
+    phase: str
+    start: float
+    duration: float  # Including nested spans
+    exclusive: float  # Excluding nested spans, what summaries report
+
+
+class Recorder:
+    def __init__(self):
+        self.spans: list[Span] = list()
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def summary(self) -> pd.DataFrame:
+        import pandas as pd
+
+        # Milliseconds per widget and phase, exclusive of nested phases so the
+        # phases of a widget add up to its total
+        df = pd.DataFrame(
+            [(s.widget, s.phase, s.exclusive * 1_000) for s in self.spans],
+            columns=["widget", "phase", "ms"],
+        )
+        df = df.pivot_table(
+            index="widget",
+            columns="phase",
+            values="ms",
+            aggfunc="sum",
+        )
+        order = [p for p in PHASES if p in df.columns]
+        return df.reindex(columns=order).fillna(0.0)
+
+    def totals(self) -> dict[str, float]:
+        totals = dict()
+        for s in self.spans:
+            totals[s.phase] = totals.get(s.phase, 0.0) + s.exclusive * 1_000
+        return totals
+
+    def server_timing(self) -> str:
+        return ", ".join(
+            f"{phase};dur={ms:.1f}" for phase, ms in self.totals().items()
+        )
+
+    def table(self, **kwargs) -> dbc.Table:
+        import dash_bootstrap_components as dbc
+
+        df = self.summary().round(1).reset_index()
+        kwargs = dict(striped=True, bordered=True, hover=True, size="sm") | kwargs
+        return dbc.Table.from_dataframe(df, **kwargs)
+
+
+_recorders: ContextVar[tuple[Recorder, ...]] = ContextVar("_recorders", default=())
+_widget: ContextVar[Any] = ContextVar("_widget", default=None)
+_phase: ContextVar[str | None] = ContextVar("_phase", default=None)
+# Seconds spent in spans nested in the current span
+_nested: ContextVar[list[float] | None] = ContextVar("_nested", default=None)
+_callbacks: list[Callable[[Span], None]] = list()
+
+
+def add_callback(func: Callable[[Span], None]):
+    _callbacks.append(func)
+
+
+def remove_callback(func: Callable[[Span], None]):
+    _callbacks.remove(func)
+
+
+def enabled() -> bool:
+    return bool(_recorders.get() or _callbacks)
+
+
+@contextmanager
+def record() -> Generator[Recorder, None, None]:
+    recorder = Recorder()
+    token = _recorders.set(_recorders.get() + (recorder,))
+    try:
+        yield recorder
+    finally:
+        _recorders.reset(token)
+
+
+def label(widget: Any) -> str:
+    if widget is None:
+        return "<none>"
+    if isinstance(widget, str):
+        return widget
+    header = getattr(widget, "header", "")
+    return f"{type(widget).__name__}({header})@{id(widget):x}"
+
+
+@contextmanager
+def widget(obj: Any) -> Generator[None, None, None]:
+    # Spans opened without an explicit widget are attributed to this one
+    if _widget.get() is obj:
+        yield
+        return
+    token = _widget.set(obj)
+    try:
+        yield
+    finally:
+        _widget.reset(token)
+
+
+@contextmanager
+def span(widget: Any, phase: Phase) -> Generator[None, None, None]:
+    if not enabled() or _phase.get() == phase:
+        # Disabled, or already timed by an enclosing span of the same phase
+        yield
+        return
+    obj = _widget.get() if widget is None else widget
+    parent = _nested.get()
+    nested = [0.0]
+    token = _phase.set(phase)
+    nested_token = _nested.set(nested)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        _nested.reset(nested_token)
+        _phase.reset(token)
+        if parent is not None:
+            parent[0] += duration
+        # Nested spans in worker threads can overlap, so clamp at zero
+        exclusive = max(duration - nested[0], 0.0)
+        _emit(
+            Span(
+                widget=label(obj),
+                phase=phase,
+                start=start,
+                duration=duration,
+                exclusive=exclusive,
+            )
+        )
+
+
+def instrumented(init: Callable) -> Callable:
+    # Decorate a widget's __init__ so the work done while building it is
+    # attributed to the instance
+    @functools.wraps(init)
+    def wrapper(self, *args, **kwargs):
+        with widget(self):
+            return init(self, *args, **kwargs)
+
+    return wrapper
+
+
+def timed(phase: Phase) -> Callable:
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(None, phase):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def serialize(component: Component) -> str:
+    import plotly
+
+    with span(component, "serialize"):
+        return json.dumps(component, cls=plotly.utils.PlotlyJSONEncoder)
+
+
+def _time_serialization():
+    # Dash serializes layouts and callback responses with plotly's
+    # to_json_plotly, looked up when called, so wrapping it times them all
+    import plotly.io.json
+
+    to_json = plotly.io.json.to_json_plotly
+    if getattr(to_json, "_cdw_timed", False):
+        return
+
+    @functools.wraps(to_json)
+    def wrapper(*args, **kwargs):
+        with span(None, "serialize"):
+            return to_json(*args, **kwargs)
+
+    wrapper._cdw_timed = True
+    plotly.io.json.to_json_plotly = wrapper
+
+
+def install(app: dash.Dash):
+    import flask
+
+    _time_serialization()
+
+    # Record every request and report the totals as a Server-Timing header
+    @app.server.before_request
+    def _start_recording():
+        cm = record()
+        flask.g.cdw_recording = (cm, cm.__enter__(), time.perf_counter())
+
+    @app.server.after_request
+    def _add_server_timing(response: flask.Response):
+        recording = flask.g.pop("cdw_recording", None)
+        if recording is None:
+            return response
+        cm, recorder, start = recording
+        cm.__exit__(None, None, None)
+        total = (time.perf_counter() - start) * 1_000
+        timing = [recorder.server_timing(), f"total;dur={total:.1f}"]
+        response.headers["Server-Timing"] = ", ".join(t for t in timing if t)
+        if recorder.spans and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s\n%s", flask.request.path, recorder.summary().round(1))
+        return response
+
+
+def _emit(s: Span):
+    for recorder in _recorders.get():
+        recorder.add(s)
+    for func in _callbacks:
+        func(s)
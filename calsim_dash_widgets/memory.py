@@ -0,0 +1,193 @@
+import logging
+import os
+import sys
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def sizeof(obj: Any) -> int:
+    """Approximate bytes held by a timeseries, frame, array, or container of
+    them. Memory-mapped arrays count as 0, the OS pages them in and out."""
+    if isinstance(obj, np.memmap):
+        return 0
+    if isinstance(obj, np.ndarray):
+        return 0 if isinstance(obj.base, np.memmap) else obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series, pd.Index)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(usage, pd.Series) else int(usage)
+    nbytes = getattr(obj, "nbytes", None)
+    if isinstance(nbytes, int):  # ArrayTimeseries, CompactTimeseries
+        values = getattr(obj, "values", None)
+        if isinstance(values, np.memmap) or isinstance(
+            getattr(values, "base", None), np.memmap
+        ):
+            return 0  # Loaded from a disk.DiskTimeseriesStore
+        return nbytes
+    if hasattr(obj, "values") and hasattr(obj, "dates"):  # csrs.Timeseries
+        # Tuples of Python floats and date strings
+        return sizeof(obj.values) + sizeof(obj.dates)
+    if isinstance(obj, (tuple, list, set)):
+        return sys.getsizeof(obj) + sum(sizeof(v) for v in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(sizeof(v) for v in obj.values())
+    return sys.getsizeof(obj)
+
+
+def process_rss() -> int | None:
+    # Resident set size of this process, None where it can't be read
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+@dataclass
+class Pool:
+    name: str
+    nbytes: Callable[[], int]
+    evict: Callable[[int], int] | None  # Frees at least n bytes, returns freed
+    priority: int  # Lower priorities are evicted first
+
+
+class MemoryBudget:
+    """Accounts for the bytes held by registered pools (caches, loaded data)
+    and, over `limit` bytes, evicts from evictable pools in priority order.
+    """
+
+    # Cheap to rebuild first, raw data last
+    PRIORITIES = {
+        "response": 10,
+        "figure": 20,
+        "frame": 30,
+        "baseline": 40,
+        "statistic": 50,
+        "timeseries": 90,
+    }
+
+    def __init__(self, limit: int | None = None):
+        self.limit = limit
+        self.pools: dict[str, Pool] = dict()
+        self.evicted = 0
+        self._enforcing = threading.Lock()
+
+    def register(
+        self,
+        name: str,
+        nbytes: Callable[[], int],
+        evict: Callable[[int], int] | None = None,
+        priority: int = 100,
+    ):
+        self.pools[name] = Pool(name, nbytes, evict, priority)
+
+    def unregister(self, name: str):
+        self.pools.pop(name, None)
+
+    def add_data(self, name: str, data: Any):
+        # Loaded data that can't be evicted, e.g. module level dicts of
+        # timeseries. It doesn't change, so it's measured once, not per enforce
+        nbytes = sizeof(data)
+        self.register(name, lambda: nbytes)
+
+    def add_cache(self, name: str, versioned) -> None:
+        """Account for a `cache.VersionedCache`, one pool per artifact kind."""
+        versioned.budget = self
+        kinds = [k for k in self.PRIORITIES if k != "response"]
+        for kind in kinds:
+            self.register(
+                f"{name}.{kind}",
+                lambda k=kind: versioned.nbytes(k),
+                lambda n, k=kind: versioned.evict_bytes(n, k),
+                self.PRIORITIES[kind],
+            )
+        # Artifacts of other kinds are accounted for, but not evicted
+        self.register(
+            f"{name}.other",
+            lambda: versioned.nbytes() - sum(versioned.nbytes(k) for k in kinds),
+        )
+
+    def add_engine(self, name: str, engine) -> None:
+        """Account for a `compare.ComparisonEngine`."""
+        priority = self.PRIORITIES["baseline"]
+        self.register(name, engine.nbytes, engine.evict_bytes, priority)
+
+    def add_app(self, name: str, app) -> None:
+        """Account for the response cache of an `app.WidgetDash`."""
+        priority = self.PRIORITIES["response"]
+        self.register(name, app.cached_nbytes, app.evict_bytes, priority)
+
+    def usage(self) -> dict[str, int]:
+        return {name: pool.nbytes() for name, pool in self.pools.items()}
+
+    def total(self) -> int:
+        return sum(self.usage().values())
+
+    def enforce(self) -> int:
+        """Evict until the total is under the limit, returns bytes freed."""
+        if self.limit is None or not self._enforcing.acquire(blocking=False):
+            return 0  # No limit, or another thread is already evicting
+        try:
+            usage = self.usage()
+            over = sum(usage.values()) - self.limit
+            freed = 0
+            pools = sorted(self.pools.values(), key=lambda p: p.priority)
+            for pool in pools:
+                if over - freed <= 0:
+                    break
+                if pool.evict is None or usage[pool.name] == 0:
+                    continue
+                freed += pool.evict(over - freed)
+            if freed:
+                self.evicted += freed
+                logger.info("Memory budget evicted %s bytes", f"{freed:,}")
+            if over - freed > 0:
+                logger.warning(
+                    "Memory budget exceeded by %s bytes with nothing left to evict",
+                    f"{over - freed:,}",
+                )
+            return freed
+        finally:
+            self._enforcing.release()
+
+    def report(self) -> pd.DataFrame:
+        usage = self.usage()
+        df = pd.DataFrame(
+            [
+                (p.name, p.priority, p.evict is not None, usage[p.name])
+                for p in self.pools.values()
+            ],
+            columns=["pool", "priority", "evictable", "bytes"],
+        )
+        df = df.sort_values("bytes", ascending=False, ignore_index=True)
+        df["MiB"] = (df["bytes"] / 2**20).round(2)
+        return df
+
+    def table(self, **kwargs):
+        import dash_bootstrap_components as dbc
+        from dash import html
+
+        rss = process_rss()
+        limit = "none" if self.limit is None else f"{self.limit / 2**20:,.1f} MiB"
+        summary = [
+            f"Accounted: {self.total() / 2**20:,.1f} MiB",
+            f"Limit: {limit}",
+            f"Evicted so far: {self.evicted / 2**20:,.1f} MiB",
+        ]
+        if rss is not None:
+            summary.insert(1, f"Process RSS: {rss / 2**20:,.1f} MiB")
+        kwargs = dict(striped=True, bordered=True, hover=True, size="sm") | kwargs
+        return html.Div(
+            [
+                html.P(", ".join(summary), className="small"),
+                dbc.Table.from_dataframe(self.report(), **kwargs),
+            ]
+        )
+
+
+budget = MemoryBudget()  # Process wide default, set `budget.limit` to enforce
@@ -2,27 +2,34 @@ import csrs
 import dash
 import dash_bootstrap_components as dbc
 
-from . import aggregation, plotting
+from . import aggregation, compare, instrumentation, plotting, series_store
 
 
 class ExceedancePlot(dash.html.Div):
+    @instrumentation.instrumented
     def __init__(
         self,
         timeseries: csrs.Timeseries,
         header: str = "",
+        store: series_store.SeriesStore | None = None,
         **kwargs,
     ):
         self.timeseries = timeseries
         self.header = header or self.timeseries.path.split("/")[2]
         super().__init__(**kwargs)
+        s = aggregation.to_frame(self.timeseries).iloc[:, 0]
+        graph = plotting.exceedance(
+            s,
+            xaxis_title=f"{self.header} ({self.timeseries.units})",
+        )
+        if store is not None:
+            key = store.add(self.timeseries, series=s)
+            store.reference(graph, [key], kind="exceedance")
         self.children = [
             dbc.Stack(
                 [
                     dash.html.H6(self.header),
-                    plotting.exceedance(
-                        self.timeseries.to_frame().iloc[:, 0],
-                        xaxis_title=f"{self.header} ({self.timeseries.units})",
-                    ),
+                    graph,
                 ],
                 direction="vertical",
             )
@@ -30,24 +37,30 @@ class ExceedancePlot(dash.html.Div):
 
 
 class StorageExceedancePlot(dash.html.Div):
+    @instrumentation.instrumented
     def __init__(
         self,
         timeseries: csrs.Timeseries,
         header: str = "",
+        store: series_store.SeriesStore | None = None,
         **kwargs,
     ):
         self.timeseries = timeseries
         self.header = header or self.timeseries.path.split("/")[2]
         super().__init__(**kwargs)
         df = aggregation.annual_eos(self.timeseries)
+        graph = plotting.exceedance(
+            df.iloc[:, 0],
+            xaxis_title=f"{self.header} ({self.timeseries.units})",
+        )
+        if store is not None:
+            key = store.add(self.timeseries, "annual_eos", series=df.iloc[:, 0])
+            store.reference(graph, [key], kind="exceedance")
         self.children = [
             dbc.Stack(
                 [
                     dash.html.H6(self.header),
-                    plotting.exceedance(
-                        df.iloc[:, 0],
-                        xaxis_title=f"{self.header} ({self.timeseries.units})",
-                    ),
+                    graph,
                 ],
                 direction="vertical",
             )
@@ -55,11 +68,14 @@ class StorageExceedancePlot(dash.html.Div):
 
 
 class CompareExceedancePlot(dash.html.Div):
+    @instrumentation.instrumented
     def __init__(
         self,
         base_timeseries: csrs.Timeseries,
         alt_timeseries: csrs.Timeseries,
         header: str = "",
+        store: series_store.SeriesStore | None = None,
+        engine: compare.ComparisonEngine | None = None,
         **kwargs,
     ):
         self.base_timeseries = base_timeseries
@@ -68,18 +84,31 @@ class CompareExceedancePlot(dash.html.Div):
             raise ValueError("Cannot compare timeseries with different units")
         self.header = header or self.base_timeseries.path.split("/")[2]
         super().__init__(**kwargs)
-        series = {
-            self.base_timeseries.scenario: self.base_timeseries.to_frame().iloc[:, 0],
-            self.alt_timeseries.scenario: self.alt_timeseries.to_frame().iloc[:, 0],
+        timeseries = {
+            self.base_timeseries.scenario: self.base_timeseries,
+            self.alt_timeseries.scenario: self.alt_timeseries,
         }
+        if engine is None:
+            series = {
+                k: aggregation.to_frame(ts).iloc[:, 0] for k, ts in timeseries.items()
+            }
+        else:
+            # The store wants the series in date order, the plot sorts it
+            get = engine.series if store is not None else engine.exceedance
+            base, alt = get(self.base_timeseries, self.alt_timeseries, "values")
+            series = dict(zip(timeseries, (base, alt)))
+        graph = plotting.comparative_exceedance(
+            series,
+            xaxis_title=f"{self.header} ({self.base_timeseries.units})",
+        )
+        if store is not None:
+            keys = [store.add(timeseries[k], series=s) for k, s in series.items()]
+            store.reference(graph, keys, kind="exceedance")
         self.children = [
             dbc.Stack(
                 [
                     dash.html.H6(self.header),
-                    plotting.comparative_exceedance(
-                        series,
-                        xaxis_title=f"{self.header} ({self.base_timeseries.units})",
-                    ),
+                    graph,
                 ],
                 direction="vertical",
             )
@@ -87,11 +116,14 @@ class CompareExceedancePlot(dash.html.Div):
 
 
 class CompareStorageExceedancePlot(dash.html.Div):
+    @instrumentation.instrumented
     def __init__(
         self,
         base_timeseries: csrs.Timeseries,
         alt_timeseries: csrs.Timeseries,
         header: str = "",
+        store: series_store.SeriesStore | None = None,
+        engine: compare.ComparisonEngine | None = None,
         **kwargs,
     ):
         self.base_timeseries = base_timeseries
@@ -100,19 +132,34 @@ class CompareStorageExceedancePlot(dash.html.Div):
             raise ValueError("Cannot compare timeseries with different units")
         self.header = header or self.base_timeseries.path.split("/")[2]
         super().__init__(**kwargs)
-        series = {
+        timeseries = {
             self.base_timeseries.scenario: self.base_timeseries,
             self.alt_timeseries.scenario: self.alt_timeseries,
         }
-        series = {k: aggregation.annual_eos(df).iloc[:, 0] for k, df in series.items()}
+        if engine is None:
+            series = {
+                k: aggregation.annual_eos(ts).iloc[:, 0] for k, ts in timeseries.items()
+            }
+        else:
+            # The store wants the series in date order, the plot sorts it
+            get = engine.series if store is not None else engine.exceedance
+            base, alt = get(self.base_timeseries, self.alt_timeseries, "annual_eos")
+            series = dict(zip(timeseries, (base, alt)))
+        graph = plotting.comparative_exceedance(
+            series,
+            xaxis_title=f"{self.header} ({self.base_timeseries.units})",
+        )
+        if store is not None:
+            keys = [
+                store.add(timeseries[k], "annual_eos", series=s)
+                for k, s in series.items()
+            ]
+            store.reference(graph, keys, kind="exceedance")
         self.children = [
             dbc.Stack(
                 [
                     dash.html.H6(self.header),
-                    plotting.comparative_exceedance(
-                        series,
-                        xaxis_title=f"{self.header} ({self.base_timeseries.units})",
-                    ),
+                    graph,
                 ],
                 direction="vertical",
             )
@@ -120,24 +167,102 @@ class CompareStorageExceedancePlot(dash.html.Div):
 
 
 class TimeseriesPlot(dash.html.Div):
+    @instrumentation.instrumented
     def __init__(
         self,
         timeseries: csrs.Timeseries,
         header: str = "",
+        store: series_store.SeriesStore | None = None,
         **kwargs,
     ):
         self.timeseries = timeseries
         self.header = header or self.timeseries.path.split("/")[2]
         super().__init__(**kwargs)
-        df = self.timeseries.to_frame()
+        df = aggregation.to_frame(self.timeseries)
+        graph = plotting.timeseries(
+            df.iloc[:, 0],
+            yaxis_title=f"{self.header} ({self.timeseries.units})",
+        )
+        if store is not None:
+            key = store.add(self.timeseries, series=df.iloc[:, 0])
+            store.reference(graph, [key])
         self.children = [
             dbc.Stack(
                 [
                     dash.html.H6(self.header),
-                    plotting.timeseries(
-                        df.iloc[:, 0],
-                        yaxis_title=f"{self.header} ({self.timeseries.units})",
-                    ),
+                    graph,
+                ],
+                direction="vertical",
+            )
+        ]
+
+
+class FanChartPlot(dash.html.Div):
+    @instrumentation.instrumented
+    def __init__(
+        self,
+        timeseries: list[csrs.Timeseries],
+        header: str = "",
+        percentiles: tuple[float, ...] = (10, 25, 50, 75, 90),
+        **kwargs,
+    ):
+        self.timeseries = timeseries
+        if not self.timeseries:
+            raise ValueError("No runs to draw a fan chart of")
+        units = {ts.units for ts in self.timeseries}
+        if len(units) != 1:
+            raise ValueError(f"Cannot combine timeseries with different units: {units}")
+        self.units = units.pop()
+        self.header = header or self.timeseries[0].path.split("/")[2]
+        super().__init__(**kwargs)
+        bands = aggregation.percentile_bands(self.timeseries, percentiles)
+        graph = plotting.fan_chart(
+            bands,
+            yaxis_title=f"{self.header} ({self.units})",
+        )
+        self.children = [
+            dbc.Stack(
+                [
+                    dash.html.H6(f"{self.header} ({len(self.timeseries)} members)"),
+                    graph,
+                ],
+                direction="vertical",
+            )
+        ]
+
+
+class DifferenceHeatmapPlot(dash.html.Div):
+    @instrumentation.instrumented
+    def __init__(
+        self,
+        base_timeseries: csrs.Timeseries,
+        alt_timeseries: csrs.Timeseries,
+        header: str = "",
+        **kwargs,
+    ):
+        self.base_timeseries = base_timeseries
+        self.alt_timeseries = alt_timeseries
+        if self.base_timeseries.units != self.alt_timeseries.units:
+            raise ValueError("Cannot compare timeseries with different units")
+        self.header = header or self.base_timeseries.path.split("/")[2]
+        super().__init__(**kwargs)
+        years, diff = aggregation.water_year_difference(
+            self.base_timeseries,
+            self.alt_timeseries,
+        )
+        graph = plotting.difference_heatmap(
+            years,
+            diff,
+            aggregation.WATER_YEAR_MONTHS,
+            units=self.base_timeseries.units,
+        )
+        a = self.alt_timeseries.scenario
+        b = self.base_timeseries.scenario
+        self.children = [
+            dbc.Stack(
+                [
+                    dash.html.H6(f"{self.header}: {a} minus {b}"),
+                    graph,
                 ],
                 direction="vertical",
             )
@@ -1,11 +1,20 @@
+from urllib.parse import quote
+
 import dash
 import numpy as np
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
 
+from . import instrumentation
+
+# plotly.express takes longer to import than the rest of the package, it is
+# imported by the functions that build a figure with it
 
+
+@instrumentation.timed("figure")
 def sparkline(s: pd.Series, **layout_kwargs) -> dash.dcc.Graph:
+    import plotly.express as px
+
     fig = px.line(x=s.index, y=s.values)
     # hide and lock down axes
     fig.update_xaxes(visible=False, fixedrange=True)
@@ -38,6 +47,120 @@ def sparkline(s: pd.Series, **layout_kwargs) -> dash.dcc.Graph:
     )
 
 
+# Plotly's default colorway, so SVG sparklines match the plotly ones
+COLORWAY = ("#636efa", "#EF553B", "#00cc96", "#ab63fa", "#FFA15A", "#19d3f3")
+
+
+def _decimate(values: np.ndarray, bins: int) -> np.ndarray:
+    # Keep the min and max of each pixel column, so peaks survive downsampling
+    if values.size <= 2 * bins:
+        return values
+    edges = np.linspace(0, values.size, bins + 1).astype(int)[:-1]
+    lo = np.fmin.reduceat(values, edges)
+    hi = np.fmax.reduceat(values, edges)
+    return np.column_stack((lo, hi)).ravel()
+
+
+def _svg_path(
+    values: np.ndarray,
+    width: float,
+    height: float,
+    low: float,
+    high: float,
+) -> str:
+    x = np.linspace(0.0, width, values.size)
+    span = (high - low) or 1.0
+    y = height - (values - low) / span * height
+    commands = list()
+    pen_up = True
+    for xi, yi in zip(x.round(1), y.round(1)):
+        if np.isnan(yi):
+            pen_up = True  # Leave a gap for missing data
+            continue
+        commands.append(f"{'M' if pen_up else 'L'}{xi:g} {yi:g}")
+        pen_up = False
+    return "".join(commands)
+
+
+@instrumentation.timed("figure")
+def svg_sparkline(
+    series: pd.Series | dict[str, pd.Series],
+    width: int = 300,
+    height: float = 33.6 + 8,
+    title: str = "",
+    stroke_width: float = 1.5,
+) -> dash.html.Img:
+    """A sparkline as a static inline SVG image, no plotly.js involved."""
+    if isinstance(series, pd.Series):
+        series = {series.name: series}
+    frames = list(series.values())
+    index = frames[0].index
+    if any(not s.index.equals(index) for s in frames[1:]):
+        # One x domain for every series, so they line up where their dates do
+        for s in frames[1:]:
+            index = index.union(s.index)
+        frames = [s.reindex(index) for s in frames]
+    arrays = [
+        _decimate(np.asarray(s.values, dtype=np.float64), width) for s in frames
+    ]
+    finite = [a[np.isfinite(a)] for a in arrays]
+    finite = [a for a in finite if a.size]
+    # Like rangemode="tozero" on the plotly sparkline
+    low = min(0.0, *(a.min() for a in finite)) if finite else 0.0
+    high = max(0.0, *(a.max() for a in finite)) if finite else 1.0
+    pad = stroke_width  # Keep the stroke inside the viewBox
+    paths = "".join(
+        f'<path d="{_svg_path(a, width, height - 2 * pad, low, high)}" '
+        f'transform="translate(0 {pad:g})" stroke="{COLORWAY[i % len(COLORWAY)]}"/>'
+        for i, a in enumerate(arrays)
+    )
+    svg = (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height:g}" '
+        f'viewBox="0 0 {width} {height:g}" preserveAspectRatio="none">'
+        f'<g fill="none" stroke-width="{stroke_width:g}" '
+        f'stroke-linejoin="round">{paths}</g></svg>'
+    )
+    return dash.html.Img(
+        src="data:image/svg+xml;utf8," + quote(svg),
+        width=width,
+        height=height,
+        title=title,
+        alt=title,
+    )
+
+
+@instrumentation.timed("figure")
+def comparative_svg_sparkline(
+    series: dict[str, pd.Series],
+    title: str = "",
+    **kwargs,
+) -> dash.html.Div:
+    return dash.html.Div(
+        [
+            svg_sparkline(series, title=title, **kwargs),
+            dash.html.Div(svg_legend(list(series))),
+        ]
+    )
+
+
+def svg_legend(names: list[str]) -> list[dash.html.Span]:
+    # Names in the colors of `svg_sparkline`'s lines, which can't show them
+    return [
+        dash.html.Span(
+            [
+                dash.html.Span(
+                    "\u2014 ",
+                    style=dict(color=COLORWAY[i % len(COLORWAY)], fontWeight="bold"),
+                ),
+                name,
+            ],
+            className="small me-3",
+        )
+        for i, name in enumerate(names)
+    ]
+
+
+@instrumentation.timed("figure")
 def comparative_sparkline(
     series: dict[str, pd.Series],
     **layout_kwargs,
@@ -82,7 +205,10 @@ def comparative_sparkline(
     )
 
 
+@instrumentation.timed("figure")
 def exceedance(s: pd.Series, **layout_kwargs) -> dash.dcc.Graph:
+    import plotly.express as px
+
     s = s.sort_values(ascending=False)
     e = np.arange(1.0, s.size + 1) / s.size
     fig = px.line(x=s, y=e)
@@ -106,11 +232,16 @@ def exceedance(s: pd.Series, **layout_kwargs) -> dash.dcc.Graph:
     return dash.dcc.Graph(figure=fig)
 
 
+@instrumentation.timed("figure")
 def comparative_exceedance(
     series: dict[str, pd.Series],
     **layout_kwargs,
 ) -> dash.dcc.Graph:
-    series = {k: s.sort_values(ascending=False) for k, s in series.items()}
+    series = {
+        # Series from compare.ComparisonEngine.exceedance are already sorted
+        k: s if s.is_monotonic_decreasing else s.sort_values(ascending=False)
+        for k, s in series.items()
+    }
     exceed = {k: np.arange(1.0, s.size + 1) / s.size for k, s in series.items()}
     # plot lines
     fig = go.Figure()
@@ -142,7 +273,10 @@ def comparative_exceedance(
     return dash.dcc.Graph(figure=fig)
 
 
+@instrumentation.timed("figure")
 def timeseries(s: pd.Series, **layout_kwargs) -> dash.dcc.Graph:
+    import plotly.express as px
+
     fig = px.line(x=s.index, y=s.values)
     layout_kwargs = (
         dict(
@@ -158,3 +292,101 @@ def timeseries(s: pd.Series, **layout_kwargs) -> dash.dcc.Graph:
     )
     fig.update_layout(**layout_kwargs)
     return dash.dcc.Graph(figure=fig)
+
+
+@instrumentation.timed("figure")
+def fan_chart(
+    bands: pd.DataFrame,
+    color: str = COLORWAY[0],
+    **layout_kwargs,
+) -> dash.dcc.Graph:
+    """Filled bands between symmetric percentile columns (outermost first), and
+    the middle column as a line when their count is odd."""
+    fig = go.Figure()
+    n = len(bands.columns)
+    for i in range(n // 2):
+        lower, upper = bands.columns[i], bands.columns[n - 1 - i]
+        opacity = 0.15 + 0.2 * i
+        fig.add_trace(
+            go.Scatter(
+                x=bands.index,
+                y=bands[lower],
+                mode="lines",
+                line=dict(width=0),
+                showlegend=False,
+                hoverinfo="skip",
+            )
+        )
+        fig.add_trace(
+            go.Scatter(
+                x=bands.index,
+                y=bands[upper],
+                mode="lines",
+                line=dict(width=0),
+                fill="tonexty",
+                fillcolor=color,
+                opacity=opacity,  # Any CSS color works, no need to parse it
+                name=f"{lower}-{upper}",
+            )
+        )
+    if n % 2:
+        middle = bands.columns[n // 2]
+        fig.add_trace(
+            go.Scatter(
+                x=bands.index,
+                y=bands[middle],
+                mode="lines",
+                line=dict(color=color),
+                name=middle,
+            )
+        )
+    layout_kwargs = (
+        dict(
+            showlegend=True,
+            autosize=False,
+            width=750,
+            height=400,
+            xaxis_title="Date",
+            yaxis_title="Value",
+            font=dict(size=11),
+        )
+        | layout_kwargs
+    )
+    fig.update_layout(**layout_kwargs)
+    return dash.dcc.Graph(figure=fig)
+
+
+@instrumentation.timed("figure")
+def difference_heatmap(
+    years: np.ndarray,
+    matrix: np.ndarray,
+    months: tuple[str, ...],
+    units: str = "",
+    **layout_kwargs,
+) -> dash.dcc.Graph:
+    # One trace of the whole matrix, centered so no difference is white
+    fig = go.Figure(
+        go.Heatmap(
+            z=matrix,
+            x=list(months),
+            y=years,
+            colorscale="RdBu",
+            zmid=0,
+            colorbar=dict(title=units),
+            hovertemplate="WY %{y} %{x}: %{z:+,.0f}<extra></extra>",
+        )
+    )
+    layout_kwargs = (
+        dict(
+            autosize=False,
+            width=750,
+            height=max(300, 12 * len(years)),
+            xaxis_title="Month",
+            yaxis_title="Water Year",
+            yaxis=dict(autorange="reversed"),
+            font=dict(size=11),
+        )
+        | layout_kwargs
+    )
+    fig.update_layout(**layout_kwargs)
+    return dash.dcc.Graph(figure=fig)
@@ -0,0 +1,137 @@
+import itertools
+import logging
+import queue
+import threading
+from typing import Iterable
+
+import csrs
+
+from . import cache
+
+logger = logging.getLogger(__name__)
+
+
+class Prefetcher:
+    """Warms a `VersionedCache` in background threads with data a page declares
+    it will likely need next, e.g. every `StudyHealthBoard` path of a selected
+    run, or the same path in sibling runs.
+
+    Work is low priority: a worker waits while the cache has foreground loads
+    in flight, and between items. Requests can be cancelled per run, or all
+    at once, before they are started.
+    """
+
+    def __init__(
+        self,
+        versioned: cache.VersionedCache,
+        max_workers: int = 2,
+        max_pending: int = 1024,
+        pause: float = 0.05,
+    ):
+        self.versioned = versioned
+        self.max_workers = max_workers
+        self.pause = pause
+        self.prefetched = 0
+        self.skipped = 0
+        self.cancelled = 0
+        self._queue: queue.PriorityQueue = queue.PriorityQueue(maxsize=max_pending)
+        self._seq = itertools.count()
+        # Queued requests with a sequence number below these are cancelled
+        self._cancel_before = 0
+        self._cancel_run_before: dict[tuple[str, str], int] = dict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = list()
+
+    def request(
+        self,
+        runs: Iterable[csrs.Run],
+        paths: Iterable[str],
+        priority: int = 10,
+    ) -> int:
+        """Queue every run x path, lower `priority` values are fetched first.
+        Returns the number queued, requests beyond `max_pending` are dropped."""
+        queued = 0
+        paths = list(paths)
+        for run in runs:
+            for path in paths:
+                key = cache.ArtifactKey(run.scenario, run.version, path)
+                if key in self.versioned:
+                    continue
+                try:
+                    self._queue.put_nowait((priority, next(self._seq), key))
+                except queue.Full:
+                    logger.debug("Prefetch queue full, dropped %s", key)
+                    return queued
+                queued += 1
+        return queued
+
+    def cancel(self, run: csrs.Run | None = None):
+        """Drop queued requests of `run`, or of every run. Fetches that already
+        started are left to finish, their results are still cached."""
+        with self._lock:
+            if run is None:
+                self._cancel_before = next(self._seq)
+            else:
+                key = (run.scenario, run.version)
+                self._cancel_run_before[key] = next(self._seq)
+
+    def pending(self) -> int:
+        return self._queue.qsize()
+
+    def start(self):
+        if self._threads:
+            return
+        self._stop.clear()
+        for i in range(self.max_workers):
+            thread = threading.Thread(
+                target=self._work,
+                name=f"cdw-prefetch-{i}",
+                daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        self.cancel()
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def _is_cancelled(self, seq: int, key: cache.ArtifactKey) -> bool:
+        with self._lock:
+            if seq < self._cancel_before:
+                return True
+            return seq < self._cancel_run_before.get(key.run, 0)
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                _, seq, key = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                if self._is_cancelled(seq, key):
+                    with self._lock:  # Counters are shared by the workers
+                        self.cancelled += 1
+                    continue
+                if key in self.versioned:
+                    with self._lock:
+                        self.skipped += 1
+                    continue
+                # Yield to foreground requests, other prefetches don't count
+                while self.versioned.loading() and not self._stop.is_set():
+                    self._stop.wait(self.pause)
+                if self._stop.is_set():
+                    continue
+                self.versioned.get_timeseries(
+                    key.scenario, key.version, key.path, background=True
+                )
+                with self._lock:
+                    self.prefetched += 1
+            except Exception as e:
+                logger.debug("Could not prefetch %s: %s", key, e)
+            finally:
+                self._queue.task_done()
+            self._stop.wait(self.pause)
@@ -0,0 +1,187 @@
+import functools
+import importlib
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+import csrs
+from dash import html
+from dash.development.base_component import Component
+
+from . import clients, instrumentation
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PageSpec:
+    widgets: list[str]  # e.g. "cards.StorageCard", or a fully qualified class name
+    paths: list[str]
+    runs: list[tuple[str, ...]]  # Keys of the runs given to one widget, in order
+    kwargs: dict[str, dict] = field(default_factory=dict)  # Per widget kwargs
+
+
+@dataclass(frozen=True)
+class Task:
+    page: str
+    widget: str
+    path: str
+    runs: tuple[str, ...]
+
+    def key(self) -> str:
+        return "|".join((self.page, self.widget, self.path, *self.runs))
+
+
+def resolve_widget(name: str) -> type:
+    module, _, cls = name.rpartition(".")
+    try:
+        mod = importlib.import_module(f"{__package__}.{module}")
+    except ImportError:
+        mod = importlib.import_module(module)
+    return getattr(mod, cls)
+
+
+class PrerenderedLayouts:
+    """Serialized widgets of fixed pages, see `prerender`. Serve a page with
+    `dash.register_page(..., layout=layouts.layout(name, runs))`."""
+
+    def __init__(self, pages: dict[str, PageSpec]):
+        self.pages = pages
+        self.layouts: dict[str, str] = dict()  # Task key -> serialized component
+        self.errors: dict[str, str] = dict()
+
+    def tasks(self, page: str | None = None) -> list[Task]:
+        tasks = list()
+        for name, spec in self.pages.items():
+            if page is not None and name != page:
+                continue
+            for widget in spec.widgets:
+                for path in spec.paths:
+                    for runs in spec.runs:
+                        tasks.append(Task(name, widget, path, tuple(runs)))
+        return tasks
+
+    def get(self, task: Task) -> dict | None:
+        serialized = self.layouts.get(task.key())
+        if serialized is None:
+            return None
+        return json.loads(serialized)
+
+    def page(self, name: str) -> list[dict]:
+        # Components as plain dicts, Dash serves them without rebuilding widgets
+        rendered = (self.get(task) for task in self.tasks(name))
+        return [c for c in rendered if c is not None]
+
+    def layout(
+        self,
+        name: str,
+        runs: dict[str, csrs.Run] | None = None,
+        client: csrs.clients.Client | None = None,
+        **kwargs,
+    ) -> Callable[..., html.Div]:
+        """A layout function serving page `name` from the prerendered widgets.
+
+        With `runs`, widgets that weren't prerendered (or failed to) are
+        rendered live on first request and kept for the next ones. `kwargs` are
+        passed to the containing `html.Div`.
+        """
+
+        def layout(**_) -> html.Div:
+            children = list()
+            for task in self.tasks(name):
+                component = self.get(task)
+                if component is None and runs is not None:
+                    component = self.render(task, runs, client)
+                if component is not None:
+                    children.append(component)
+            return html.Div(children, **kwargs)
+
+        return layout
+
+    def render(
+        self,
+        task: Task,
+        runs: dict[str, csrs.Run],
+        client: csrs.clients.Client | None = None,
+    ) -> Component:
+        # Live fallback for a task missing from the store
+        kwargs = self.pages[task.page].kwargs.get(task.widget, dict())
+        run_objs = tuple(runs[k] for k in task.runs)
+        component = _build(task, run_objs, kwargs, client or clients.get_client())
+        self.layouts[task.key()] = instrumentation.serialize(component)
+        return component
+
+    def save(self, file: Path | str):
+        Path(file).write_text(json.dumps(self.layouts))
+
+    def load(self, file: Path | str):
+        self.layouts.update(json.loads(Path(file).read_text()))
+
+
+_client: csrs.clients.Client | None = None
+
+
+def _init_worker(client_factory: Callable[[], csrs.clients.Client]):
+    global _client
+    _client = client_factory()
+
+
+def _build(
+    task: Task,
+    runs: tuple[csrs.Run, ...],
+    kwargs: dict,
+    client: csrs.clients.Client,
+) -> Component:
+    factory = resolve_widget(task.widget)
+    timeseries = [
+        client.get_timeseries(scenario=r.scenario, version=r.version, path=task.path)
+        for r in runs
+    ]
+    return factory(*timeseries, **kwargs)
+
+
+def _render(
+    task: Task,
+    runs: tuple[csrs.Run, ...],
+    kwargs: dict,
+) -> str:
+    return instrumentation.serialize(_build(task, runs, kwargs, _client))
+
+
+def prerender(
+    pages: dict[str, PageSpec],
+    runs: dict[str, csrs.Run],
+    client_factory: Callable[[], csrs.clients.Client] | None = None,
+    max_workers: int | None = None,
+) -> PrerenderedLayouts:
+    """Render every widget x path x runs combination of the pages across a
+    process pool, and return the serialized layouts.
+
+    `client_factory` is called once per worker process and must be picklable.
+    """
+    client_factory = client_factory or functools.partial(
+        clients.get_client,
+        clients.CSRS_URL,
+    )
+    prerendered = PrerenderedLayouts(pages)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(client_factory,),
+    ) as pool:
+        futures = dict()
+        for task in prerendered.tasks():
+            kwargs = pages[task.page].kwargs.get(task.widget, dict())
+            run_objs = tuple(runs[k] for k in task.runs)
+            futures[pool.submit(_render, task, run_objs, kwargs)] = task
+        for future in as_completed(futures):
+            task = futures[future]
+            try:
+                prerendered.layouts[task.key()] = future.result()
+            except Exception as e:
+                logger.warning("Could not prerender %s: %s", task.key(), e)
+                prerendered.errors[task.key()] = repr(e)
+    return prerendered
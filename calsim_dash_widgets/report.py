@@ -0,0 +1,187 @@
+import datetime
+import html
+import json
+import logging
+import math
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+import csrs
+import dash_bootstrap_components as dbc
+
+from . import alerts, cache, clients, instrumentation
+from .prerender import resolve_widget
+
+logger = logging.getLogger(__name__)
+
+BoardSpec = dict[str, list[tuple[type[alerts.TimeseriesAlert], str, str]]]
+
+
+def load_spec(file: Path | str) -> BoardSpec:
+    """Read a board spec from JSON, shaped like `StudyHealthBoard.ALERTS`:
+
+    {"Storage": [["alerts.MeanStorageAlert", "shasta_storage", "Shasta"], ...]}
+    """
+    raw = json.loads(Path(file).read_text())
+    return {
+        section: [(resolve_widget(cls), path, name) for cls, path, name in items]
+        for section, items in raw.items()
+    }
+
+
+@dataclass
+class ReportRow:
+    observed_run: str
+    expected_run: str
+    section: str
+    name: str
+    path: str
+    observed: float = float("nan")
+    expected: float = float("nan")
+    diff_perc: float = float("nan")
+    units: str = ""
+    status: str = "unavailable"  # success, warning, danger, or unavailable
+    detail: str = ""
+
+
+@dataclass
+class Report:
+    rows: list[ReportRow] = field(default_factory=list)
+    generated: str = ""
+
+    def counts(self) -> dict[str, int]:
+        counts = dict()
+        for row in self.rows:
+            counts[row.status] = counts.get(row.status, 0) + 1
+        return counts
+
+    def to_json(self, file: Path | str):
+        dumped = {
+            "generated": self.generated,
+            "counts": self.counts(),
+            "rows": [_null_nan(asdict(r)) for r in self.rows],
+        }
+        Path(file).write_text(json.dumps(dumped, indent=2))
+
+    def to_html(self, file: Path | str, title: str = "CalSim Study Health"):
+        header = (
+            "<tr><th>Observed run</th><th>Expected run</th><th>Section</th>"
+            "<th>Name</th><th>Observed</th><th>Expected</th><th>Difference</th>"
+            "<th>Detail</th></tr>"
+        )
+        body = list()
+        for r in self.rows:
+            color = "secondary" if r.status == "unavailable" else r.status
+            cells = (
+                html.escape(r.observed_run),
+                html.escape(r.expected_run),
+                html.escape(r.section),
+                html.escape(r.name),
+                _fmt(r.observed, f"{{:,.0f}} {html.escape(r.units)}"),
+                _fmt(r.expected, f"{{:,.0f}} {html.escape(r.units)}"),
+                _fmt(r.diff_perc, "{:+,.1%}"),
+                html.escape(r.detail),
+            )
+            tds = "".join(f"<td>{c}</td>" for c in cells)
+            body.append(f'<tr class="table-{color}">{tds}</tr>')
+        counts = ", ".join(f"{k}: {v}" for k, v in sorted(self.counts().items()))
+        Path(file).write_text(
+            "<!DOCTYPE html>\n"
+            f'<html><head><meta charset="utf-8"><title>{html.escape(title)}</title>'
+            f'<link rel="stylesheet" href="{dbc.themes.BOOTSTRAP}"></head>'
+            f'<body class="p-3"><h3>{html.escape(title)}</h3>'
+            f'<p class="text-muted">Generated {self.generated}. {counts}</p>'
+            '<table class="table table-sm table-bordered">'
+            f"<thead>{header}</thead><tbody>{''.join(body)}</tbody></table>"
+            "</body></html>\n"
+        )
+
+
+def _null_nan(row: dict) -> dict:
+    # NaN is not valid JSON, unavailable values are written as null
+    return {
+        k: None if isinstance(v, float) and math.isnan(v) else v
+        for k, v in row.items()
+    }
+
+
+def _fmt(value: float, fmt: str) -> str:
+    return "-" if math.isnan(value) else fmt.format(value)
+
+
+def _label(run: csrs.Run) -> str:
+    return f"{run.scenario} ({run.version})"
+
+
+def _summarize(
+    versioned: cache.VersionedCache,
+    alert: type[alerts.TimeseriesAlert],
+    run: csrs.Run,
+    path: str,
+) -> tuple[csrs.Timeseries, float]:
+    with instrumentation.span(alert.__name__, "fetch"):
+        ts = versioned.get_timeseries(run.scenario, run.version, path)
+    # A baseline shared by many pairs is only summarized once
+    value = versioned.derive(ts, "statistic", alert.__qualname__, alert.summarize)
+    return ts, value
+
+
+def evaluate_pair(
+    observed: csrs.Run,
+    expected: csrs.Run,
+    versioned: cache.VersionedCache,
+    spec: BoardSpec | None = None,
+    allowable_diff_perc: float = 0.05,
+) -> list[ReportRow]:
+    """Evaluate the alerts of a board for one pair of runs, without Dash."""
+    spec = spec or alerts.StudyHealthBoard.ALERTS
+    rows = list()
+    for section, items in spec.items():
+        for alert, path, name in items:
+            row = ReportRow(_label(observed), _label(expected), section, name, path)
+            try:
+                o_ts, o = _summarize(versioned, alert, observed, path)
+                e_ts, e = _summarize(versioned, alert, expected, path)
+            except clients.UNAVAILABLE as err:
+                row.detail = f"Data unavailable: {type(err).__name__}"
+                rows.append(row)
+                continue
+            result = alerts.AlertResult.from_values(o, e)
+            bad_comp = alert.compare(o_ts, e_ts)
+            row.observed = result.observed
+            row.expected = result.expected
+            row.diff_perc = result.diff_perc
+            row.units = o_ts.units
+            row.status = alert.status(result.diff_perc, bad_comp, allowable_diff_perc)
+            row.detail = ", ".join(f"{k} differs" for k in bad_comp)
+            rows.append(row)
+    return rows
+
+
+def generate(
+    pairs: list[tuple[csrs.Run, csrs.Run]],
+    spec: BoardSpec | None = None,
+    versioned: cache.VersionedCache | None = None,
+    allowable_diff_perc: float = 0.05,
+    max_workers: int | None = None,
+) -> Report:
+    """Evaluate a board spec over many (observed, expected) run pairs in
+    parallel. All pairs share `versioned`, so a run that appears in several
+    pairs is fetched and summarized once.
+    """
+    versioned = versioned or cache.VersionedCache(clients.get_client())
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(evaluate_pair, o, e, versioned, spec, allowable_diff_perc)
+            for o, e in pairs
+        ]
+        rows = [row for future in futures for row in future.result()]
+    logger.info(
+        "Evaluated %s pairs, cache hits=%s misses=%s",
+        len(pairs),
+        versioned.hits,
+        versioned.misses,
+    )
+    generated = datetime.datetime.now().isoformat(timespec="seconds")
+    return Report(rows=rows, generated=generated)
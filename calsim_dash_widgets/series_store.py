@@ -0,0 +1,135 @@
+import base64
+import uuid
+
+import csrs
+import dash
+import numpy as np
+import pandas as pd
+import pandss
+from dash import ALL, MATCH, Input, Output, State, dcc
+
+from . import aggregation
+
+
+def _store_id(name: str) -> dict[str, str]:
+    return {"type": "cdw-series-store", "store": name}
+
+
+def _graph_id(name: str, index: str) -> dict[str, str]:
+    return {"type": "cdw-series-graph", "store": name, "index": index}
+
+
+def encode(s: pd.Series) -> dict:
+    # Values as base64 float32, dates as a start month when monthly and regular
+    values = s.to_numpy(dtype="<f4", na_value=np.nan)
+    encoded = {"y": base64.b64encode(values.tobytes()).decode("ascii")}
+    index = s.index
+    if isinstance(index, pd.PeriodIndex):
+        index = index.to_timestamp()
+    if not isinstance(index, pd.DatetimeIndex):
+        encoded["x"] = index.tolist()
+        return encoded
+    months = index.to_period("M").asi8
+    regular = len(months) > 0 and bool(np.all(np.diff(months) == 1))
+    if regular and bool(np.all(index.day == 1)):
+        encoded["months"] = {"start": index[0].strftime("%Y-%m"), "anchor": "start"}
+    elif regular and bool(np.all(index.is_month_end)):
+        encoded["months"] = {"start": index[0].strftime("%Y-%m"), "anchor": "end"}
+    else:
+        encoded["x"] = index.strftime("%Y-%m-%dT%H:%M:%S").tolist()
+    return encoded
+
+
+class SeriesStore(dcc.Store):
+    """A page-level store holding each unique series once.
+
+    Widgets given a store send their figures without data, and the traces are
+    filled in from the store in the browser.
+    """
+
+    def __init__(self, name: str = "series", **kwargs):
+        self.name = name
+        super().__init__(id=_store_id(name), data=dict(), **kwargs)
+
+    def add(
+        self,
+        timeseries: csrs.Timeseries | pandss.RegularTimeseries,
+        suffix: str = "",
+        series: pd.Series | None = None,
+    ) -> str:
+        parts = (timeseries.scenario, timeseries.version, timeseries.path, suffix)
+        key = "|".join(str(p) for p in parts)
+        if key not in self.data:
+            if series is None:
+                series = aggregation.to_frame(timeseries).iloc[:, 0]
+            self.data[key] = encode(series)
+        return key
+
+    def reference(
+        self,
+        graph: dcc.Graph,
+        keys: list[str],
+        kind: str = "line",
+    ) -> dcc.Graph:
+        # Strip the trace data, the clientside callback restores it from the store
+        for trace, key in zip(graph.figure.data, keys):
+            trace.update(x=None, y=None, meta=dict(cdw_key=key, cdw_kind=kind))
+        graph.id = _graph_id(self.name, uuid.uuid4().hex)
+        return graph
+
+
+dash.clientside_callback(
+    """
+    function (data, figures) {
+        if (!data) {
+            return window.dash_clientside.no_update;
+        }
+        function decode(b64) {
+            const bin = atob(b64);
+            const bytes = new Uint8Array(bin.length);
+            for (let i = 0; i < bin.length; i++) {
+                bytes[i] = bin.charCodeAt(i);
+            }
+            return Array.from(new Float32Array(bytes.buffer));
+        }
+        function dates(s, n) {
+            if (!s.months) {
+                return s.x;
+            }
+            const [year, month] = s.months.start.split("-").map(Number);
+            const x = new Array(n);
+            for (let i = 0; i < n; i++) {
+                const d = s.months.anchor === "end"
+                    ? new Date(Date.UTC(year, month + i, 0))
+                    : new Date(Date.UTC(year, month - 1 + i, 1));
+                x[i] = d.toISOString().slice(0, 10);
+            }
+            return x;
+        }
+        function fill(trace) {
+            const meta = trace.meta || {};
+            const s = data[meta.cdw_key];
+            if (!s) {
+                return trace;
+            }
+            const y = decode(s.y);
+            if (meta.cdw_kind === "exceedance") {
+                const x = y.slice().sort(function (a, b) {
+                    if (isNaN(a)) { return 1; }
+                    if (isNaN(b)) { return -1; }
+                    return b - a;
+                });
+                const p = x.map(function (_, i) { return (i + 1) / x.length; });
+                return Object.assign({}, trace, {x: x, y: p});
+            }
+            return Object.assign({}, trace, {x: dates(s, y.length), y: y});
+        }
+        return figures.map(function (fig) {
+            return Object.assign({}, fig, {data: fig.data.map(fill)});
+        });
+    }
+    """,
+    Output({"type": "cdw-series-graph", "store": MATCH, "index": ALL}, "figure"),
+    Input({"type": "cdw-series-store", "store": MATCH}, "data"),
+    State({"type": "cdw-series-graph", "store": MATCH, "index": ALL}, "figure"),
+)
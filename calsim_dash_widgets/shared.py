@@ -0,0 +1,146 @@
+import gc
+import json
+import os
+import struct
+import weakref
+from multiprocessing import resource_tracker, shared_memory
+
+import csrs
+import numpy as np
+
+from .timeseries import ArrayTimeseries, TimeseriesDataset
+
+_ALIGN = 64
+
+
+def _aligned(offset: int) -> int:
+    return (offset + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+class SharedDataset:
+    """Many timeseries aligned on one date index in a single shared memory block.
+
+    Create it once in a preload step (e.g. gunicorn's `preload_app`, or a
+    launcher process), then `attach(name)` from each worker. Workers get
+    read-only, zero-copy views of the same physical memory.
+
+    Timeseries returned by `__getitem__` are views into the block, `close()`
+    raises `BufferError` while any of them is still referenced.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, owner: bool):
+        self.shm = shm
+        self.owner = owner
+        (size,) = struct.unpack_from("<Q", shm.buf, 0)
+        end = 8 + size
+        self.header = json.loads(bytes(shm.buf[8:end]))
+        n, m = self.header["shape"]
+        self.keys: list[str] = self.header["keys"]
+        self.dates = np.ndarray(
+            (m,),
+            dtype="datetime64[s]",
+            buffer=shm.buf,
+            offset=self.header["dates_offset"],
+        )
+        self.values = np.ndarray(
+            (n, m),
+            dtype=np.float64,
+            buffer=shm.buf,
+            offset=self.header["values_offset"],
+        )
+        self.dates.flags.writeable = False
+        self.values.flags.writeable = False
+        self._rows = {k: i for i, k in enumerate(self.keys)}
+        self._views: list[weakref.ref] = list()  # Handed out by __getitem__
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @classmethod
+    def create(
+        cls,
+        timeseries: dict[str, csrs.Timeseries | ArrayTimeseries],
+        name: str | None = None,
+    ) -> "SharedDataset":
+        arrays = {
+            k: ArrayTimeseries.from_timeseries(ts) for k, ts in timeseries.items()
+        }
+        dates = np.unique(np.concatenate([ts.dates for ts in arrays.values()]))
+        n, m = len(arrays), len(dates)
+        meta = list()
+        for ts in arrays.values():
+            pos = np.searchsorted(dates, ts.dates)
+            if len(pos):
+                bounds = {"start": int(pos[0]), "stop": int(pos[-1]) + 1}
+            else:
+                bounds = {"start": 0, "stop": 0}
+            meta.append(ts.metadata() | bounds)
+        header = {"shape": [n, m], "keys": list(arrays), "meta": meta}
+        # The header size depends on the offsets, reserve room for them
+        header |= {"dates_offset": 0, "values_offset": 0}
+        size = len(json.dumps(header).encode()) + 64
+        header["dates_offset"] = _aligned(8 + size)
+        header["values_offset"] = _aligned(header["dates_offset"] + 8 * m)
+        encoded = json.dumps(header).encode()
+        shm = shared_memory.SharedMemory(
+            name=name,
+            create=True,
+            size=header["values_offset"] + 8 * n * m,
+        )
+        struct.pack_into("<Q", shm.buf, 0, len(encoded))
+        end = 8 + len(encoded)
+        shm.buf[8:end] = encoded
+        np.ndarray((m,), "datetime64[s]", shm.buf, header["dates_offset"])[:] = dates
+        values = np.ndarray((n, m), np.float64, shm.buf, header["values_offset"])
+        values[:] = np.nan
+        for i, ts in enumerate(arrays.values()):
+            values[i, np.searchsorted(dates, ts.dates)] = ts.values
+        del values
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name: str) -> "SharedDataset":
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            # Otherwise the tracker unlinks the block when this worker exits.
+            # It tracks the POSIX name, which `name` returns without the "/"
+            tracked = shm.name if shm.name.startswith("/") else "/" + shm.name
+            resource_tracker.unregister(tracked, "shared_memory")
+        return cls(shm, owner=False)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._rows
+
+    def __getitem__(self, key: str) -> ArrayTimeseries:
+        i = self._rows[key]
+        meta = dict(self.header["meta"][i])
+        start, stop = meta.pop("start"), meta.pop("stop")
+        values = self.values[i, start:stop]
+        dates = self.dates[start:stop]
+        self._views = [v for v in self._views if v() is not None]
+        self._views.extend((weakref.ref(values), weakref.ref(dates)))
+        return ArrayTimeseries(values=values, dates=dates, **meta)
+
+    def timeseries(self) -> dict[str, ArrayTimeseries]:
+        return {k: self[k] for k in self.keys}
+
+    def datasets(self) -> dict[str, TimeseriesDataset]:
+        return {k: TimeseriesDataset(self[k]) for k in self.keys}
+
+    def close(self):
+        # Views must be dropped before the buffer can be released
+        gc.collect()
+        alive = sum(v() is not None for v in self._views)
+        if alive:
+            raise BufferError(
+                f"{alive} arrays from this dataset are still referenced, drop the "
+                + "timeseries taken from it before closing"
+            )
+        self.values = self.dates = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
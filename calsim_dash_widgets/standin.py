@@ -0,0 +1,177 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import csrs
+import httpx
+import pandss as pdss
+
+from .clients import swap_http_client
+
+
+class StandInServer:
+    """A local stand-in for the CSRS server, serving runs and timeseries from
+    DSS files with injected latency and failures.
+
+    Use `client()` for a `csrs.RemoteClient` served in-process, `transport()`
+    to plug it into an `httpx.Client` directly, or `start()` to serve over HTTP
+    so `csrs.RemoteClient(server.url)` can talk to it.
+    """
+
+    def __init__(
+        self,
+        runs: list[tuple[csrs.Run, Path | str]],
+        paths: dict[str, str] | None = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: int | None = None,
+    ):
+        self.runs = [(run, Path(src)) for run, src in runs]
+        self.paths = paths or dict()  # CSRS path name -> DSS path
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.requests = 0
+        self.failures = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._dss_lock = threading.Lock()
+        self._timeseries: dict[tuple[str, str, str], bytes] = dict()
+        self._httpd: ThreadingHTTPServer | None = None
+        self._thread: threading.Thread | None = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.stop()
+
+    @property
+    def url(self) -> str:
+        if self._httpd is None:
+            raise RuntimeError("Stand-in server is not running")
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        if self._httpd is not None:
+            return self.url
+        self._httpd = ThreadingHTTPServer((host, port), _StandInHandler)
+        self._httpd.standin = self
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self.url
+
+    def stop(self):
+        if self._httpd is None:
+            return
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self._thread.join()
+        self._httpd = None
+        self._thread = None
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def client(self, url: str = "http://standin/") -> csrs.RemoteClient:
+        """A `csrs.RemoteClient` whose requests are answered by `handle`,
+        without a socket."""
+        remote = csrs.RemoteClient(url)
+
+        def mocked(old: httpx.Client) -> httpx.Client:
+            return httpx.Client(
+                base_url=old.base_url,
+                headers=old.headers,
+                transport=self.transport(),
+            )
+
+        if not swap_http_client(remote, mocked):
+            raise RuntimeError("No httpx.Client found on csrs.RemoteClient")
+        return remote
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.failure_rate
+            if fail:
+                self.failures += 1
+        if delay > 0:
+            time.sleep(delay)
+        if fail:
+            return httpx.Response(503, json={"detail": "injected failure"})
+        endpoint = request.url.path.strip("/").split("/")[-1]
+        params = dict(request.url.params)
+        if endpoint in ("runs", "run"):
+            return self._get_runs(params)
+        elif endpoint == "timeseries":
+            return self._get_timeseries(params)
+        return httpx.Response(404, json={"detail": f"Not found: {request.url.path}"})
+
+    def _get_runs(self, params: dict[str, str]) -> httpx.Response:
+        runs = list()
+        for run, _ in self.runs:
+            if params.get("scenario", run.scenario) != run.scenario:
+                continue
+            if params.get("version", run.version) != run.version:
+                continue
+            runs.append(run.model_dump(mode="json"))
+        return httpx.Response(200, json=runs)
+
+    def _get_timeseries(self, params: dict[str, str]) -> httpx.Response:
+        try:
+            key = (params["scenario"], params["version"], params["path"])
+        except KeyError as e:
+            return httpx.Response(422, json={"detail": f"Missing parameter: {e}"})
+        try:
+            content = self._read(*key)
+        except Exception as e:
+            return httpx.Response(404, json={"detail": str(e)})
+        return httpx.Response(
+            200,
+            content=content,
+            headers={"content-type": "application/json"},
+        )
+
+    def _read(self, scenario: str, version: str, path: str) -> bytes:
+        key = (scenario, version, path)
+        if key in self._timeseries:
+            return self._timeseries[key]
+        for run, src in self.runs:
+            if (run.scenario, run.version) == (scenario, version):
+                break
+        else:
+            raise LookupError(f"No run found: {scenario=}, {version=}")
+        dss_path = pdss.DatasetPath.from_str(self.paths.get(path, path))
+        with self._dss_lock:
+            with pdss.DSS(src) as dss:
+                rts = dss.read_rts(dss_path)
+        ts = csrs.Timeseries.from_pandss(scenario=scenario, version=version, rts=rts)
+        content = json.dumps(ts.model_dump(mode="json")).encode()
+        with self._lock:
+            self._timeseries[key] = content
+        return content
+
+
+class _StandInHandler(BaseHTTPRequestHandler):
+    server: ThreadingHTTPServer
+
+    def do_GET(self):
+        host, port = self.server.server_address[:2]
+        request = httpx.Request("GET", f"http://{host}:{port}{self.path}")
+        response = self.server.standin.handle(request)
+        body = response.content
+        self.send_response(response.status_code)
+        self.send_header("Content-Type", response.headers["content-type"])
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Keep load tests quiet
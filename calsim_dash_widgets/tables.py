@@ -0,0 +1,185 @@
+import re
+from typing import Callable
+
+import dash
+import pandas as pd
+from dash import MATCH, Input, Output, State, dash_table, html
+from dash.dash_table.Format import Format, Group, Scheme
+
+# Statistics by table name, and loaders for tables built later or elsewhere
+_TABLES: dict[str, pd.DataFrame] = dict()
+_LOADERS: dict[str, Callable[[], pd.DataFrame]] = dict()
+
+_OPERATORS = {
+    "ge": "ge",
+    ">=": "ge",
+    "le": "le",
+    "<=": "le",
+    "lt": "lt",
+    "<": "lt",
+    "gt": "gt",
+    ">": "gt",
+    "ne": "ne",
+    "!=": "ne",
+    "eq": "eq",
+    "=": "eq",
+    "contains": "contains",
+    "datestartswith": "datestartswith",
+}
+_FILTER = re.compile(
+    r"\{(?P<column>[^}]+)\}\s*"
+    r"(?P<op>s?(?:>=|<=|!=|ge|le|lt|gt|ne|eq|contains|datestartswith|<|>|=))\s*"
+    r"(?P<value>.*)"
+)
+
+
+def _id(name: str = MATCH) -> dict[str, str]:
+    return {"type": "cdw-summary-table", "name": name}
+
+
+def _parse_value(value: str, numeric: bool) -> str | float:
+    value = value.strip()
+    if len(value) > 1 and value[0] == value[-1] and value[0] in ("'", '"', "`"):
+        value = value[1:-1]
+    if numeric:
+        try:
+            return float(value)
+        except ValueError:
+            pass
+    return value
+
+
+def filter_frame(df: pd.DataFrame, query: str) -> pd.DataFrame:
+    """Apply a DataTable `filter_query` (clauses joined with "&&")."""
+    for clause in filter(None, (c.strip() for c in (query or "").split(" && "))):
+        match = _FILTER.match(clause)
+        if match is None or match["column"] not in df.columns:
+            continue
+        column = df[match["column"]]
+        op = _OPERATORS[match["op"].removeprefix("s")]
+        numeric = pd.api.types.is_numeric_dtype(column)
+        text_op = op in ("contains", "datestartswith")
+        value = _parse_value(match["value"], numeric and not text_op)
+        if op == "contains":
+            mask = column.astype(str).str.contains(value, case=False, regex=False)
+        elif op == "datestartswith":
+            mask = column.astype(str).str.startswith(value)
+        elif numeric and isinstance(value, str):
+            continue  # Not a number, can't compare with a numeric column
+        else:
+            mask = getattr(column, op)(value)
+        df = df.loc[mask]
+    return df
+
+
+def sort_frame(df: pd.DataFrame, sort_by: list[dict] | None) -> pd.DataFrame:
+    if not sort_by:
+        return df
+    return df.sort_values(
+        [s["column_id"] for s in sort_by],
+        ascending=[s["direction"] == "asc" for s in sort_by],
+        na_position="last",
+        kind="stable",
+    )
+
+
+def page_of(
+    df: pd.DataFrame,
+    page_current: int,
+    page_size: int,
+    sort_by: list[dict] | None = None,
+    filter_query: str = "",
+) -> tuple[list[dict], int]:
+    """The rows of one page after filtering and sorting, and the page count."""
+    df = sort_frame(filter_frame(df, filter_query), sort_by)
+    page_count = max(1, -(-len(df) // page_size))
+    # A new filter can leave fewer pages than the current one
+    start = min(page_current, page_count - 1) * page_size
+    stop = start + page_size
+    return df.iloc[start:stop].to_dict("records"), page_count
+
+
+def register(name: str, loader: Callable[[], pd.DataFrame]):
+    """Register how to load the statistics of the table `name`.
+
+    Call this at import, so a worker that never built the table (e.g. one
+    built inside a layout function by another worker) can still page it. The
+    loader runs at most once per process, on the table's first callback.
+    """
+    _LOADERS[name] = loader
+
+
+def _table(name: str) -> pd.DataFrame | None:
+    if name not in _TABLES and name in _LOADERS:
+        _TABLES[name] = _LOADERS[name]().reset_index(drop=True)
+    return _TABLES.get(name)
+
+
+class SummaryTable(html.Div):
+    """A table of precomputed statistics, e.g. from `aggregation.statistics`,
+    paged, sorted and filtered on the server so only visible rows are sent.
+
+    The statistics are kept under `name` in this process. When running
+    several workers, either build the table at import or app start, or
+    `register` a loader for `name` at import, so every worker can answer the
+    table's callbacks. The callbacks themselves are registered by `install`.
+    """
+
+    def __init__(
+        self,
+        statistics: pd.DataFrame,
+        name: str = "summary",
+        page_size: int = 25,
+        **kwargs,
+    ):
+        self.name = name
+        self.statistics = statistics.reset_index(drop=True)
+        _TABLES[name] = self.statistics
+        data, page_count = page_of(self.statistics, 0, page_size)
+        columns = list()
+        for col in self.statistics.columns:
+            if pd.api.types.is_numeric_dtype(self.statistics[col]):
+                fmt = Format(precision=0, scheme=Scheme.fixed, group=Group.yes)
+                columns.append(dict(name=col, id=col, type="numeric", format=fmt))
+            else:
+                columns.append(dict(name=col, id=col, type="text"))
+        table = dash_table.DataTable(
+            id=_id(name),
+            columns=columns,
+            data=data,
+            page_current=0,
+            page_size=page_size,
+            page_count=page_count,
+            page_action="custom",
+            sort_action="custom",
+            sort_mode="multi",
+            sort_by=[],
+            filter_action="custom",
+            filter_query="",
+            style_table=dict(overflowX="auto"),
+            style_cell=dict(fontSize="small", padding="2px 6px"),
+        )
+        super().__init__(children=[table], **kwargs)
+
+
+@dash.callback(
+    Output(_id(), "data"),
+    Output(_id(), "page_count"),
+    Input(_id(), "page_current"),
+    Input(_id(), "page_size"),
+    Input(_id(), "sort_by"),
+    Input(_id(), "filter_query"),
+    State(_id(), "id"),
+    prevent_initial_call=True,
+)
+def _update_page(
+    page_current: int,
+    page_size: int,
+    sort_by: list[dict],
+    filter_query: str,
+    table_id: dict,
+):
+    df = _table(table_id["name"])
+    if df is None:
+        raise dash.exceptions.PreventUpdate
+    return page_of(df, page_current or 0, page_size, sort_by, filter_query)
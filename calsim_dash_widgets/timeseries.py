@@ -1,12 +1,173 @@
-import csrs
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+import numpy as np
 import pandas as pd
 
+if TYPE_CHECKING:
+    import csrs
+
+
+class ArrayTimeseries:
+    """A `csrs.Timeseries` look-alike backed by NumPy arrays.
+
+    The arrays may be memory-mapped or shared, they are never copied.
+    """
+
+    def __init__(
+        self,
+        scenario: str,
+        version: str,
+        path: str,
+        values: np.ndarray,
+        dates: np.ndarray,
+        units: str,
+        period_type: str,
+        interval: str,
+    ):
+        self.scenario = scenario
+        self.version = version
+        self.path = path
+        self.values = values
+        self.dates = dates
+        self.units = units
+        self.period_type = period_type
+        self.interval = interval
+
+    @classmethod
+    def from_timeseries(cls, timeseries: csrs.Timeseries) -> "ArrayTimeseries":
+        if isinstance(timeseries, ArrayTimeseries):
+            return timeseries
+        return cls(
+            scenario=timeseries.scenario,
+            version=timeseries.version,
+            path=timeseries.path,
+            values=np.asarray(timeseries.values, dtype=np.float64),
+            dates=pd.to_datetime(list(timeseries.dates)).to_numpy("datetime64[s]"),
+            units=timeseries.units,
+            period_type=timeseries.period_type,
+            interval=timeseries.interval,
+        )
+
+    def metadata(self) -> dict[str, str]:
+        return {
+            "scenario": self.scenario,
+            "version": self.version,
+            "path": self.path,
+            "units": self.units,
+            "period_type": self.period_type,
+            "interval": self.interval,
+        }
+
+    def model_dump(self, exclude: tuple[str, ...] = ()) -> dict:
+        dumped = self.metadata() | {"values": self.values, "dates": self.dates}
+        return {k: v for k, v in dumped.items() if k not in exclude}
+
+    def to_frame(self) -> pd.DataFrame:
+        parts = self.path.split("/")
+        if len(parts) == 8:
+            header = dict(zip("ABCDEF", parts[1:7]))
+        else:
+            header = {"PATH": self.path}
+        header["UNITS"] = self.units
+        header["PERIOD_TYPE"] = self.period_type
+        header["INTERVAL"] = self.interval
+        columns = pd.MultiIndex.from_arrays(
+            [(v,) for v in header.values()],
+            names=list(header.keys()),
+        )
+        # Compact values are upcast so aggregations accumulate in float64
+        return pd.DataFrame(
+            np.asarray(self.values, dtype=np.float64),
+            index=pd.DatetimeIndex(self.dates),
+            columns=columns,
+        )
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.dates.nbytes
+
+
+class CompactTimeseries(ArrayTimeseries):
+    """An `ArrayTimeseries` holding float32 values and int32 month offsets.
+
+    Dates of monthly data are stored as months since 1970-01 plus one constant
+    offset from the start (or end) of the month, and rebuilt on access.
+    """
+
+    def __init__(
+        self,
+        scenario: str,
+        version: str,
+        path: str,
+        values: np.ndarray,
+        months: np.ndarray,
+        anchor: str,
+        delta: np.timedelta64,
+        units: str,
+        period_type: str,
+        interval: str,
+    ):
+        self.scenario = scenario
+        self.version = version
+        self.path = path
+        self.values = values
+        self.months = months
+        self.anchor = anchor
+        self.delta = delta
+        self.units = units
+        self.period_type = period_type
+        self.interval = interval
+
+    @classmethod
+    def from_timeseries(
+        cls,
+        timeseries: csrs.Timeseries | ArrayTimeseries,
+    ) -> ArrayTimeseries:
+        if isinstance(timeseries, CompactTimeseries):
+            return timeseries
+        ts = ArrayTimeseries.from_timeseries(timeseries)
+        values = np.asarray(ts.values, dtype=np.float32)
+        dates = np.asarray(ts.dates, dtype="datetime64[s]")
+        months = dates.astype("datetime64[M]")
+        for anchor, base in (("start", months), ("end", months + 1)):
+            offsets = dates - base.astype("datetime64[s]")
+            if len(offsets) and bool(np.all(offsets == offsets[0])):
+                return cls(
+                    months=months.astype(np.int64).astype(np.int32),
+                    anchor=anchor,
+                    delta=offsets[0],
+                    values=values,
+                    **ts.metadata(),
+                )
+        # Not monthly, only the values can be compacted
+        return ArrayTimeseries(values=values, dates=dates, **ts.metadata())
+
+    @property
+    def dates(self) -> np.ndarray:
+        base = self.months.astype("datetime64[M]")
+        if self.anchor == "end":
+            base = base + 1
+        return base.astype("datetime64[s]") + self.delta
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.months.nbytes
+
 
 class TimeseriesDataset:
-    def __init__(self, timeseries: csrs.Timeseries):
-        self.timeseries = timeseries
+    def __init__(
+        self,
+        timeseries: csrs.Timeseries | ArrayTimeseries,
+        compact: bool = False,
+    ):
+        self.compact = compact
+        self.set_timeseries(timeseries)
 
-    def set_timeseries(self, new: csrs.Timeseries):
+    def set_timeseries(self, new: csrs.Timeseries | ArrayTimeseries):
+        if self.compact:
+            new = CompactTimeseries.from_timeseries(new)
         self.timeseries = new
 
     def filter_to_value(self, action, **kwargs) -> float:
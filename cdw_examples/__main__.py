@@ -12,7 +12,7 @@ import calsim_dash_widgets as cdw
 from . import data
 
 
-class CustomDash(dash.Dash):
+class CustomDash(cdw.app.WidgetDash):
     @property
     def timeseries(self) -> dict[str, dict[str, csrs.Timeseries]]:
         return data.timeseries
@@ -52,6 +52,8 @@ def main_old():
 def main():
     app = CustomDash(
         __name__,
+        data_version=data.version,
+        cache_pages=("/", "/cards", "/alerts", "/summary", "/plots"),
         title="CS3 Widgets",
         use_pages=True,
         suppress_callback_exceptions=True,
@@ -60,9 +62,17 @@ def main():
             dbc.icons.BOOTSTRAP,
         ],
     )
+    cdw.memory.budget.add_data("examples.timeseries", data.timeseries)
+    cdw.memory.budget.add_app("examples.responses", app)
+    cdw.memory.budget.add_cache("examples.versioned", data.versioned)
+    data.prefetcher.start()
     links_to_make = {
         "Cards": "/cards",
         "Alerts": "/alerts",
+        "Summary": "/summary",
+        "Plots": "/plots",
+        "Published": "/published",
+        "Health": "/health",
     }
     links = dbc.Row(
         [
@@ -1,9 +1,19 @@
+import os
+
 import csrs
 
+from calsim_dash_widgets.cache import VersionedCache
+from calsim_dash_widgets.clients import get_client
+from calsim_dash_widgets.prefetch import Prefetcher
+from calsim_dash_widgets.shared import SharedDataset
 from calsim_dash_widgets.timeseries import TimeseriesDataset
 
-url = "https://calsim-scenario-results-server.azurewebsites.net/"
-client = csrs.RemoteClient(url)
+# Point CDW_CSRS_URL at a calsim_dash_widgets.standin.StandInServer to run offline
+url = os.environ.get(
+    "CDW_CSRS_URL",
+    "https://calsim-scenario-results-server.azurewebsites.net/",
+)
+client = get_client(url)
 # Load data
 runs = {
     "hist": client.get_run(scenario="Historical (Danube)")[0],
@@ -12,33 +22,63 @@ runs = {
     "cc75": client.get_run(scenario="CC LOC 75% (Danube)")[0],
     "cc95": client.get_run(scenario="CC LOC 95% (Danube)")[0],
 }
-timeseries = {
-    k: {
-        "shasta_storage": client.get_timeseries(
-            scenario=r.scenario,
-            version=r.version,
-            path="shasta_storage",
-        ),
-        "oroville_storage": client.get_timeseries(
-            scenario=r.scenario,
-            version=r.version,
-            path="oroville_storage",
-        ),
-        "banks_exports": client.get_timeseries(
-            scenario=r.scenario,
-            version=r.version,
-            path="banks_exports",
-        ),
-        "jones_exports": client.get_timeseries(
-            scenario=r.scenario,
-            version=r.version,
-            path="jones_exports",
-        ),
+# Fetched on demand by pages, and warmed in the background by the prefetcher
+versioned = VersionedCache(client)
+prefetcher = Prefetcher(versioned)
+
+
+def fetch_timeseries() -> dict[str, dict[str, csrs.Timeseries]]:
+    return {
+        k: {
+            "shasta_storage": client.get_timeseries(
+                scenario=r.scenario,
+                version=r.version,
+                path="shasta_storage",
+            ),
+            "oroville_storage": client.get_timeseries(
+                scenario=r.scenario,
+                version=r.version,
+                path="oroville_storage",
+            ),
+            "banks_exports": client.get_timeseries(
+                scenario=r.scenario,
+                version=r.version,
+                path="banks_exports",
+            ),
+            "jones_exports": client.get_timeseries(
+                scenario=r.scenario,
+                version=r.version,
+                path="jones_exports",
+            ),
+        }
+        for k, r in runs.items()
     }
-    for k, r in runs.items()
-}
+
+
+def share() -> SharedDataset:
+    # Run once in a preload step, then start workers with CDW_SHARED_DATASET set
+    # to the returned dataset's name
+    flat = dict()
+    for run, grp in fetch_timeseries().items():
+        for name, ts in grp.items():
+            flat[f"{run}/{name}"] = ts
+    return SharedDataset.create(flat)
+
+
+if "CDW_SHARED_DATASET" in os.environ:
+    shared = SharedDataset.attach(os.environ["CDW_SHARED_DATASET"])
+    timeseries = dict()
+    for key, ts in shared.timeseries().items():
+        run, name = key.split("/", 1)
+        timeseries.setdefault(run, dict())[name] = ts
+else:
+    timeseries = fetch_timeseries()
 datasets = dict()
 for run, grp in timeseries.items():
     datasets[run] = dict()
     for name, ts in grp.items():
         datasets[run][name] = TimeseriesDataset(ts)
+
+
+def version() -> str:
+    return "|".join(f"{r.scenario}:{r.version}" for r in runs.values())
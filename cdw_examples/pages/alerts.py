@@ -16,21 +16,27 @@ def make_small_alert_grid(obs_run: str, exp_run: str):
         "banks_exports": "Banks Exports",
         "jones_exports": "Jones Exports",
     }
-    small_to_make = {
-        "Mean": cdw.alerts.TinyMeanAlert,
-        "Max": cdw.alerts.TinyMaxAlert,
-        "Min": cdw.alerts.TinyMinAlert,
+    filters = {
+        "Mean": cdw.aggregation.mean,
+        "Max": cdw.aggregation.max,
+        "Min": cdw.aggregation.min,
     }
+    # Evaluate the whole grid at once, then lay it out row by row
+    batch = list()
     for v, n in vars.items():
-        row = []
-        for kind, factory in small_to_make.items():
-            row.append(
-                factory(
-                    observed=app.datasets[obs_run][v],
-                    expected=app.datasets[exp_run][v],
-                    children=f"{kind} {n}",
+        for kind, func in filters.items():
+            batch.append(
+                (
+                    app.datasets[obs_run][v],
+                    app.datasets[exp_run][v],
+                    func,
+                    dict(children=f"{kind} {n}"),
                 )
             )
+    badges = cdw.alerts.TinyAlert.batch(batch)
+    for i in range(0, len(badges), len(filters)):
+        stop = i + len(filters)
+        row = badges[i:stop]
         grid.append(dbc.Row(dbc.Col(row, width="auto")))
 
     return dbc.Col(grid, width="auto")
@@ -77,12 +83,42 @@ def make_storage_alerts():
     return alerts
 
 
+THRESHOLD_RULES = [
+    cdw.alerts.ThresholdRule(
+        "shasta_storage", 1_200, "below", name="Shasta below 1,200 TAF"
+    ),
+    cdw.alerts.ThresholdRule(
+        "oroville_storage", 1_000, "below", months=(9,), name="Oroville EOS < 1 MAF"
+    ),
+    cdw.alerts.ThresholdRule(
+        "banks_exports", 10_300, "above", name="Banks above 10,300 CFS"
+    ),
+]
+
+
+def make_threshold_alerts():
+    alerts = list()
+    for run_name, (o, e) in {
+        "Adjusted Historical Hydrology": ("adj", "hist"),
+        "Climate Change Level of Concern 95%": ("cc95", "hist"),
+    }.items():
+        badges = cdw.alerts.ThresholdAlert.batch(
+            THRESHOLD_RULES,
+            app.timeseries[o],
+            app.timeseries[e],
+        )
+        alerts.append(html.H6(run_name, className="pt-3 pb-1"))
+        alerts.append(dbc.Row(dbc.Col(badges, width="auto")))
+    return alerts
+
+
 def layout(**kwargs):
     small_alerts = make_multiple_small_alert_grids()
     storage_alerts = make_storage_alerts()
     alerts = {
         "Small Alerts": dbc.Col(small_alerts),
         "Storage Alerts": storage_alerts,
+        "Threshold Alerts": make_threshold_alerts(),
     }
     details = {
         "Small Alerts": "These alerts just show whether or not a certain "
@@ -90,6 +126,8 @@ def layout(**kwargs):
         + "yourself.",
         "Storage Alerts": "These alerts are designed to look at the values we care "
         + "about when looking at Storage values.",
+        "Threshold Alerts": "These alerts count the months (or years) a variable "
+        + "crosses a threshold, observed vs expected.",
     }
     sections = list()
     for name, section in alerts.items():
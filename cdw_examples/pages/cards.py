@@ -1,14 +1,19 @@
 import dash
 import dash_bootstrap_components as dbc
-from dash import html
+from dash import Input, dcc, html
 
 import calsim_dash_widgets as cdw
 
 dash.register_page(__name__, path="/cards")
 app = dash.get_app()
+# Baseline results are kept between page loads, only alternatives are recomputed
+engine = cdw.compare.ComparisonEngine()
+BASE = "hist"
 
 
 def layout(**kwargs):
+    # Series shared by several cards are sent to the browser once
+    store = cdw.series_store.SeriesStore()
     cards = {
         "Single Data Point": [
             cdw.cards.StorageCard(app.timeseries["hist"]["shasta_storage"]),
@@ -22,33 +27,72 @@ def layout(**kwargs):
             ),
         ],
         "Sparklines": [
-            cdw.cards.SparklineCard(app.timeseries["hist"]["banks_exports"]),
+            cdw.cards.SparklineCard(
+                app.timeseries["hist"]["banks_exports"],
+                store=store,
+            ),
             cdw.cards.SparklineMonthlyAverageCard(
                 app.timeseries["adj"]["jones_exports"],
                 header="Jones Exports",
+                store=store,
+            ),
+            cdw.cards.SparklineCard(
+                app.timeseries["cc50"]["banks_exports"],
+                header="Banks Exports (SVG)",
+                renderer="svg",
             ),
         ],
         "Comparative Single Data Point": [
             cdw.cards.CompareStorageCard(
                 app.timeseries["hist"]["shasta_storage"],
                 app.timeseries["cc95"]["shasta_storage"],
+                engine=engine,
             ),
             cdw.cards.CompareStorageCard(
                 app.timeseries["hist"]["oroville_storage"],
                 app.timeseries["adj"]["oroville_storage"],
                 header="Oroville",
                 kind="eos_max",
+                engine=engine,
             ),
         ],
         "Comparative Sparklines": [
             cdw.cards.ComparativeSparklineCard(
                 app.timeseries["hist"]["jones_exports"],
                 app.timeseries["cc95"]["jones_exports"],
+                store=store,
             ),
             cdw.cards.ComparativeSparklineMonthlyAverageCard(
                 app.timeseries["hist"]["banks_exports"],
                 app.timeseries["cc95"]["banks_exports"],
                 header="Banks Exports (Monthly Average)",
+                store=store,
+            ),
+        ],
+        "Switch Alternative": [
+            dcc.Dropdown(
+                [k for k in app.timeseries if k != BASE],
+                "cc95",
+                id="cards-alternative",
+                clearable=False,
+                style=dict(width="10rem"),
+            ),
+            cdw.cards.CompareStorageCard(
+                app.timeseries[BASE]["shasta_storage"],
+                app.timeseries["cc95"]["shasta_storage"],
+                engine=engine,
+                name="switch-shasta",
+            ),
+            cdw.cards.ComparativeSparklineCard(
+                app.timeseries[BASE]["banks_exports"],
+                app.timeseries["cc95"]["banks_exports"],
+                name="switch-banks",
+            ),
+        ],
+        "Ensembles": [
+            cdw.cards.FanChartCard(
+                [grp["shasta_storage"] for grp in app.timeseries.values()],
+                header="Shasta Storage",
             ),
         ],
     }
@@ -57,6 +101,8 @@ def layout(**kwargs):
         "Sparklines": "Show the temporal pattern on a timeseries",
         "Comparative Single Data Point": "Compare two similar timeseries",
         "Comparative Sparklines": "Compare the temporal patterns of two timeseries",
+        "Switch Alternative": "Update cards in place when the selection changes",
+        "Ensembles": "Show the spread of many runs as percentile bands",
     }
     sections = list()
     for name, section in cards.items():
@@ -82,5 +128,31 @@ def layout(**kwargs):
                 + "comparative content of a timeseries."
             ),
             dbc.Stack(sections, gap=12),
+            store,
         ]
     )
+
+
+@dash.callback(
+    output=dict(
+        shasta=cdw.cards.CompareStorageCard.outputs("switch-shasta"),
+        banks=cdw.cards.ComparativeSparklineCard.outputs("switch-banks"),
+    ),
+    inputs=dict(alt=Input("cards-alternative", "value")),
+    prevent_initial_call=True,
+)
+def switch_alternative(alt: str):
+    # Only the changed numbers, icons, and trace data are sent, not a new layout
+    base = app.timeseries[BASE]
+    return dict(
+        shasta=cdw.cards.CompareStorageCard.patch(
+            base["shasta_storage"],
+            app.timeseries[alt]["shasta_storage"],
+            engine=engine,
+        ),
+        banks=cdw.cards.ComparativeSparklineCard.patch(
+            base["banks_exports"],
+            app.timeseries[alt]["banks_exports"],
+            base_changed=False,
+        ),
+    )
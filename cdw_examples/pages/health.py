@@ -0,0 +1,38 @@
+import dash
+import dash_bootstrap_components as dbc
+from dash import html
+
+import calsim_dash_widgets as cdw
+
+from .. import data
+
+dash.register_page(__name__, path="/health")
+
+
+def layout(run: str = "adj", **kwargs):
+    if run not in data.runs:
+        run = "adj"
+    board = cdw.alerts.StudyHealthBoard(
+        data.runs[run],
+        data.runs["hist"],
+        cache=data.versioned,
+    )
+    # The other runs' boards are likely next, warm the cache while reading
+    others = [r for name, r in data.runs.items() if name not in (run, "hist")]
+    cdw.alerts.StudyHealthBoard.prefetch(data.prefetcher, *others)
+    links = [
+        dbc.NavLink(name, href=f"/health?run={name}", active=name == run)
+        for name in data.runs
+        if name != "hist"
+    ]
+    return html.Div(
+        [
+            html.H2("Study Health"),
+            html.P(
+                "Each run against the historical run. The other runs are "
+                + "prefetched in the background, so switching between them is fast."
+            ),
+            dbc.Nav(links, pills=True, class_name="pb-3"),
+            board,
+        ]
+    )
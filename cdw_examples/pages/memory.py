@@ -0,0 +1,26 @@
+import dash
+from dash import Input, Output, dcc, html
+
+import calsim_dash_widgets as cdw
+
+dash.register_page(__name__, path="/debug/memory")
+
+
+def layout(**kwargs):
+    # Filled by a callback, so the report refreshes without a page reload
+    return html.Div(
+        [
+            html.H2("Memory"),
+            html.P("Bytes held by loaded data and caches, largest first"),
+            dcc.Interval(id="cdw-memory-interval", interval=10_000),
+            html.Div(id="cdw-memory-report"),
+        ]
+    )
+
+
+@dash.callback(
+    Output("cdw-memory-report", "children"),
+    Input("cdw-memory-interval", "n_intervals"),
+)
+def _update_report(_):
+    return cdw.memory.budget.table()
@@ -0,0 +1,34 @@
+import dash
+import dash_bootstrap_components as dbc
+from dash import html
+
+import calsim_dash_widgets as cdw
+
+dash.register_page(__name__, path="/plots")
+app = dash.get_app()
+BASE = "hist"
+
+
+def layout(**kwargs):
+    heatmaps = [
+        dbc.Col(
+            cdw.plots.DifferenceHeatmapPlot(
+                app.timeseries[BASE]["shasta_storage"],
+                app.timeseries[alt]["shasta_storage"],
+                header="Shasta Storage",
+            ),
+            md=6,
+        )
+        for alt in ("adj", "cc95")
+    ]
+    return html.Div(
+        [
+            html.H1("Plot Examples"),
+            html.H2("Difference Heatmaps"),
+            html.P(
+                "The difference of an alternative from the base run, by water year "
+                + "and month."
+            ),
+            dbc.Row(heatmaps),
+        ]
+    )
@@ -0,0 +1,40 @@
+import os
+
+import dash
+from dash import html
+
+import calsim_dash_widgets as cdw
+
+from .. import data
+
+dash.register_page(__name__, path="/published")
+PAGES = {
+    "published": cdw.prerender.PageSpec(
+        widgets=["cards.StorageCard"],
+        paths=["shasta_storage", "oroville_storage"],
+        runs=[("hist",), ("adj",), ("cc95",)],
+    ),
+}
+# Fill the store ahead of time with
+#   cdw.prerender.prerender(PAGES, data.runs).save("published.json")
+# and point CDW_PRERENDERED at the file, otherwise widgets are rendered on their
+# first request and served from the store after that
+layouts = cdw.prerender.PrerenderedLayouts(PAGES)
+if "CDW_PRERENDERED" in os.environ:
+    layouts.load(os.environ["CDW_PRERENDERED"])
+cards = layouts.layout(
+    "published",
+    runs=data.runs,
+    client=data.client,
+    className="d-flex flex-wrap",
+)
+
+
+def layout(**kwargs):
+    return html.Div(
+        [
+            html.H2("Published"),
+            html.P("Fixed cards served from prerendered layouts"),
+            cards(**kwargs),
+        ]
+    )
@@ -0,0 +1,25 @@
+import dash
+from dash import html
+
+import calsim_dash_widgets as cdw
+
+dash.register_page(__name__, path="/summary")
+app = dash.get_app()
+
+# Built once at import, so every worker can serve the table's pages
+table = cdw.tables.SummaryTable(
+    cdw.aggregation.statistics(
+        [ts for grp in app.timeseries.values() for ts in grp.values()]
+    ),
+    name="summary",
+)
+
+
+def layout(**kwargs):
+    return html.Div(
+        [
+            html.H2("Summary Table"),
+            html.P("Statistics of every run and path, paged on the server"),
+            table,
+        ]
+    )
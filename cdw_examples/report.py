@@ -0,0 +1,75 @@
+"""Write a static study health report for many run pairs, without a Dash server.
+
+Run it as a module from the repository root:
+
+    python -m cdw_examples.report --pair "CC LOC 50% (Danube)" "Historical (Danube)"
+
+Runs are given as "scenario" (latest version) or "scenario@version".
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import csrs
+
+from calsim_dash_widgets import cache, clients, disk, report
+
+
+def get_run(client: csrs.clients.Client, name: str) -> csrs.Run:
+    scenario, _, version = name.partition("@")
+    kwargs = {"scenario": scenario} | ({"version": version} if version else {})
+    runs = client.get_run(**kwargs)
+    if not runs:
+        raise SystemExit(f"No run found for {name!r}")
+    return runs[0]
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--pair",
+        nargs=2,
+        action="append",
+        required=True,
+        metavar=("OBSERVED", "EXPECTED"),
+    )
+    parser.add_argument("--spec", type=Path, help="Board spec JSON, see load_spec")
+    parser.add_argument("--out", type=Path, default=Path("report"))
+    parser.add_argument("--cache-dir", type=Path, help="Persist fetched timeseries")
+    parser.add_argument("--url", default=clients.CSRS_URL)
+    parser.add_argument("--allowable-diff-perc", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        help="Exit with 1 if any alert is not successful",
+    )
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+
+    client = clients.get_client(args.url)
+    store = disk.DiskTimeseriesStore(args.cache_dir) if args.cache_dir else None
+    versioned = cache.VersionedCache(client, disk=store)
+    pairs = [(get_run(client, o), get_run(client, e)) for o, e in args.pair]
+    spec = report.load_spec(args.spec) if args.spec else None
+
+    result = report.generate(
+        pairs,
+        spec=spec,
+        versioned=versioned,
+        allowable_diff_perc=args.allowable_diff_perc,
+        max_workers=args.workers,
+    )
+    args.out.mkdir(parents=True, exist_ok=True)
+    result.to_json(args.out / "report.json")
+    result.to_html(args.out / "report.html")
+    print(f"Wrote {args.out.resolve()}: {result.counts()}")
+    if args.strict and set(result.counts()) - {"success"}:
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,158 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from calsim_dash_widgets import aggregation
+from calsim_dash_widgets.timeseries import ArrayTimeseries, CompactTimeseries
+
+
+def make_ts(values, path: str = "p", dates: pd.DatetimeIndex | None = None):
+    values = np.asarray(values, dtype=np.float64)
+    if dates is None:
+        # End of month stamps, like CalSim output
+        dates = pd.date_range("1921-10-31 23:59:59", periods=len(values), freq="ME")
+    return ArrayTimeseries(
+        scenario="s",
+        version="1",
+        path=path,
+        values=values,
+        dates=dates.to_numpy("datetime64[s]"),
+        units="TAF",
+        period_type="PER-AVER",
+        interval="1MON",
+    )
+
+
+def pandas_rolling_mean(values, window: int) -> np.ndarray:
+    return pd.Series(values, dtype=np.float64).rolling(window).mean().to_numpy()
+
+
+def pandas_longest_run(mask) -> int:
+    s = pd.Series(mask, dtype=bool)
+    if not s.any():
+        return 0
+    runs = (~s).cumsum()[s]
+    return int(runs.value_counts().max())
+
+
+def pandas_threshold_count(ts, threshold: float, above: bool, months) -> int:
+    s = ts.to_frame().iloc[:, 0]
+    beyond = s > threshold if above else s < threshold
+    return int((beyond & s.index.month.isin(months)).sum())
+
+
+rng = np.random.default_rng(42)
+SERIES = {
+    "random": rng.normal(100, 30, 240),
+    "nans": np.where(rng.random(240) < 0.05, np.nan, rng.normal(100, 30, 240)),
+    "all_nan": np.full(120, np.nan),
+    "short": rng.normal(100, 30, 20),
+    "single": np.array([5.0]),
+    "all_high": np.full(60, 200.0),
+    "all_low": np.full(60, 10.0),
+}
+
+
+@pytest.mark.parametrize("name", SERIES)
+@pytest.mark.parametrize("window", [1, 3, 36])
+def test_rolling_mean_2d(name: str, window: int):
+    values = SERIES[name]
+    first = window - 1  # Pandas pads the incomplete leading windows
+    expected = pandas_rolling_mean(values, window)[first:]
+    got = aggregation.rolling_mean_2d(values, window)
+    assert got.shape == (1, max(0, len(values) - window + 1))
+    np.testing.assert_allclose(got[0], expected, equal_nan=True)
+
+
+@pytest.mark.parametrize("name", SERIES)
+def test_longest_run_2d(name: str):
+    with np.errstate(invalid="ignore"):
+        for mask in (SERIES[name] < 100, SERIES[name] > 100):
+            expected = pandas_longest_run(mask)
+            assert aggregation.longest_run_2d(mask)[0] == expected
+
+
+def test_longest_run_2d_edges():
+    masks = np.array([[True] * 5, [False] * 5, [True, False, True, True, False]])
+    np.testing.assert_array_equal(aggregation.longest_run_2d(masks), [5, 0, 2])
+    assert aggregation.longest_run_2d(np.zeros((2, 0), dtype=bool)).tolist() == [0, 0]
+
+
+@pytest.mark.parametrize("name", SERIES)
+def test_min_rolling_means(name: str):
+    ts = make_ts(SERIES[name])
+    for func, window in (
+        (aggregation.min_3yr_mean, 36),
+        (aggregation.min_6yr_mean, 72),
+    ):
+        expected = pd.Series(SERIES[name]).rolling(window).mean().min()
+        np.testing.assert_allclose(func(ts), expected, equal_nan=True)
+
+
+def test_reduce_many_matches_scalar():
+    # Mixed lengths, so several 2-D blocks are reduced
+    timeseries = [make_ts(v, path=k) for k, v in SERIES.items()]
+    with np.errstate(invalid="ignore"):
+        for func in aggregation.VECTORIZED:
+            expected = [func(ts) for ts in timeseries]
+            got = aggregation.reduce_many(timeseries, func)
+            np.testing.assert_allclose(got, expected, equal_nan=True, err_msg=func)
+
+
+@pytest.mark.parametrize(
+    "func",
+    [aggregation.longest_run_below, aggregation.longest_run_above],
+)
+def test_reduce_many_forwards_kwargs(func):
+    timeseries = [make_ts(v, path=k) for k, v in SERIES.items()]
+    expected = [func(ts, threshold=100.0) for ts in timeseries]
+    got = aggregation.reduce_many(timeseries, func, threshold=100.0)
+    np.testing.assert_array_equal(got, expected)
+
+
+@pytest.mark.parametrize(
+    "start, freq",
+    [("1921-10-31 23:59:59", "ME"), ("1921-10-01", "MS"), ("1921-10-31", "ME")],
+)
+def test_eos_months_agree(start: str, freq: str):
+    # reduce_many picks EOS values with months_of, the scalar functions with the
+    # month of the frame's index
+    dates = pd.date_range(start, periods=48, freq=freq)
+    ts = make_ts(SERIES["random"][:48], dates=dates)
+    for candidate in (ts, CompactTimeseries.from_timeseries(ts)):
+        np.testing.assert_array_equal(
+            aggregation.months_of(candidate),
+            candidate.to_frame().index.month,
+        )
+        for func in (aggregation.eos_mean, aggregation.eos_min, aggregation.eos_max):
+            np.testing.assert_allclose(
+                aggregation.reduce_many([candidate], func)[0],
+                func(candidate),
+                rtol=1e-6,
+            )
+
+
+def test_threshold_counts_matches_scalar():
+    timeseries = [make_ts(v, path=k) for k, v in SERIES.items()]
+    rules = [
+        (row, threshold, above, months)
+        for row in range(len(timeseries))
+        for threshold in (50.0, 100.0, 150.0)
+        for above in (True, False)
+        for months in ((9,), tuple(range(1, 13)), (1, 2, 3))
+    ]
+    month_mask = np.zeros((len(rules), 12), dtype=bool)
+    for i, (*_, months) in enumerate(rules):
+        month_mask[i, np.asarray(months) - 1] = True
+    got = aggregation.threshold_counts(
+        timeseries,
+        rows=[r[0] for r in rules],
+        thresholds=[r[1] for r in rules],
+        above=[r[2] for r in rules],
+        months=month_mask,
+    )
+    expected = [
+        pandas_threshold_count(timeseries[row], threshold, above, months)
+        for row, threshold, above, months in rules
+    ]
+    np.testing.assert_array_equal(got, expected)
@@ -0,0 +1,52 @@
+import numpy as np
+
+from calsim_dash_widgets import aggregation, alerts
+from calsim_dash_widgets.timeseries import ArrayTimeseries, TimeseriesDataset
+
+
+def make_dataset(scale: float) -> TimeseriesDataset:
+    return TimeseriesDataset(
+        ArrayTimeseries(
+            scenario="s",
+            version="1",
+            path="/CALSIM/S_SHSTA/STORAGE//1MON/L2020A/",
+            values=np.arange(24, dtype=np.float64) * scale,
+            dates=np.arange("2000-01", "2002-01", dtype="datetime64[M]").astype(
+                "datetime64[s]"
+            ),
+            units="TAF",
+            period_type="PER-AVER",
+            interval="1MON",
+        )
+    )
+
+
+class CustomAlert(alerts.TinyAlert):
+    pass
+
+
+def test_batch_matches_single_alerts():
+    o, e = make_dataset(1.0), make_dataset(1.5)
+    entries = [
+        (o, e, aggregation.mean),
+        (o, o, aggregation.max, dict(children="Max")),
+        dict(
+            observed=o,
+            expected=e,
+            filter=aggregation.longest_run_above,
+            filter_kwargs=dict(threshold=10.0),
+        ),
+    ]
+    badges = alerts.TinyAlert.batch(entries)
+    assert [b.color for b in badges] == ["danger", "success", "danger"]
+    assert badges[1].children == "Max"
+    single = alerts.TinyAlert(
+        o, e, aggregation.longest_run_above, filter_kwargs=dict(threshold=10.0)
+    )
+    assert single.result.observed == badges[2].result.observed
+
+
+def test_batch_builds_subclass():
+    o, e = make_dataset(1.0), make_dataset(1.0)
+    badges = CustomAlert.batch([(o, e, aggregation.mean)])
+    assert type(badges[0]) is CustomAlert
@@ -0,0 +1,114 @@
+import json
+
+import pytest
+from dash import Input, Output, dcc, html
+
+from calsim_dash_widgets.app import WidgetDash
+
+
+class Version:
+    def __init__(self):
+        self.value = "1"
+
+    def __call__(self) -> str:
+        return self.value
+
+
+@pytest.fixture
+def version() -> Version:
+    return Version()
+
+
+@pytest.fixture
+def widget_app(version: Version):
+    app = WidgetDash(
+        __name__,
+        data_version=version,
+        cache_pages=("/", "/cached"),
+        compress=False,
+    )
+    app.layout = html.Div(
+        [dcc.Location(id="_pages_location"), html.Div(id="_pages_content")]
+    )
+    app.renders = list()
+
+    @app.callback(
+        Output("_pages_content", "children"),
+        Input("_pages_location", "pathname"),
+        Input("_pages_location", "search"),
+    )
+    def render(pathname, search):
+        app.renders.append(pathname)
+        return f"{pathname} #{len(app.renders)}"
+
+    return app
+
+
+def update(client, pathname: str, search: str = ""):
+    body = {
+        "output": "_pages_content.children",
+        "outputs": {"id": "_pages_content", "property": "children"},
+        "inputs": [
+            {"id": "_pages_location", "property": "pathname", "value": pathname},
+            {"id": "_pages_location", "property": "search", "value": search},
+        ],
+        "changedPropIds": ["_pages_location.pathname"],
+    }
+    return client.post(
+        "/_dash-update-component",
+        data=json.dumps(body),
+        content_type="application/json",
+    )
+
+
+def test_matching_etag_is_not_modified(widget_app: WidgetDash):
+    client = widget_app.server.test_client()
+    first = client.get("/")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    second = client.get("/", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["ETag"] == etag
+
+
+def test_new_data_version_is_a_miss(widget_app: WidgetDash, version: Version):
+    client = widget_app.server.test_client()
+    etag = client.get("/").headers["ETag"]
+    version.value = "2"
+    response = client.get("/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_uncached_page_has_no_etag(widget_app: WidgetDash):
+    client = widget_app.server.test_client()
+    client.get("/")
+    response = client.get("/other")
+    assert "ETag" not in response.headers
+
+
+def test_post_is_keyed_on_body(widget_app: WidgetDash, version: Version):
+    client = widget_app.server.test_client()
+    first = update(client, "/cached")
+    assert update(client, "/cached").get_data() == first.get_data()
+    assert widget_app.renders == ["/cached"]
+    # A different query string is a different body, so a different entry
+    update(client, "/cached", search="?run=adj")
+    assert len(widget_app.renders) == 2
+    version.value = "2"
+    update(client, "/cached")
+    assert len(widget_app.renders) == 3
+
+
+def test_post_for_uncached_page_is_not_cached(widget_app: WidgetDash):
+    client = widget_app.server.test_client()
+    update(client, "/other")
+    update(client, "/other")
+    assert widget_app.renders == ["/other", "/other"]
+
+
+def test_nothing_cached_without_data_version():
+    app = WidgetDash(__name__, cache_pages=("/",), compress=False)
+    app.layout = html.Div()
+    response = app.server.test_client().get("/")
+    assert "ETag" not in response.headers
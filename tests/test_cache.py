@@ -0,0 +1,71 @@
+import threading
+from types import SimpleNamespace
+
+import numpy as np
+
+from calsim_dash_widgets import cache
+
+
+class Run(SimpleNamespace):
+    def model_dump(self, mode: str = "json") -> dict:
+        return dict(vars(self))
+
+
+class Client:
+    def __init__(self):
+        self.detail = "first"
+
+    def get_run(self, scenario: str, version: str) -> list:
+        return [Run(scenario=scenario, version=version, detail=self.detail)]
+
+
+def key(path: str) -> cache.ArtifactKey:
+    return cache.ArtifactKey("s", "1", path, kind="frame")
+
+
+def test_eviction_is_least_recently_used():
+    versioned = cache.VersionedCache(Client())
+    for path in ("a", "b", "c"):
+        versioned.put(key(path), np.zeros(10))
+    versioned.get(key("a"))
+    freed = versioned.evict_bytes(1, kind="frame")
+    assert freed == 80
+    assert key("a") in versioned
+    assert key("b") not in versioned
+    assert key("c") in versioned
+
+
+def test_load_finishing_after_refresh_is_not_stored():
+    client = Client()
+    versioned = cache.VersionedCache(client)
+    versioned.track("s", "1")
+    started = threading.Event()
+    release = threading.Event()
+
+    def load():
+        started.set()
+        release.wait(timeout=5)
+        return "stale"
+
+    thread = threading.Thread(
+        target=versioned.get_or_compute,
+        args=(key("a"), load),
+    )
+    thread.start()
+    assert started.wait(timeout=5)
+    client.detail = "second"
+    assert versioned.refresh() == [("s", "1")]
+    release.set()
+    thread.join()
+    assert key("a") not in versioned
+    assert versioned.get_or_compute(key("a"), lambda: "fresh") == "fresh"
+    assert versioned.get(key("a")) == "fresh"
+
+
+def test_evict_run_drops_only_that_run():
+    versioned = cache.VersionedCache(Client())
+    versioned.put(key("a"), 1)
+    versioned.put(cache.ArtifactKey("s", "2", "a"), 2)
+    assert versioned.evict_run("s", "1") == 1
+    assert len(versioned) == 1
+    assert versioned.nbytes() == versioned.nbytes("timeseries")
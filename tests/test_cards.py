@@ -0,0 +1,71 @@
+import dash
+import numpy as np
+import pytest
+
+from calsim_dash_widgets import cards
+from calsim_dash_widgets.timeseries import ArrayTimeseries
+
+
+def make_ts(scenario: str, scale: float = 1.0) -> ArrayTimeseries:
+    return ArrayTimeseries(
+        scenario=scenario,
+        version="1",
+        path="/CALSIM/S_SHSTA/STORAGE//1MON/L2020A/",
+        values=np.arange(1, 25, dtype=np.float64) * scale,
+        dates=np.arange("2000-01", "2002-01", dtype="datetime64[M]").astype(
+            "datetime64[s]"
+        ),
+        units="TAF",
+        period_type="PER-AVER",
+        interval="1MON",
+    )
+
+
+BASE, ALT, NEW = make_ts("base"), make_ts("alt", 1.2), make_ts("new", 0.8)
+# Card, positional timeseries to build it, to patch it, and whether it has a
+# renderer
+CARDS = [
+    (cards.StorageCard, [BASE], [NEW], False),
+    (cards.AverageAnnualFlowCard, [BASE], [NEW], False),
+    (cards.SparklineCard, [BASE], [NEW], True),
+    (cards.SparklineMonthlyAverageCard, [BASE], [NEW], True),
+    (cards.CompareStorageCard, [BASE, ALT], [BASE, NEW], False),
+    (cards.ComparativeSparklineCard, [BASE, ALT], [BASE, NEW], True),
+    (cards.ComparativeSparklineMonthlyAverageCard, [BASE, ALT], [BASE, NEW], True),
+]
+
+
+def components_by_id(layout) -> dict[str, object]:
+    found = dict()
+    for component in layout._traverse():
+        component_id = getattr(component, "id", None)
+        if component_id is not None:
+            found[repr(component_id)] = component
+    return found
+
+
+@pytest.mark.parametrize("renderer", ["plotly", "svg"])
+@pytest.mark.parametrize("card, build, patch, has_renderer", CARDS)
+def test_patch_matches_outputs(card, build, patch, has_renderer, renderer: str):
+    renderer_kwargs = dict(renderer=renderer) if has_renderer else dict()
+    layout = card(*build, name="c", **renderer_kwargs)
+    outputs = card.outputs("c", renderer=renderer)
+    values = card.patch(*patch, **renderer_kwargs)
+    assert set(values) == set(outputs)
+    components = components_by_id(layout)
+    for part, output in outputs.items():
+        component = components[repr(output.component_id)]
+        assert output.component_property in component._prop_names, part
+    if renderer == "svg" and "sparkline" in values:
+        assert values["sparkline"].startswith("data:image/svg+xml")
+
+
+def test_svg_legend_is_patched():
+    values = cards.ComparativeSparklineCard.patch(BASE, NEW, renderer="svg")
+    names = [span.children[1] for span in values["legend"]]
+    assert names == ["base", "new"]
+
+
+def test_plotly_patch_is_partial():
+    values = cards.ComparativeSparklineCard.patch(BASE, NEW, base_changed=False)
+    assert isinstance(values["sparkline"], dash.Patch)
@@ -0,0 +1,112 @@
+import httpx
+import pytest
+
+from calsim_dash_widgets import clients
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def status_error(code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("GET", "http://csrs/timeseries")
+    response = httpx.Response(code, request=request)
+    return httpx.HTTPStatusError(f"{code}", request=request, response=response)
+
+
+class FlakyClient:
+    def __init__(self, errors: list[Exception]):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def get_timeseries(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return kwargs
+
+    def get_run(self, **kwargs):
+        return self.get_timeseries(**kwargs)
+
+
+def test_breaker_cycle():
+    clock = Clock()
+    breaker = clients.CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=clock)
+    assert breaker.state == "closed" and breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    clock.now = 10
+    assert breaker.state == "half-open"
+    assert breaker.allow()  # The single probe
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow() and breaker.allow()
+
+
+def test_failed_probe_reopens():
+    clock = Clock()
+    breaker = clients.CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=clock)
+    breaker.record_failure()
+    clock.now = 10
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    clock.now = 19
+    assert not breaker.allow()
+    clock.now = 20
+    assert breaker.allow()
+
+
+def test_retries_transient_errors():
+    client = FlakyClient([httpx.ConnectError("down"), status_error(503)])
+    resilient = clients.ResilientClient(client, retries=2, backoff=0)
+    assert resilient.get_timeseries(path="a") == {"path": "a"}
+    assert client.calls == 3
+    assert resilient.breaker.state == "closed"
+
+
+@pytest.mark.parametrize("error", [status_error(404), status_error(422), KeyError("x")])
+def test_does_not_retry_other_errors(error: Exception):
+    client = FlakyClient([error])
+    resilient = clients.ResilientClient(client, retries=3, backoff=0)
+    with pytest.raises(type(error)):
+        resilient.get_timeseries(path="a")
+    assert client.calls == 1
+    assert resilient.breaker.failures == 0  # The server answered
+
+
+def test_open_circuit_skips_calls():
+    client = FlakyClient([httpx.ConnectError("down")] * 2)
+    breaker = clients.CircuitBreaker(failure_threshold=1, clock=Clock())
+    resilient = clients.ResilientClient(client, retries=1, backoff=0, breaker=breaker)
+    with pytest.raises(httpx.ConnectError):
+        resilient.get_timeseries(path="a")
+    with pytest.raises(clients.CircuitOpenError):
+        resilient.get_timeseries(path="a")
+    assert client.calls == 2
+
+
+def test_get_client_is_shared_per_url(monkeypatch):
+    class RemoteClient:
+        def __init__(self, url: str):
+            self.url = url
+            self.http = httpx.Client(base_url=url)
+
+    monkeypatch.setattr(clients.csrs, "RemoteClient", RemoteClient, raising=False)
+    monkeypatch.setattr(clients, "_clients", dict())
+    a = clients.get_client("http://a/")
+    assert clients.get_client("http://a/") is a
+    b = clients.get_client("http://b/")
+    assert b is not a
+    assert a.client.url == "http://a/"
+    # The client's own httpx.Client is swapped for a pooled one
+    assert a.client.http.timeout.connect == 3.0
+    assert set(clients.stats()) == {"http://a/", "http://b/"}
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from calsim_dash_widgets import cache, compare
+from calsim_dash_widgets.timeseries import ArrayTimeseries
+
+
+def make_ts(version: str = "1", scale: float = 1.0) -> ArrayTimeseries:
+    return ArrayTimeseries(
+        scenario="base",
+        version=version,
+        path="shasta_storage",
+        values=np.arange(24, dtype=np.float64) * scale,
+        dates=np.arange("2000-01", "2002-01", dtype="datetime64[M]").astype(
+            "datetime64[s]"
+        ),
+        units="TAF",
+        period_type="PER-AVER",
+        interval="1MON",
+    )
+
+
+class Counter:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, ts: ArrayTimeseries) -> float:
+        self.calls += 1
+        return float(ts.values.sum())
+
+
+@pytest.fixture(params=["engine", "versioned"])
+def engine(request) -> compare.ComparisonEngine:
+    if request.param == "engine":
+        return compare.ComparisonEngine()
+    client = SimpleNamespace(get_run=lambda **kwargs: list())
+    return compare.ComparisonEngine(cache.VersionedCache(client))
+
+
+def test_baseline_is_reused(engine: compare.ComparisonEngine):
+    func = Counter()
+    first = engine.baseline(make_ts(), "sum", func)
+    # Same run version and path, even as a different object
+    assert engine.baseline(make_ts(), "sum", func) == first
+    assert func.calls == 1
+
+
+def test_new_version_is_recomputed(engine: compare.ComparisonEngine):
+    func = Counter()
+    engine.baseline(make_ts("1"), "sum", func)
+    assert engine.baseline(make_ts("2", scale=2.0), "sum", func) == 2 * 276.0
+    assert func.calls == 2
+
+
+def test_evicted_run_is_recomputed():
+    client = SimpleNamespace(get_run=lambda **kwargs: list())
+    versioned = cache.VersionedCache(client)
+    engine = compare.ComparisonEngine(versioned)
+    func = Counter()
+    engine.baseline(make_ts(), "sum", func)
+    versioned.evict_run("base", "1")
+    engine.baseline(make_ts(), "sum", func)
+    assert func.calls == 2
+
+
+def test_aggregate():
+    engine = compare.ComparisonEngine()
+    delta = engine.aggregate(make_ts(), make_ts("2", scale=2.0), "mean")
+    assert (delta.base, delta.alt) == (11.5, 23.0)
+    assert delta.diff_perc == pytest.approx(1.0)
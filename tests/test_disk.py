@@ -0,0 +1,50 @@
+from pathlib import Path
+
+import numpy as np
+
+from calsim_dash_widgets.disk import DiskTimeseriesStore
+from calsim_dash_widgets.timeseries import ArrayTimeseries
+
+
+def make_ts(path: str = "p", version: str = "1") -> ArrayTimeseries:
+    return ArrayTimeseries(
+        scenario="s",
+        version=version,
+        path=path,
+        values=np.arange(12, dtype=np.float64),
+        dates=np.arange("2000-01", "2001-01", dtype="datetime64[M]").astype(
+            "datetime64[s]"
+        ),
+        units="TAF",
+        period_type="PER-AVER",
+        interval="1MON",
+    )
+
+
+def test_round_trip_is_memory_mapped(tmp_path: Path):
+    store = DiskTimeseriesStore(tmp_path)
+    ts = store.put(make_ts(), fingerprint="a")
+    assert isinstance(ts.values.base, np.memmap) or isinstance(ts.values, np.memmap)
+    np.testing.assert_array_equal(ts.values, make_ts().values)
+    np.testing.assert_array_equal(ts.dates, make_ts().dates)
+
+
+def test_other_fingerprint_is_a_miss(tmp_path: Path):
+    store = DiskTimeseriesStore(tmp_path)
+    store.put(make_ts(), fingerprint="old")
+    assert store.get("s", "1", "p", fingerprint="new") is None
+    # The other worker's entry is left alone
+    assert store.get("s", "1", "p", fingerprint="old") is not None
+
+
+def test_evict_run_keeps_current_fingerprint(tmp_path: Path):
+    store = DiskTimeseriesStore(tmp_path)
+    store.put(make_ts("a"), fingerprint="old")
+    store.put(make_ts("b"), fingerprint="new")
+    store.put(make_ts("a", version="2"), fingerprint="old")
+    assert store.evict_run("s", "1", current="new") == 1
+    assert store.get("s", "1", "a", fingerprint="old") is None
+    assert store.get("s", "1", "b", fingerprint="new") is not None
+    assert store.get("s", "2", "a", fingerprint="old") is not None
+    assert store.evict_run("s", "1") == 1
+    assert ("s", "1", "b", "new") not in store
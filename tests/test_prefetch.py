@@ -0,0 +1,135 @@
+import threading
+import time
+from types import SimpleNamespace
+
+from calsim_dash_widgets import cache, prefetch
+
+
+class Run(SimpleNamespace):
+    def model_dump(self, mode: str = "json") -> dict:
+        return dict(vars(self))
+
+
+class SlowClient:
+    """Blocks every timeseries request until `release` is set."""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def get_run(self, scenario: str, version: str) -> list[Run]:
+        return [Run(scenario=scenario, version=version)]
+
+    def get_timeseries(self, scenario: str, version: str, path: str):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            self.release.wait(timeout=5)
+            return SimpleNamespace(
+                scenario=scenario,
+                version=version,
+                path=path,
+                values=(),
+            )
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+def test_background_loads_are_not_foreground():
+    client = SlowClient()
+    versioned = cache.VersionedCache(client)
+    thread = threading.Thread(
+        target=versioned.get_timeseries,
+        args=("s", "1", "a"),
+        kwargs=dict(background=True),
+    )
+    thread.start()
+    assert wait_for(lambda: client.active == 1)
+    assert not versioned.loading()
+    client.release.set()
+    thread.join()
+    assert cache.ArtifactKey("s", "1", "a") in versioned
+
+
+def test_foreground_load_is_counted():
+    client = SlowClient()
+    versioned = cache.VersionedCache(client)
+    thread = threading.Thread(target=versioned.get_timeseries, args=("s", "1", "a"))
+    thread.start()
+    assert wait_for(lambda: client.active == 1)
+    assert versioned.loading()
+    client.release.set()
+    thread.join()
+    assert not versioned.loading()
+
+
+def test_prefetch_workers_run_concurrently():
+    client = SlowClient()
+    versioned = cache.VersionedCache(client)
+    prefetcher = prefetch.Prefetcher(versioned, max_workers=2, pause=0.01)
+    runs = [Run(scenario="s", version="1")]
+    assert prefetcher.request(runs, ["a", "b"]) == 2
+    prefetcher.start()
+    try:
+        # Each worker would wait on the other's load if they were foreground
+        assert wait_for(lambda: client.max_active == 2)
+        client.release.set()
+        assert wait_for(lambda: prefetcher.prefetched == 2)
+    finally:
+        client.release.set()
+        prefetcher.stop()
+    assert len(versioned) == 2
+
+
+def test_prefetch_yields_to_foreground():
+    client = SlowClient()
+    versioned = cache.VersionedCache(client)
+    prefetcher = prefetch.Prefetcher(versioned, max_workers=1, pause=0.01)
+    foreground = threading.Thread(
+        target=versioned.get_timeseries, args=("s", "1", "page")
+    )
+    foreground.start()
+    assert wait_for(lambda: client.active == 1)
+    prefetcher.request([Run(scenario="s", version="1")], ["next"])
+    prefetcher.start()
+    try:
+        time.sleep(0.1)
+        assert client.max_active == 1  # The prefetch did not start
+        client.release.set()
+        foreground.join()
+        assert wait_for(lambda: prefetcher.prefetched == 1)
+    finally:
+        client.release.set()
+        prefetcher.stop()
+
+
+def test_counts_are_exact_with_many_workers():
+    client = SlowClient()
+    client.release.set()
+    versioned = cache.VersionedCache(client)
+    prefetcher = prefetch.Prefetcher(versioned, max_workers=4, pause=0)
+    runs = [Run(scenario="s", version="1")]
+    paths = [f"p{i}" for i in range(200)]
+    assert prefetcher.request(runs, paths) == 200
+    prefetcher.request(runs, paths[:50])  # Already queued, skipped once cached
+    prefetcher.start()
+    try:
+        assert wait_for(lambda: prefetcher.pending() == 0)
+        prefetcher._queue.join()
+    finally:
+        prefetcher.stop()
+    assert prefetcher.prefetched == 200
+    assert prefetcher.prefetched + prefetcher.skipped == 250
@@ -0,0 +1,70 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from dash import html
+
+from calsim_dash_widgets import prerender
+
+
+class Client:
+    def __init__(self):
+        self.calls = 0
+
+    def get_timeseries(self, scenario: str, version: str, path: str):
+        self.calls += 1
+        return SimpleNamespace(scenario=scenario, version=version, path=path)
+
+
+def widget(*timeseries, **kwargs) -> html.Div:
+    return html.Div(
+        [f"{ts.scenario} {ts.path}" for ts in timeseries],
+        className=kwargs.get("className"),
+    )
+
+
+@pytest.fixture
+def layouts(monkeypatch) -> prerender.PrerenderedLayouts:
+    monkeypatch.setattr(prerender, "resolve_widget", lambda name: widget)
+    pages = {
+        "page": prerender.PageSpec(
+            widgets=["Widget"],
+            paths=["a", "b"],
+            runs=[("base",)],
+            kwargs={"Widget": {"className": "card"}},
+        )
+    }
+    return prerender.PrerenderedLayouts(pages)
+
+
+RUNS = {"base": SimpleNamespace(scenario="base", version="1")}
+
+
+def test_layout_serves_prerendered(layouts: prerender.PrerenderedLayouts):
+    for task in layouts.tasks("page"):
+        layouts.layouts[task.key()] = json.dumps(
+            {"type": "Div", "namespace": "dash_html_components", "props": {}}
+        )
+    client = Client()
+    page = layouts.layout("page", runs=RUNS, client=client)()
+    assert isinstance(page, html.Div)
+    assert len(page.children) == 2
+    assert all(isinstance(c, dict) for c in page.children)
+    assert client.calls == 0
+
+
+def test_layout_renders_missing_live(layouts: prerender.PrerenderedLayouts):
+    client = Client()
+    layout = layouts.layout("page", runs=RUNS, client=client)
+    page = layout()
+    assert [c.children for c in page.children] == [["base a"], ["base b"]]
+    assert page.children[0].className == "card"
+    assert client.calls == 2
+    # Kept in the store, the next request doesn't render again
+    again = layout()
+    assert [c["props"]["children"] for c in again.children] == [["base a"], ["base b"]]
+    assert client.calls == 2
+
+
+def test_layout_without_runs_skips_missing(layouts: prerender.PrerenderedLayouts):
+    assert layouts.layout("page")().children == []
@@ -0,0 +1,33 @@
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from calsim_dash_widgets import alerts, clients, report
+
+SPEC = {"Storage": [(alerts.MeanStorageAlert, "shasta_storage", "Shasta")]}
+OBSERVED = SimpleNamespace(scenario="alt", version="1")
+EXPECTED = SimpleNamespace(scenario="base", version="1")
+
+
+class Versioned:
+    def __init__(self, error: Exception):
+        self.error = error
+
+    def get_timeseries(self, scenario: str, version: str, path: str):
+        raise self.error
+
+
+@pytest.mark.parametrize(
+    "error",
+    [httpx.ConnectError("down"), clients.CircuitOpenError("open")],
+)
+def test_unavailable_data_is_reported(error: Exception):
+    (row,) = report.evaluate_pair(OBSERVED, EXPECTED, Versioned(error), SPEC)
+    assert row.status == "unavailable"
+    assert row.detail == f"Data unavailable: {type(error).__name__}"
+
+
+def test_other_errors_propagate():
+    with pytest.raises(KeyError):
+        report.evaluate_pair(OBSERVED, EXPECTED, Versioned(KeyError("bug")), SPEC)
@@ -0,0 +1,63 @@
+import gc
+
+import numpy as np
+import pytest
+
+from calsim_dash_widgets.shared import SharedDataset
+from calsim_dash_widgets.timeseries import ArrayTimeseries
+
+
+def make_ts(path: str, start: str, periods: int) -> ArrayTimeseries:
+    dates = np.arange(
+        np.datetime64(start, "M"),
+        np.datetime64(start, "M") + periods,
+    ).astype("datetime64[s]")
+    return ArrayTimeseries(
+        scenario="s",
+        version="1",
+        path=path,
+        values=np.arange(periods, dtype=np.float64),
+        dates=dates,
+        units="TAF",
+        period_type="PER-AVER",
+        interval="1MON",
+    )
+
+
+@pytest.fixture
+def timeseries() -> dict[str, ArrayTimeseries]:
+    return {
+        "a": make_ts("a", "2000-01", 24),
+        "b": make_ts("b", "2000-07", 6),  # A shorter, offset series
+        "empty": make_ts("empty", "2000-01", 0),
+    }
+
+
+def test_create_attach_round_trip(timeseries: dict[str, ArrayTimeseries]):
+    created = SharedDataset.create(timeseries)
+    try:
+        # Attaching in the creating process makes the resource tracker print a
+        # KeyError when the block is unlinked, workers are separate processes
+        attached = SharedDataset.attach(created.name)
+        assert attached.keys == list(timeseries)
+        for key, expected in timeseries.items():
+            ts = attached[key]
+            assert ts.path == expected.path
+            assert ts.units == expected.units
+            np.testing.assert_array_equal(ts.values, expected.values)
+            np.testing.assert_array_equal(ts.dates, expected.dates)
+            assert not ts.values.flags.writeable
+        del ts
+        attached.close()
+    finally:
+        created.close()
+
+
+def test_close_with_live_views(timeseries: dict[str, ArrayTimeseries]):
+    created = SharedDataset.create(timeseries)
+    view = created["a"]
+    with pytest.raises(BufferError):
+        created.close()
+    del view
+    gc.collect()
+    created.close()
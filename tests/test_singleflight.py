@@ -0,0 +1,86 @@
+import threading
+import time
+
+import pytest
+
+from calsim_dash_widgets.singleflight import SingleFlight
+
+N = 8
+
+
+def wait_for(condition, timeout: float = 5.0) -> bool:
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        if condition():
+            return True
+        time.sleep(0.005)
+    return False
+
+
+def run_concurrently(flight: SingleFlight, func) -> list:
+    results = [None] * N
+
+    def call(i: int):
+        try:
+            results[i] = flight.do("key", func)
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(N)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    release = threading.Event()
+    executions = list()
+
+    def func():
+        executions.append(1)
+        release.wait(timeout=5)
+        return object()
+
+    threads, results = run_concurrently(flight, func)
+    # Every caller has joined before the leader is released
+    assert wait_for(lambda: flight.stats()["calls"] == N)
+    assert flight.stats()["in_flight"] == 1
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert len(executions) == 1
+    assert all(r is results[0] for r in results)
+    assert flight.stats() == {
+        "calls": N,
+        "executed": 1,
+        "coalesced": N - 1,
+        "in_flight": 0,
+    }
+
+
+def test_error_is_shared_with_waiters():
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def func():
+        release.wait(timeout=5)
+        raise ValueError("failed")
+
+    threads, results = run_concurrently(flight, func)
+    assert wait_for(lambda: flight.stats()["calls"] == N)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert all(isinstance(r, ValueError) for r in results)
+    assert all(r is results[0] for r in results)
+    assert flight.in_flight() == 0
+
+
+def test_later_calls_execute_again():
+    flight = SingleFlight()
+    assert flight.do("key", lambda: 1) == 1
+    assert flight.do("key", lambda: 2) == 2
+    with pytest.raises(KeyError):
+        flight.do("key", dict().__getitem__, "missing")
+    assert flight.stats()["executed"] == 3
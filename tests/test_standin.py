@@ -0,0 +1,83 @@
+import time
+from pathlib import Path
+
+import csrs
+import httpx
+import pandss as pdss
+import pytest
+
+from calsim_dash_widgets.standin import StandInServer
+
+
+def make_run(scenario: str, version: str) -> csrs.Run:
+    return csrs.Run(
+        scenario=scenario,
+        version=version,
+        contact="test@example.com",
+        code_version="0.0.0",
+        detail="Stand-in test run",
+    )
+
+
+@pytest.fixture
+def server(dss_file: Path, rts: pdss.RegularTimeseries) -> StandInServer:
+    return StandInServer(
+        [(make_run("base", "1.0"), dss_file), (make_run("alt", "1.0"), dss_file)],
+        paths={"test_path": str(rts.path)},
+    )
+
+
+def test_remote_client_gets_runs(server: StandInServer):
+    client = server.client()
+    runs = client.get_run(scenario="alt", version="1.0")
+    assert [(r.scenario, r.version) for r in runs] == [("alt", "1.0")]
+    assert server.requests >= 1
+
+
+def test_remote_client_gets_timeseries(
+    server: StandInServer,
+    rts: pdss.RegularTimeseries,
+):
+    client = server.client()
+    ts = client.get_timeseries(scenario="base", version="1.0", path="test_path")
+    assert (ts.scenario, ts.version) == ("base", "1.0")
+    assert len(ts.values) == len(rts.values)
+
+
+def test_remote_client_over_http(server: StandInServer):
+    with server:
+        client = csrs.RemoteClient(server.url)
+        assert len(client.get_run(scenario="base", version="1.0")) == 1
+
+
+def get(server: StandInServer) -> httpx.Response:
+    return server.handle(httpx.Request("GET", "http://standin/runs"))
+
+
+def test_failure_rate_is_seeded():
+    def statuses(seed: int) -> list[int]:
+        server = StandInServer([], failure_rate=0.5, seed=seed)
+        return [get(server).status_code for _ in range(50)]
+
+    first = statuses(7)
+    assert first == statuses(7)
+    assert set(first) == {200, 503}
+    assert StandInServer([], failure_rate=1.0, seed=1).handle(
+        httpx.Request("GET", "http://standin/runs")
+    ).status_code == 503
+
+
+def test_failures_are_counted():
+    server = StandInServer([], failure_rate=0.5, seed=3)
+    statuses = [get(server).status_code for _ in range(20)]
+    assert server.requests == 20
+    assert server.failures == statuses.count(503)
+
+
+def test_latency():
+    server = StandInServer([], latency=0.05, jitter=0.05, seed=0)
+    start = time.perf_counter()
+    for _ in range(4):
+        assert get(server).status_code == 200
+    elapsed = time.perf_counter() - start
+    assert 4 * 0.05 <= elapsed < 4 * 0.1 + 0.5
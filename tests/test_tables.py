@@ -0,0 +1,83 @@
+import pandas as pd
+import pytest
+
+from calsim_dash_widgets import tables
+
+
+@pytest.fixture
+def df() -> pd.DataFrame:
+    return pd.DataFrame(
+        {
+            "scenario": ["Historical", "Adjusted Historical", "CC 95%", "CC 50%"],
+            "path": ["shasta", "shasta", "oroville", "banks"],
+            "mean": [3000.0, 2500.0, 1000.0, 4500.5],
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "query, expected",
+    [
+        ("{mean} > 2500", [0, 3]),
+        ("{mean} gt 2500", [0, 3]),
+        ("{mean} >= 2500", [0, 1, 3]),
+        ("{mean} s>= 2500", [0, 1, 3]),
+        ("{mean} < 2500", [2]),
+        ("{mean} <= 2500", [1, 2]),
+        ("{mean} = 4500.5", [3]),
+        ("{mean} eq 1000", [2]),
+        ("{mean} != 1000", [0, 1, 3]),
+        ("{mean} ne 1000", [0, 1, 3]),
+        ("{mean} > abc", [0, 1, 2, 3]),  # Not a number, ignored
+        ("{path} = shasta", [0, 1]),
+        ('{path} = "shasta"', [0, 1]),
+        ("{path} = 'oroville'", [2]),
+        ("{scenario} contains hist", [0, 1]),
+        ('{scenario} contains "CC 9"', [2]),
+        ("{scenario} datestartswith CC", [2, 3]),
+        ("{path} = shasta && {mean} > 2600", [0]),
+        ("{scenario} contains CC && {mean} < 2000 && {path} = oroville", [2]),
+        ("{missing} = 1", [0, 1, 2, 3]),  # Unknown columns are ignored
+        ("not a clause", [0, 1, 2, 3]),
+        ("", [0, 1, 2, 3]),
+    ],
+)
+def test_filter_frame(df: pd.DataFrame, query: str, expected: list[int]):
+    assert tables.filter_frame(df, query).index.tolist() == expected
+
+
+def test_sort_frame(df: pd.DataFrame):
+    sort_by = [
+        {"column_id": "path", "direction": "desc"},
+        {"column_id": "mean", "direction": "asc"},
+    ]
+    assert tables.sort_frame(df, sort_by).index.tolist() == [1, 0, 2, 3]
+    assert tables.sort_frame(df, []) is df
+
+
+def test_page_of(df: pd.DataFrame):
+    rows, page_count = tables.page_of(df, 1, 3)
+    assert page_count == 2
+    assert [r["mean"] for r in rows] == [4500.5]
+
+
+def test_page_of_clamps_after_filter(df: pd.DataFrame):
+    # On page 2 of 2, a filter leaving one page shows that page
+    rows, page_count = tables.page_of(df, 1, 3, filter_query="{path} = shasta")
+    assert page_count == 1
+    assert [r["scenario"] for r in rows] == ["Historical", "Adjusted Historical"]
+
+
+def test_page_of_empty(df: pd.DataFrame):
+    rows, page_count = tables.page_of(df, 3, 2, filter_query="{mean} > 1e9")
+    assert (rows, page_count) == ([], 1)
+
+
+def test_registered_loader_runs_once(monkeypatch, df: pd.DataFrame):
+    monkeypatch.setattr(tables, "_TABLES", dict())
+    monkeypatch.setattr(tables, "_LOADERS", dict())
+    calls = list()
+    tables.register("stats", lambda: calls.append(1) or df)
+    assert tables._table("stats") is tables._table("stats")
+    assert calls == [1]
+    assert tables._table("other") is None